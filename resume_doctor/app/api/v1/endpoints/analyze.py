@@ -5,28 +5,45 @@ Provides vitals check (free) and deep scan (premium) analysis endpoints
 with tier-based rate limiting and file validation.
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Header, Request
-from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Optional
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from app.services.gemini_service import analyze_with_gemini
-from app.services.nlp_service import vitals_check
+from app.services.gemini_service import analyze_with_gemini_async, stream_deep_scan
+from app.services.nlp_service import (
+    VITALS_MAX_CHARS,
+    VitalsMode,
+    cacheable_vitals_result,
+    vitals_check_text_async,
+)
+from app.services.pdf_engine import PDFExtractionError
+from app.services.pdf_text import get_pdf_text
+from app.services.result_cache import analysis_cache, deep_scan_cache_key, get_or_compute, vitals_cache_key
+from app.core.errors import get_error_headers, get_error_status_code, get_user_error
 from app.core.auth import get_user_info, get_user_info_optional, check_tier_access
 from app.core.config import settings
+from app.core.jobs import JobQueueFull, job_runner
+from app.core.metrics import gemini_caller
+from app.core.responses import FastJSONResponse, dumps
+from app.core.timing import span
+from app.core.concurrency import priority
+from app.core.resilience import AIServiceError, deadline
+from app.core.uploads import UploadRejected, read_pdf_upload
 from app.core.rate_limits import (
     get_rate_limit_key,
     check_tier_access as check_rate_limit_access,
     get_tier_from_request,
-    VITALS_GUEST_LIMIT,
-    VITALS_FREE_LIMIT,
-    DEEP_SCAN_PRO_LIMIT,
-    DEEP_SCAN_INFINITE_LIMIT,
-    limiter
+    tier_rate_limit
 )
 
 router = APIRouter()
 
+# Time budget for the Gemini work behind each endpoint (retries included)
+VITALS_DEADLINE_SECONDS = 20
+DEEP_SCAN_DEADLINE_SECONDS = 90
+
 
 def validate_pdf_file(file: UploadFile) -> None:
     """
@@ -59,24 +76,32 @@ def validate_pdf_file(file: UploadFile) -> None:
 
 async def read_and_validate_pdf(file: UploadFile) -> bytes:
     """
-    Read PDF content and validate size after reading.
+    Stream PDF content, validating size and signature while reading.
     Returns raw PDF bytes.
     """
-    pdf_content = await file.read()
-    
-    # Validate size after reading (in case size wasn't in headers)
-    if len(pdf_content) > settings.MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "error": "File too large",
-                "detail": f"Maximum file size is {settings.MAX_FILE_SIZE_MB}MB",
-                "file_size_mb": round(len(pdf_content) / 1024 / 1024, 2),
-                "max_size_mb": settings.MAX_FILE_SIZE_MB
-            }
-        )
-    
-    if len(pdf_content) < 100:
+    try:
+        with span("upload"):
+            return await read_pdf_upload(file, settings.MAX_FILE_SIZE_BYTES, min_bytes=100)
+    except UploadRejected as e:
+        if e.reason == UploadRejected.TOO_LARGE:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "File too large",
+                    "detail": f"Maximum file size is {settings.MAX_FILE_SIZE_MB}MB",
+                    "file_size_mb": round(e.size / 1024 / 1024, 2),
+                    "max_size_mb": settings.MAX_FILE_SIZE_MB
+                }
+            )
+        if e.reason == UploadRejected.NOT_PDF:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid file type",
+                    "detail": "Only PDF files are supported",
+                    "content_type": file.content_type
+                }
+            )
         raise HTTPException(
             status_code=400,
             detail={
@@ -84,15 +109,18 @@ async def read_and_validate_pdf(file: UploadFile) -> bytes:
                 "detail": "File appears to be empty or corrupted"
             }
         )
-    
-    return pdf_content
 
 
-@router.post("/vitals")
-@limiter.limit(VITALS_GUEST_LIMIT)  # Default lower limit, overridden by tier logic in limiter if needed
+def vitals_mode(mode: VitalsMode = Query(settings.VITALS_DEFAULT_MODE)) -> str:
+    """?mode= for /vitals, validated (422) before the Vitals quota is charged"""
+    return mode
+
+
+@router.post("/vitals", dependencies=[Depends(tier_rate_limit("vitals", validate=vitals_mode))])
 async def vitals_check_endpoint(
     request: Request,
     file: UploadFile = File(...),
+    mode: str = Depends(vitals_mode),
     x_api_key: Optional[str] = Header(None),
     x_user_id: Optional[str] = Header(None),
     x_user_tier: Optional[str] = Header(None)
@@ -100,16 +128,22 @@ async def vitals_check_endpoint(
     """
     Vitals Check - Available to all users (guest, free, paid)
     
-    Performs lightweight local analysis of resume:
+    Performs lightweight analysis of resume:
     - Readability score
     - Action verb analysis
     - Quantifiable metrics detection
     - Contact info validation
     
-    Rate Limits (per 24 hours):
-    - Guest: 3 requests
-    - Free: 10 requests
-    - Pro/Infinite: 20-100 requests
+    Scoring modes (?mode=):
+    - local: deterministic on-server scoring, no Gemini call
+    - llm: Gemini Flash-Lite scoring
+    - hybrid: local scores with Gemini section feedback
+    
+    Rate Limits (per 24 hours, from TIER_RATE_LIMITS):
+    - Guest: 1 request
+    - Free: 3 requests
+    - Pro: 10 requests
+    - Truly Infinite: 15 requests
     """
     # Validate file
     validate_pdf_file(file)
@@ -121,17 +155,37 @@ async def vitals_check_endpoint(
     
     try:
         pdf_content = await read_and_validate_pdf(file)
-        result = vitals_check(pdf_content)
         
-        return {
+        async def compute():
+            # Cached text (parsed in the process pool on a miss), then async Gemini scoring
+            with span("pdf_text"):
+                text = await get_pdf_text(pdf_content, VITALS_MAX_CHARS, settings.VITALS_MAX_PAGES)
+            return await vitals_check_text_async(text, mode)
+        
+        with deadline(VITALS_DEADLINE_SECONDS), priority(tier), gemini_caller("vitals"):
+            result, cached = await get_or_compute(
+                vitals_cache_key(pdf_content, mode),
+                compute,
+                cacheable=cacheable_vitals_result,
+            )
+        
+        # Returned as a response so FastAPI does not walk the result with jsonable_encoder
+        return FastJSONResponse({
             "type": "vitals",
             "result": result,
+            "cached": cached,
             "tier_required": "infinite-free",
             "user_tier": tier,
             "user_id": user_id
-        }
+        })
     except HTTPException:
         raise
+    except (PDFExtractionError, AIServiceError) as e:
+        raise HTTPException(
+            status_code=get_error_status_code(e.code),
+            detail=get_user_error(e.code),
+            headers=get_error_headers(e.code)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -142,8 +196,68 @@ async def vitals_check_endpoint(
         )
 
 
-@router.post("/deep-scan")
-@limiter.limit(DEEP_SCAN_PRO_LIMIT)
+def require_deep_scan_access(
+    x_api_key: Optional[str],
+    x_user_id: Optional[str],
+    x_user_tier: Optional[str]
+) -> dict:
+    """
+    Verify authentication and subscription tier for Deep Scan.
+    Returns user info; raises HTTPException otherwise.
+    """
+    user_data = get_user_info(x_api_key, x_user_id, x_user_tier)
+    tier = user_data.get("tier", "infinite-free")
+    
+    if not check_tier_access(tier, ["infinite-pro", "truly-infinite"]):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "Subscription required",
+                "detail": "Deep Scan requires Pro or Truly Infinite subscription",
+                "current_tier": tier,
+                "required_tiers": ["infinite-pro", "truly-infinite"],
+                "upgrade_url": "/pricing"
+            }
+        )
+    return user_data
+
+
+async def run_deep_scan(pdf_content: bytes, job_description: Optional[str], user_data: dict) -> dict:
+    """
+    Deep Scan response body (served from the result cache when possible).
+    
+    Raises:
+        AIServiceError: Gemini unavailable or the deadline ran out
+    """
+    tier = user_data.get("tier", "infinite-free")
+    with deadline(DEEP_SCAN_DEADLINE_SECONDS), priority(tier), gemini_caller("deep-scan"):
+        result, cached = await get_or_compute(
+            deep_scan_cache_key(pdf_content, job_description),
+            lambda: analyze_with_gemini_async(pdf_content, job_description),
+            cacheable=lambda r: "error" not in r,
+        )
+    
+    return {
+        "type": "deep_scan",
+        "result": result,
+        "cached": cached,
+        "tier_required": "infinite-pro",
+        "user_tier": tier,
+        "user_id": user_data.get("userId")
+    }
+
+
+def deep_scan_job_error(response: dict) -> Optional[dict]:
+    """Error payload for a job whose analysis returned an error result"""
+    if "error" not in response["result"]:
+        return None
+    return {
+        "error": "Deep scan failed",
+        "detail": "AI analysis encountered an error. Please try again."
+    }
+
+
+@router.post("/deep-scan", dependencies=[Depends(tier_rate_limit("deep_scan"))])
 async def deep_scan_endpoint(
     request: Request,
     file: UploadFile = File(...),
@@ -161,43 +275,27 @@ async def deep_scan_endpoint(
     - Keyword gap analysis
     - Actionable recommendations
     
-    Rate Limits (per 24 hours):
-    - Pro: 10 requests
-    - Truly Infinite: 50 requests
+    Rate Limits (per 24 hours, shared with /deep-scan/stream and /deep-scan/jobs):
+    - Pro: 5 requests
+    - Truly Infinite: 10 requests
     """
     # Validate file
     validate_pdf_file(file)
     
-    # Verify authentication (required for deep scan)
-    user_data = get_user_info(x_api_key, x_user_id, x_user_tier)
-    tier = user_data.get("tier", "infinite-free")
-    
-    # Check subscription tier
-    if not check_tier_access(tier, ["infinite-pro", "truly-infinite"]):
-        raise HTTPException(
-            status_code=403,
-            detail={
-                "error": "Subscription required",
-                "detail": "Deep Scan requires Pro or Truly Infinite subscription",
-                "current_tier": tier,
-                "required_tiers": ["infinite-pro", "truly-infinite"],
-                "upgrade_url": "/pricing"
-            }
-        )
+    # Verify authentication and subscription tier (required for deep scan)
+    user_data = require_deep_scan_access(x_api_key, x_user_id, x_user_tier)
     
     try:
         pdf_content = await read_and_validate_pdf(file)
-        result = analyze_with_gemini(pdf_content, job_description)
-        
-        return {
-            "type": "deep_scan",
-            "result": result,
-            "tier_required": "infinite-pro",
-            "user_tier": tier,
-            "user_id": user_data.get("userId")
-        }
+        return FastJSONResponse(await run_deep_scan(pdf_content, job_description, user_data))
     except HTTPException:
         raise
+    except AIServiceError as e:
+        raise HTTPException(
+            status_code=get_error_status_code(e.code),
+            detail=get_user_error(e.code),
+            headers=get_error_headers(e.code)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -208,6 +306,174 @@ async def deep_scan_endpoint(
         )
 
 
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def deep_scan_events(
+    pdf_content: bytes,
+    job_description: Optional[str],
+    user_data: dict
+) -> AsyncIterator[str]:
+    """
+    SSE body for /deep-scan/stream.
+    A cached result is replayed immediately; otherwise fields are relayed as Gemini
+    produces them and the finished result is cached like /deep-scan.
+    """
+    key = deep_scan_cache_key(pdf_content, job_description)
+    result = await analysis_cache.get(key)
+    cached = result is not None
+    
+    if cached:
+        for field, value in result.items():
+            if field == "sections":
+                for index, section in enumerate(value):
+                    yield sse_event("section", {"index": index, "value": section})
+            else:
+                yield sse_event("field", {"key": field, "value": value})
+    else:
+        try:
+            tier = user_data.get("tier", "infinite-free")
+            with deadline(DEEP_SCAN_DEADLINE_SECONDS), priority(tier), gemini_caller("deep-scan"):
+                async for event, data in stream_deep_scan(pdf_content, job_description):
+                    if event == "result":
+                        result = data
+                    else:
+                        yield sse_event(event, data)
+        except AIServiceError as e:
+            yield sse_event("error", get_user_error(e.code))
+            return
+        
+        if "error" in result:
+            yield sse_event("error", {
+                "error": "Deep scan failed",
+                "detail": "AI analysis encountered an error. Please try again."
+            })
+            return
+        await analysis_cache.set(key, result)
+    
+    yield sse_event("done", {
+        "type": "deep_scan",
+        "result": result,
+        "cached": cached,
+        "tier_required": "infinite-pro",
+        "user_tier": user_data.get("tier", "infinite-free"),
+        "user_id": user_data.get("userId")
+    })
+
+
+@router.post("/deep-scan/stream", dependencies=[Depends(tier_rate_limit("deep_scan"))])
+async def deep_scan_stream_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    job_description: Optional[str] = Form(None),
+    x_api_key: Optional[str] = Header(None),
+    x_user_id: Optional[str] = Header(None),
+    x_user_tier: Optional[str] = Header(None)
+):
+    """
+    Deep Scan streamed as Server-Sent Events - same access rules and rate limits as /deep-scan.
+    
+    Events:
+    - field: {"key", "value"} for each top-level field as soon as it is generated (scores first)
+    - section: {"index", "value"} for each entry of "sections", one at a time
+    - done: the full /deep-scan response body (last event)
+    - error: analysis failed (last event)
+    """
+    validate_pdf_file(file)
+    user_data = require_deep_scan_access(x_api_key, x_user_id, x_user_tier)
+    pdf_content = await read_and_validate_pdf(file)
+    
+    return StreamingResponse(
+        deep_scan_events(pdf_content, job_description, user_data),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering
+        }
+    )
+
+
+@router.post("/deep-scan/jobs", status_code=202, dependencies=[Depends(tier_rate_limit("deep_scan"))])
+async def submit_deep_scan_job(
+    request: Request,
+    file: UploadFile = File(...),
+    job_description: Optional[str] = Form(None),
+    x_api_key: Optional[str] = Header(None),
+    x_user_id: Optional[str] = Header(None),
+    x_user_tier: Optional[str] = Header(None)
+):
+    """
+    Deep Scan as a background job - same access rules and rate limits as /deep-scan.
+    
+    Returns a job id immediately; poll GET /jobs/{job_id} until status is
+    "succeeded" (result holds the /deep-scan response body) or "failed".
+    """
+    validate_pdf_file(file)
+    user_data = require_deep_scan_access(x_api_key, x_user_id, x_user_tier)
+    pdf_content = await read_and_validate_pdf(file)
+    
+    try:
+        job = await job_runner.submit(
+            "deep_scan",
+            user_data.get("userId"),
+            lambda: run_deep_scan(pdf_content, job_description, user_data),
+            failed=deep_scan_job_error,
+            size=len(pdf_content),
+        )
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Server busy",
+                "detail": "Too many analyses are queued. Please try again shortly."
+            },
+            headers={"Retry-After": "30"}
+        )
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"{settings.API_V1_STR}/analyze/jobs/{job.id}"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    x_api_key: Optional[str] = Header(None),
+    x_user_id: Optional[str] = Header(None),
+    x_user_tier: Optional[str] = Header(None)
+):
+    """
+    Status of a background analysis job.
+    Jobs are only visible to the user who submitted them.
+    """
+    user_data = get_user_info(x_api_key, x_user_id, x_user_tier)
+    job = await job_runner.get(job_id)
+    
+    # Someone else's job is reported as missing, not forbidden
+    if job is None or job.owner != user_data.get("userId"):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Job not found",
+                "detail": "The job does not exist or has expired."
+            }
+        )
+    
+    return FastJSONResponse({
+        "job_id": job.id,
+        "type": job.kind,
+        "status": job.status,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "result": job.result,
+        "error": job.error
+    })
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for analyze router"""
@@ -216,7 +482,10 @@ async def health_check():
         "service": "Resume Doctor - Analysis",
         "endpoints": {
             "vitals": "POST /api/v1/analyze/vitals",
-            "deep_scan": "POST /api/v1/analyze/deep-scan"
+            "deep_scan": "POST /api/v1/analyze/deep-scan",
+            "deep_scan_stream": "POST /api/v1/analyze/deep-scan/stream",
+            "deep_scan_job": "POST /api/v1/analyze/deep-scan/jobs",
+            "job_status": "GET /api/v1/analyze/jobs/{job_id}"
         },
         "config": {
             "max_file_size_mb": settings.MAX_FILE_SIZE_MB
@@ -5,46 +5,55 @@ API endpoint for extracting structured resume data from PDFs or text.
 Includes file validation, size limits, and security checks.
 """
 
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Header
-from fastapi.responses import JSONResponse
+import logging
+
+from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, Header
+from app.core.responses import FastJSONResponse
 from typing import Optional
-from app.services.resume_extractor import extract_resume
+from app.services.resume_extractor import extract_resume_async
 from app.core.config import settings
 from app.core.auth import get_user_info
+from app.core.errors import get_error_headers, get_error_status_code
+from app.core.concurrency import priority
+from app.core.metrics import gemini_caller
+from app.core.rate_limits import token_budget
+from app.core.resilience import AIServiceError, deadline
+from app.core.timing import span
+from app.core.uploads import UploadRejected, read_pdf_upload
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Maximum file size: 2MB
 MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
 
-# PDF magic bytes signature
-PDF_MAGIC = b"%PDF"
+# Time budget for the Gemini extraction call (retries included)
+EXTRACT_DEADLINE_SECONDS = 45
 
+# User-facing messages for rejected uploads
+UPLOAD_ERROR_MESSAGES = {
+    UploadRejected.TOO_LARGE: "Your file is too large (max 2MB). Try compressing the PDF or removing images.",
+    UploadRejected.TOO_SMALL: "The file appears to be empty or corrupted.",
+    UploadRejected.NOT_PDF: "Please upload a PDF file. Other formats aren't supported yet.",
+}
 
-def validate_pdf_file(file_content: bytes) -> tuple[bool, str]:
-    """
-    Validate that the uploaded file is a legitimate PDF.
-    Uses pure Python magic byte checking - no system dependencies.
-    
-    Returns:
-        tuple of (is_valid, error_message)
-    """
-    # Check file size
-    if len(file_content) > MAX_FILE_SIZE:
-        return False, "Your file is too large (max 2MB). Try compressing the PDF or removing images."
-    
-    # Check if content is empty
-    if len(file_content) < 10:
-        return False, "The file appears to be empty or corrupted."
-    
-    # Check PDF magic bytes (PDF signature: %PDF-x.x)
-    if not file_content[:4].startswith(PDF_MAGIC):
-        return False, "Please upload a PDF file. Other formats aren't supported yet."
-    
-    return True, ""
 
+def ai_unavailable(error: AIServiceError) -> FastJSONResponse:
+    """Response when Gemini is shed by admission control, the circuit breaker or out of time"""
+    return FastJSONResponse(
+        status_code=get_error_status_code(error.code),
+        content={
+            "success": False,
+            "error": {
+                "code": error.code.value,
+                "message": "Our AI service is temporarily busy. Please try again in a few seconds."
+            }
+        },
+        headers=get_error_headers(error.code)
+    )
 
-@router.post("/pdf")
+
+@router.post("/pdf", dependencies=[Depends(token_budget("extract", authenticated_only=True))])
 async def extract_from_pdf_endpoint(
     file: UploadFile = File(...),
     x_api_key: Optional[str] = Header(None),
@@ -66,7 +75,7 @@ async def extract_from_pdf_endpoint(
         tier = user_data.get("tier", "infinite-free")
         user_id = user_data.get("userId", "guest")
     except HTTPException as auth_error:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=401,
             content={
                 "success": False,
@@ -78,37 +87,40 @@ async def extract_from_pdf_endpoint(
         )
     
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Validate file
-        is_valid, error_message = validate_pdf_file(file_content)
-        if not is_valid:
-            return JSONResponse(
+        # Stream file content, rejecting bad uploads early
+        try:
+            with span("upload"):
+                file_content = await read_pdf_upload(file, MAX_FILE_SIZE, min_bytes=10)
+        except UploadRejected as e:
+            return FastJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
                     "error": {
                         "code": "INVALID_FILE",
-                        "message": error_message
+                        "message": UPLOAD_ERROR_MESSAGES[e.reason]
                     }
                 }
             )
         
         # Extract resume data using Gemini
-        result = extract_resume(pdf_content=file_content, import_type="pdf")
+        with deadline(EXTRACT_DEADLINE_SECONDS), priority(tier), gemini_caller("extract-pdf"):
+            result = await extract_resume_async(pdf_content=file_content, import_type="pdf")
         
         if result.get("success"):
-            return JSONResponse(content=result)
+            return FastJSONResponse(content=result)
         else:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=422,
                 content=result
             )
             
+    except AIServiceError as e:
+        logger.warning("Gemini unavailable: %s", e)
+        return ai_unavailable(e)
     except Exception as e:
-        print(f"PDF extraction error: {e}")
-        return JSONResponse(
+        logger.exception("PDF extraction error: %s", e)
+        return FastJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -120,7 +132,7 @@ async def extract_from_pdf_endpoint(
         )
 
 
-@router.post("/text")
+@router.post("/text", dependencies=[Depends(token_budget("extract", authenticated_only=True))])
 async def extract_from_text_endpoint(
     text: str = Form(...),
     import_type: str = Form("text"),  # "linkedin" or "text"
@@ -144,7 +156,7 @@ async def extract_from_text_endpoint(
         tier = user_data.get("tier", "infinite-free")
         user_id = user_data.get("userId", "guest")
     except HTTPException as auth_error:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=401,
             content={
                 "success": False,
@@ -160,7 +172,7 @@ async def extract_from_text_endpoint(
     MIN_TEXT_LENGTH = 50
     
     if len(text) < MIN_TEXT_LENGTH:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=400,
             content={
                 "success": False,
@@ -180,19 +192,23 @@ async def extract_from_text_endpoint(
     
     try:
         # Extract resume data using Gemini
-        result = extract_resume(text_content=text, import_type=import_type)
+        with deadline(EXTRACT_DEADLINE_SECONDS), priority(tier), gemini_caller("extract-text"):
+            result = await extract_resume_async(text_content=text, import_type=import_type)
         
         if result.get("success"):
-            return JSONResponse(content=result)
+            return FastJSONResponse(content=result)
         else:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=422,
                 content=result
             )
             
+    except AIServiceError as e:
+        logger.warning("Gemini unavailable: %s", e)
+        return ai_unavailable(e)
     except Exception as e:
-        print(f"Text extraction error: {e}")
-        return JSONResponse(
+        logger.exception("Text extraction error: %s", e)
+        return FastJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -0,0 +1,308 @@
+"""
+Content-Addressed Caching
+
+Two-tier cache used for expensive, deterministic-enough work:
+- LRUCache: in-process memory tier (entry count and/or byte budget, TTL)
+- SQLiteCache: optional on-disk tier shared by all workers on the host (TTL, size cap)
+- TieredCache: memory first, then disk, with hit/miss counters
+
+TieredCache.get/set are coroutines: the disk tier runs in the storage thread pool,
+so a slow disk or a write lock held by another worker never blocks the event loop.
+The disk tier is best effort: a locked or broken file counts as a miss (reads) or
+is skipped (writes), never as a failed request.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.executors import storage_pool
+from app.core.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a SHA-256 key from ordered parts (bytes, str or None).
+    Parts are length-prefixed so ("ab", "c") and ("a", "bc") never collide.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            data = b""
+        elif isinstance(part, bytes):
+            data = part
+        else:
+            data = str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with optional TTL and byte budget."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of entries kept
+            ttl_seconds: Entry lifetime (None = no expiry)
+            max_bytes: Optional total size budget, measured with sizeof
+            sizeof: Size of a value in bytes (required when max_bytes is set)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Never cache a single value larger than the whole budget
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteCache:
+    """
+    On-disk cache tier backed by a single SQLite file (WAL mode).
+    Safe to share between uvicorn workers on the same host.
+    Reads only write when an entry's access time is older than touch_interval,
+    so concurrent readers rarely compete for the write lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_bytes: int,
+        encode: Callable[[Any], bytes] = lambda value: json.dumps(value).encode("utf-8"),
+        decode: Callable[[bytes], Any] = lambda data: json.loads(data),
+        busy_timeout: float = 0.5,
+        touch_interval: float = 300,
+    ):
+        """
+        Args:
+            path: SQLite database file
+            ttl_seconds: Entry lifetime
+            max_bytes: Total payload budget; least recently used rows are evicted beyond it
+            encode/decode: Value serialization (JSON by default)
+            busy_timeout: Seconds to wait for another worker's write lock
+            touch_interval: Minimum seconds between access-time updates of one entry
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._encode = encode
+        self._decode = decode
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                return None  # Expired rows are dropped by the next set()
+            if now - row[2] >= self.touch_interval:
+                with self._conn:  # Rolls back if the write lock is not granted
+                    self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return self._decode(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        data = self._encode(value)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now + self.ttl_seconds, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then least recently used rows until under max_bytes."""
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # One walk of the accessed_at index, oldest first
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "evictions": self.evictions}
+
+
+class TieredCache:
+    """
+    Memory tier in front of an optional disk tier.
+
+    Usage:
+        cache = TieredCache("analysis", LRUCache(512), SQLiteCache(path, ttl, max_bytes))
+        value = await cache.get(key)
+        if value is None:
+            value = compute()
+            await cache.set(key, value)
+    """
+
+    def __init__(self, name: str, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.name = name
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    def _disk_failed(self, operation: str, error: sqlite3.Error) -> None:
+        """Count a disk-tier error; only the first one is logged as a warning."""
+        with self._lock:
+            self.disk_errors += 1
+            first = self.disk_errors == 1
+        log = logger.warning if first else logger.debug
+        log("%s cache disk tier %s failed, skipping it: %s", self.name, operation, error)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        result = "memory_hit"
+        if value is None and self.disk is not None:
+            try:
+                value = await storage_pool.run(self.disk.get, key)
+            except sqlite3.Error as e:
+                self._disk_failed("read", e)
+            if value is not None:
+                self.memory.set(key, value)  # Promote to memory tier
+                result = "disk_hit"
+                with self._lock:
+                    self.disk_hits += 1
+
+        with self._lock:
+            if value is None:
+                result = "miss"
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.labels(self.name, result).inc()
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await storage_pool.run(self.disk.set, key, value)
+            except sqlite3.Error as e:
+                self._disk_failed("write", e)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and tier sizes (blocking: the disk tier is scanned)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_errors": self.disk_errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory": self.memory.stats(),
+            }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -0,0 +1,264 @@
+"""
+Adaptive Concurrency Limiter
+
+Admission control in front of an upstream whose capacity changes over time (AIMD):
+- Additive increase: +1/limit per successful call while the limit is in use
+- Multiplicative decrease: on throttling (429) or latency well above the recent baseline
+- Calls over the limit wait in a short queue; a full queue or a queue timeout
+  rejects immediately with ServiceOverloaded so callers can answer 503 + Retry-After
+- Waiting calls are grouped by priority class (subscription tier) and released by
+  weighted-fair queueing: a class of weight 4 gets 4x the slots of a class of weight 1
+  while both are waiting, but no waiting class is starved
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from app.core.resilience import ServiceOverloaded
+from app.core.timing import span
+
+# Priority class of the current request (subscription tier), if any
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ai_priority", default=None)
+
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """
+    Queue every AI call made inside the block under priority class `name`.
+
+    Usage:
+        with priority(tier):
+            result = await extract_resume_async(...)
+    """
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdaptiveLimiter:
+    """
+    Usage:
+        limiter = AdaptiveLimiter(initial=16, min_limit=2, max_limit=64, max_queue=32, queue_timeout=2.0,
+                                  weights={"pro": 4, "free": 1})
+        with priority("pro"):
+            async with limiter.slot():
+                response = await upstream_call()
+
+    Single event loop only (one limiter per worker process).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        weights: Optional[Dict[str, int]] = None,
+        is_throttle: Callable[[BaseException], bool] = lambda error: False,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+        throttle_backoff: float = 0.5,
+        smoothing: float = 0.05,
+    ):
+        """
+        Args:
+            initial/min_limit/max_limit: Concurrency limit bounds
+            max_queue: Calls allowed to wait for a slot
+            queue_timeout: Longest wait for a slot, in seconds
+            weights: Share of released slots per priority class; unknown or unset
+                classes get the lowest weight
+            is_throttle: Whether an exception means the upstream is throttling us
+            latency_tolerance: Latency above baseline * tolerance counts as congestion
+            backoff: Limit multiplier on congestion
+            throttle_backoff: Limit multiplier on throttling
+            smoothing: EWMA weight of each latency sample in the baseline
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.is_throttle = is_throttle
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.throttle_backoff = throttle_backoff
+        self.smoothing = smoothing
+        self.weights = {name: max(1, weight) for name, weight in (weights or {}).items()}
+        self.default_weight = min(self.weights.values(), default=1)
+
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._in_flight = 0
+        # Per-class FIFO queues; _pass is each class's virtual finish time (stride scheduling)
+        self._queues: Dict[str, Deque["asyncio.Future[bool]"]] = {}
+        self._pass: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._queued = 0
+        self._baseline: Optional[float] = None
+
+        self.completed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.congested = 0
+        self.peak_queue_depth = 0
+        self.granted: Dict[str, int] = {}
+        self.evicted = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _reject(self) -> ServiceOverloaded:
+        self.rejected += 1
+        return ServiceOverloaded()
+
+    def _weight(self, name: str) -> int:
+        return self.weights.get(name, self.default_weight)
+
+    def _enqueue(self, name: str, waiter: "asyncio.Future[bool]") -> None:
+        queue = self._queues.get(name)
+        if not queue:
+            queue = self._queues.setdefault(name, deque())
+            # A class that was idle starts at the current virtual time (no banked credit)
+            self._pass[name] = max(self._pass.get(name, 0.0), self._virtual_time)
+        queue.append(waiter)
+        self._queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._queued)
+
+    def _dequeue(self, name: str, waiter: "asyncio.Future[bool]") -> None:
+        try:
+            self._queues[name].remove(waiter)
+            self._queued -= 1
+        except (KeyError, ValueError):
+            pass
+
+    def _evict_lower(self, name: str) -> bool:
+        """Reject the newest waiter of the lowest class weighted below `name` to make room."""
+        weight = self._weight(name)
+        victims = [
+            (self._weight(other), other) for other, queue in self._queues.items()
+            if queue and self._weight(other) < weight
+        ]
+        if not victims:
+            return False
+        _, victim = min(victims)
+        waiter = self._queues[victim].pop()
+        self._queued -= 1
+        self.evicted += 1
+        waiter.set_exception(self._reject())
+        return True
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting in the queue of the current priority class if necessary.
+        A full queue makes room by rejecting a waiter of a lower class, if any.
+
+        Raises:
+            ServiceOverloaded: Queue full or no slot within queue_timeout
+        """
+        if self._in_flight < self.limit and not self._queued:
+            self._in_flight += 1
+            return
+        name = _priority.get() or ""
+        if self._queued >= self.max_queue and not self._evict_lower(name):
+            raise self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._enqueue(name, waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                return  # Slot handed over as the timeout fired
+            raise self._reject()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                self._dequeue(name, waiter)
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        """
+        Return a slot and adjust the limit.
+
+        Args:
+            latency: Seconds the call took (successful calls only)
+            throttled: The upstream rejected the call as over quota
+        """
+        was_saturated = self._in_flight >= self.limit
+        self._in_flight -= 1
+
+        if throttled:
+            self.throttled += 1
+            self._limit = max(self.min_limit, self._limit * self.throttle_backoff)
+        elif latency is not None:
+            self.completed += 1
+            baseline = self._baseline
+            if baseline is not None and latency > baseline * self.latency_tolerance:
+                self.congested += 1
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+            elif was_saturated:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._baseline = latency if baseline is None else (
+                (1 - self.smoothing) * baseline + self.smoothing * latency
+            )
+
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._queued and self._in_flight < self.limit:
+            # Weighted-fair: serve the backlogged class with the smallest virtual finish time
+            name = min((name for name, queue in self._queues.items() if queue), key=self._pass.__getitem__)
+            waiter = self._queues[name].popleft()
+            self._queued -= 1
+            if waiter.done():
+                continue
+            self._virtual_time = self._pass[name]
+            self._pass[name] += 1 / self._weight(name)
+            self.granted[name or "default"] = self.granted.get(name or "default", 0) + 1
+            self._in_flight += 1
+            waiter.set_result(True)
+
+    @asynccontextmanager
+    async def slot(self, measure: bool = True) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block.
+
+        Args:
+            measure: Feed the block's latency into the limit (off for streams,
+                whose duration depends on the consumer)
+        """
+        with span("gemini_queue"):
+            await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release(throttled=isinstance(e, Exception) and self.is_throttle(e))
+            raise
+        self.release(latency=time.monotonic() - start if measure else None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "queue_depth_by_class": {name or "default": len(queue) for name, queue in self._queues.items() if queue},
+            "peak_queue_depth": self.peak_queue_depth,
+            "granted_from_queue": dict(self.granted),
+            "evicted": self.evicted,
+            "baseline_latency_seconds": round(self._baseline, 3) if self._baseline is not None else None,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "congested": self.congested,
+        }
@@ -1,9 +1,15 @@
 import os
 from dotenv import load_dotenv
-from typing import List
+from functools import lru_cache
+from typing import Dict, Tuple
 
 load_dotenv()
 
+@lru_cache(maxsize=16)
+def _split_csv(value: str) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
 class Settings:
     PROJECT_NAME: str = "Resume Doctor API"
     API_V1_STR: str = "/api/v1"
@@ -29,19 +35,103 @@ class Settings:
     # File Upload Limits
     MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "5"))
     MAX_FILE_SIZE_BYTES: int = MAX_FILE_SIZE_MB * 1024 * 1024
+    # Whole request body cap, enforced before the multipart parser runs (file + form fields/framing)
+    MAX_REQUEST_BODY_BYTES: int = MAX_FILE_SIZE_BYTES + 64 * 1024
+
+    # Execution Pools (blocking work kept off the event loop)
+    AI_THREAD_POOL_SIZE: int = int(os.getenv("AI_THREAD_POOL_SIZE", "32"))
+    STORAGE_THREAD_POOL_SIZE: int = int(os.getenv("STORAGE_THREAD_POOL_SIZE", "4"))
+    PDF_PROCESS_POOL_SIZE: int = int(os.getenv("PDF_PROCESS_POOL_SIZE", "2"))
+    PDF_EXTRACTION_TIMEOUT_SECONDS: float = float(os.getenv("PDF_EXTRACTION_TIMEOUT_SECONDS", "15"))
+    PDF_WORKER_MAX_JOBS: int = int(os.getenv("PDF_WORKER_MAX_JOBS", "200"))
+    
+    # Vitals reads at most this many pages (text past the char budget is never parsed)
+    VITALS_MAX_PAGES: int = int(os.getenv("VITALS_MAX_PAGES", "5"))
     
+    # Default Vitals scoring mode: local, llm or hybrid
+    VITALS_DEFAULT_MODE: str = os.getenv("VITALS_DEFAULT_MODE", "llm")
+    
+    # Rate-limit counters: memory:// (per worker), sqlite:///<path> (shared by workers on
+    # the host, survives restarts) or redis://host:port (shared across hosts, needs `redis`)
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+    
+    # How long a SQLite store (rate limits, caches, jobs) waits on another worker's write lock
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "0.5"))
+    
+    # Background analysis jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "8"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "200"))
+    JOB_QUEUE_MAX_MB: int = int(os.getenv("JOB_QUEUE_MAX_MB", "64"))  # Uploads held by queued/running jobs
+    JOB_TIMEOUT_SECONDS: float = float(os.getenv("JOB_TIMEOUT_SECONDS", "180"))
+    JOB_RETENTION_SECONDS: int = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "")  # Empty = in-memory store
+
+    # Async Gemini client: adaptive concurrency limit, bounded wait queue
+    GEMINI_MAX_IN_FLIGHT: int = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "64"))
+    GEMINI_MIN_CONCURRENCY: int = int(os.getenv("GEMINI_MIN_CONCURRENCY", "2"))
+    GEMINI_INITIAL_CONCURRENCY: int = int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "16"))
+    GEMINI_QUEUE_SIZE: int = int(os.getenv("GEMINI_QUEUE_SIZE", "32"))
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "2"))
+    GEMINI_TIER_WEIGHTS: str = os.getenv(
+        "GEMINI_TIER_WEIGHTS", "truly-infinite:8,infinite-pro:4,infinite-free:2,guest:1"
+    )
+    GEMINI_ASYNC_TRANSPORT: bool = os.getenv("GEMINI_ASYNC_TRANSPORT", "true").lower() == "true"
+    
+    # Gemini resilience: default deadline, retries with backoff, circuit breaker
+    GEMINI_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+    GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
+    GEMINI_RETRY_BASE_DELAY: float = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "0.5"))
+    GEMINI_RETRY_MAX_DELAY: float = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "8"))
+    GEMINI_RETRY_BUDGET_RATIO: float = float(os.getenv("GEMINI_RETRY_BUDGET_RATIO", "0.2"))
+    GEMINI_BREAKER_FAILURE_RATE: float = float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5"))
+    GEMINI_BREAKER_MIN_CALLS: int = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "20"))
+    GEMINI_BREAKER_WINDOW_SECONDS: float = float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "30"))
+    GEMINI_BREAKER_OPEN_SECONDS: float = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "15"))
+    
+    # Hedged Gemini calls: duplicate a call still running at the latency percentile
+    GEMINI_HEDGE_ENABLED: bool = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() == "true"
+    GEMINI_HEDGE_PERCENTILE: float = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+    GEMINI_HEDGE_MAX_RATE: float = float(os.getenv("GEMINI_HEDGE_MAX_RATE", "0.05"))
+    GEMINI_HEDGE_MIN_SAMPLES: int = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+    GEMINI_HEDGE_MIN_DELAY: float = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "1.0"))
+
+    # Analysis result cache (disk tier enabled when RESULT_CACHE_PATH is set)
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+    RESULT_CACHE_TTL_SECONDS: int = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400"))
+    RESULT_CACHE_PATH: str = os.getenv("RESULT_CACHE_PATH", "")
+    RESULT_CACHE_MAX_DISK_MB: int = int(os.getenv("RESULT_CACHE_MAX_DISK_MB", "256"))
+
+    # Extracted PDF text cache (disk spill enabled when PDF_TEXT_CACHE_PATH is set)
+    PDF_TEXT_CACHE_MAX_ENTRIES: int = int(os.getenv("PDF_TEXT_CACHE_MAX_ENTRIES", "2048"))
+    PDF_TEXT_CACHE_MAX_MB: int = int(os.getenv("PDF_TEXT_CACHE_MAX_MB", "64"))
+    PDF_TEXT_CACHE_TTL_SECONDS: int = int(os.getenv("PDF_TEXT_CACHE_TTL_SECONDS", "86400"))
+    PDF_TEXT_CACHE_PATH: str = os.getenv("PDF_TEXT_CACHE_PATH", "")
+    PDF_TEXT_CACHE_MAX_DISK_MB: int = int(os.getenv("PDF_TEXT_CACHE_MAX_DISK_MB", "256"))
+
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Per-stage timings in the Server-Timing header and request log (upload, pdf_text, gemini, ...)
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    
+    @property
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        """Parse CORS_ORIGINS into a tuple (parsed once per distinct value)"""
+        return _split_csv(self.CORS_ORIGINS)
     
     @property
-    def cors_origins_list(self) -> List[str]:
-        """Parse CORS_ORIGINS into a list"""
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+    def allowed_origins_list(self) -> Tuple[str, ...]:
+        """Parse ALLOWED_ORIGINS into a tuple (parsed once per distinct value)"""
+        return _split_csv(self.ALLOWED_ORIGINS)
     
     @property
-    def allowed_origins_list(self) -> List[str]:
-        """Parse ALLOWED_ORIGINS into a list"""
-        return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",") if origin.strip()]
+    def gemini_tier_weights(self) -> Dict[str, int]:
+        """Parse GEMINI_TIER_WEIGHTS ("tier:weight,...") into a dict"""
+        weights = {}
+        for entry in self.GEMINI_TIER_WEIGHTS.split(","):
+            tier, _, weight = entry.partition(":")
+            if tier.strip() and weight.strip():
+                weights[tier.strip()] = int(weight)
+        return weights
 
 settings = Settings()
 
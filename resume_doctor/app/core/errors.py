@@ -34,8 +34,11 @@ class ErrorCode(str, Enum):
     # Processing Errors (500)
     ANALYSIS_FAILED = "ANALYSIS_FAILED"
     PDF_EXTRACTION_FAILED = "PDF_EXTRACTION_FAILED"
-    AI_SERVICE_ERROR = "AI_SERVICE_ERROR"
     INTERNAL_ERROR = "INTERNAL_ERROR"
+    
+    # Service Availability (503)
+    AI_SERVICE_ERROR = "AI_SERVICE_ERROR"
+    SERVICE_OVERLOADED = "SERVICE_OVERLOADED"
 
 
 @dataclass
@@ -152,11 +155,19 @@ ERROR_MESSAGES: Dict[ErrorCode, UserFriendlyError] = {
     ),
     ErrorCode.AI_SERVICE_ERROR: UserFriendlyError(
         code=ErrorCode.AI_SERVICE_ERROR,
-        status_code=500,
+        status_code=503,
         title="Analysis Temporarily Unavailable",
         message="Our AI service is temporarily busy.",
         action="Please try again in a few seconds."
     ),
+    ErrorCode.SERVICE_OVERLOADED: UserFriendlyError(
+        code=ErrorCode.SERVICE_OVERLOADED,
+        status_code=503,
+        title="High Demand",
+        message="We're analyzing a lot of resumes right now.",
+        action="Please try again in a few seconds.",
+        retry_after=5
+    ),
     ErrorCode.INTERNAL_ERROR: UserFriendlyError(
         code=ErrorCode.INTERNAL_ERROR,
         status_code=500,
@@ -189,6 +200,14 @@ def get_user_error(code: ErrorCode) -> dict:
     return response
 
 
+def get_error_headers(code: ErrorCode) -> Optional[Dict[str, str]]:
+    """HTTP headers for an error (Retry-After when the error has one)"""
+    error = ERROR_MESSAGES.get(code, ERROR_MESSAGES[ErrorCode.INTERNAL_ERROR])
+    if error.retry_after:
+        return {"Retry-After": str(error.retry_after)}
+    return None
+
+
 def get_error_status_code(code: ErrorCode) -> int:
     """Get HTTP status code for an error"""
     error = ERROR_MESSAGES.get(code, ERROR_MESSAGES[ErrorCode.INTERNAL_ERROR])
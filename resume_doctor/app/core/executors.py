@@ -0,0 +1,131 @@
+"""
+Execution Pools for Blocking Work
+
+Keeps the event loop responsive by moving blocking work off it:
+- AI thread pool: network-bound Gemini SDK calls
+- Storage thread pool: SQLite/Redis calls of the rate limiter, token budgets,
+  disk cache tiers and job store (a lock wait never stalls other requests)
+
+CPU-bound PDF parsing has its own process pool in app.services.pdf_engine.
+Each pool tracks in-flight and queued jobs so saturation shows up in /health.
+Work runs in a copy of the caller's context (deadline, priority, token account, timings).
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class MonitoredExecutor:
+    """
+    Lazily-created executor with queue-depth accounting.
+
+    Usage:
+        response = await ai_pool.run(model.generate_content, content_parts, request_options=options)
+    """
+
+    def __init__(self, name: str, max_workers: int, factory: Callable[[int], Executor]):
+        """
+        Args:
+            name: Pool name used in metrics
+            max_workers: Maximum concurrent workers
+            factory: Builds the underlying executor for the given worker count
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+        # Counters (guarded by _lock)
+        self._in_flight = 0
+        self._peak_queue_depth = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def executor(self) -> Executor:
+        """Create the executor on first use so idle workers cost nothing."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory(self.max_workers)
+        return self._executor
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func(*args, **kwargs) in the pool without blocking the event loop."""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+        with self._lock:
+            self._in_flight += 1
+            queue_depth = max(0, self._in_flight - self.max_workers)
+            self._peak_queue_depth = max(self._peak_queue_depth, queue_depth)
+
+        try:
+            future = self.executor.submit(call)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+                self._failed += 1
+            raise
+
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "peak_queue_depth": self._peak_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _thread_pool(max_workers: int, thread_name_prefix: str = "ai-pool") -> Executor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+# Network-bound Gemini calls
+ai_pool = MonitoredExecutor("ai", settings.AI_THREAD_POOL_SIZE, _thread_pool)
+
+# Blocking storage calls (SQLite/Redis)
+storage_pool = MonitoredExecutor(
+    "storage",
+    settings.STORAGE_THREAD_POOL_SIZE,
+    functools.partial(_thread_pool, thread_name_prefix="storage"),
+)
+
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue-depth metrics for every pool"""
+    return {pool.name: pool.stats() for pool in (ai_pool, storage_pool)}
+
+
+def shutdown_executors() -> None:
+    """Release all pools (called on application shutdown)"""
+    ai_pool.shutdown()
+    storage_pool.shutdown()
@@ -0,0 +1,163 @@
+"""
+Hedged Requests
+
+Cuts tail latency from occasional slow upstream replicas:
+- Recent call latencies are kept in a fixed-size window
+- A call still running at the chosen percentile of that window gets a second,
+  identical call; whichever finishes first wins and the other is cancelled
+- A token bucket caps hedges at a fraction of calls so extra cost stays bounded
+- Hedges fired, won and capped are exported to /metrics under the hedger's name
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.metrics import GEMINI_HEDGES
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies with percentile lookup."""
+
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                oldest = self._samples[0]
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._samples.append(seconds)
+            bisect.insort(self._sorted, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of the window, or None when empty."""
+        with self._lock:
+            if not self._sorted:
+                return None
+            index = min(len(self._sorted) - 1, int(len(self._sorted) * p / 100))
+            return self._sorted[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedger:
+    """
+    Usage:
+        hedger = Hedger("gemini-2.0-flash", percentile=95, max_hedge_rate=0.05, min_samples=20, min_delay=1.0)
+        result = await hedger.run(lambda: upstream_call())
+    """
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float,
+        max_hedge_rate: float,
+        min_samples: int,
+        min_delay: float,
+        window: int = 500,
+    ):
+        """
+        Args:
+            name: Model label for the hedge metrics
+            percentile: Latency percentile after which a hedge is sent
+            max_hedge_rate: Hedges allowed as a fraction of calls
+            min_samples: Latencies needed before hedging starts
+            min_delay: Never hedge sooner than this many seconds
+            window: Latencies kept for the percentile
+        """
+        self.name = name
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latency = LatencyTracker(window)
+
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0  # Hedge finished first
+        self.capped = 0  # Hedge due but refused by the rate cap
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data."""
+        if len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def _begin(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(1.0, self._tokens + self.max_hedge_rate)
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.hedged += 1
+                allowed = True
+            else:
+                self.capped += 1
+                allowed = False
+        GEMINI_HEDGES.labels(self.name, "fired" if allowed else "capped").inc()
+        return allowed
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await call(), sending one identical backup call if it runs past the hedge delay.
+        If the first call to finish fails while the other is running, the other is awaited.
+        """
+        self._begin()
+        start = time.monotonic()
+        delay = self.hedge_delay()
+
+        primary = asyncio.ensure_future(call())
+        if delay is None:
+            result = await primary
+            self.latency.record(time.monotonic() - start)
+            return result
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self._allow_hedge():
+                pending.add(asyncio.ensure_future(call()))
+
+            while True:
+                if not done:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = done.pop()
+                if winner.exception() is not None and (done or pending):
+                    continue  # Fall back to the call still running
+                break
+
+            if winner is not primary:
+                with self._lock:
+                    self.hedge_wins += 1
+                GEMINI_HEDGES.labels(self.name, "won").inc()
+            result = winner.result()
+            self.latency.record(time.monotonic() - start)
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+                "capped": self.capped,
+                "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+            }
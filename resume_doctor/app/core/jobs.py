@@ -0,0 +1,405 @@
+"""
+Background Analysis Jobs
+
+Lets long analyses run without holding the HTTP connection open:
+- Submit returns a job id immediately; a bounded pool of worker tasks does the work
+- The queue is bounded by job count and by the payload bytes jobs hold in memory
+- Clients poll the job until it is succeeded/failed
+- Pluggable job store: in-memory (default) or SQLite (survives restarts, shared by workers)
+- Finished jobs are kept for a retention window, then purged
+- Work runs in a copy of the submitting request's context (deadline, priority, token account)
+- Store calls run in the storage thread pool, never on the event loop
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.errors import get_user_error
+from app.core.executors import storage_pool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A submitted unit of work and its outcome"""
+    id: str
+    kind: str
+    owner: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    result: Optional[Any] = None
+    error: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+INTERRUPTED_ERROR = {
+    "error": "Job interrupted",
+    "detail": "This job did not finish. Please submit it again."
+}
+
+TIMEOUT_ERROR = {
+    "error": "Job timed out",
+    "detail": "Analysis took too long. Please try again."
+}
+
+
+def job_error(error: Exception) -> Dict[str, Any]:
+    """Client-facing error payload for an exception raised by a job"""
+    if hasattr(error, "code"):
+        return get_user_error(error.code)
+    return getattr(error, "detail", None) or {
+        "error": "Job failed",
+        "detail": "Unable to process resume. Please try again."
+    }
+
+
+class JobQueueFull(Exception):
+    """Every worker is busy and the submit queue is at capacity (jobs or bytes)."""
+
+
+class MemoryJobStore:
+    """Jobs in a process-local dict (lost on restart, not shared between workers)."""
+
+    def __init__(self, retention_seconds: float):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def purge(self) -> int:
+        """Drop finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.status in (SUCCEEDED, FAILED) and job.updated_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def abandon_stale(self, stale_seconds: float) -> int:
+        """Fail queued/running jobs untouched for stale_seconds (their worker is gone)."""
+        cutoff = time.time() - stale_seconds
+        with self._lock:
+            stale = [
+                job for job in self._jobs.values()
+                if job.status in (QUEUED, RUNNING) and job.updated_at < cutoff
+            ]
+        for job in stale:
+            job.status, job.error = FAILED, INTERRUPTED_ERROR
+            self.save(job)
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "memory", "jobs": len(self._jobs)}
+
+
+class SQLiteJobStore:
+    """
+    Jobs in a SQLite file (WAL mode).
+    Any worker on the host can answer a poll for a job another worker ran.
+    """
+
+    def __init__(self, path: str, retention_seconds: float, busy_timeout: float = 0.5):
+        """
+        Args:
+            path: SQLite database file
+            retention_seconds: How long finished jobs are kept
+            busy_timeout: Seconds to wait for another worker's write lock
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " owner TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " result TEXT,"
+            " error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at)")
+        self._conn.commit()
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs"
+                " (id, kind, owner, status, created_at, updated_at, result, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.kind, job.owner, job.status, job.created_at, job.updated_at,
+                    None if job.result is None else json.dumps(job.result),
+                    None if job.error is None else json.dumps(job.error),
+                ),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, owner, status, created_at, updated_at, result, error"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            *row[:6],
+            result=None if row[6] is None else json.loads(row[6]),
+            error=None if row[7] is None else json.loads(row[7]),
+        )
+
+    def purge(self) -> int:
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (SUCCEEDED, FAILED, cutoff),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def abandon_stale(self, stale_seconds: float) -> int:
+        """
+        Fail queued/running jobs untouched for stale_seconds.
+        Covers jobs whose process exited mid-run without failing other workers' live jobs.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?"
+                " WHERE status IN (?, ?) AND updated_at < ?",
+                (FAILED, json.dumps(INTERRUPTED_ERROR), now, QUEUED, RUNNING, now - stale_seconds),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"backend": "sqlite", "jobs": jobs}
+
+
+class JobRunner:
+    """
+    Bounded background execution for submitted jobs.
+
+    Usage:
+        job = await job_runner.submit("deep_scan", user_id, lambda: run_deep_scan(...))
+        job = await job_runner.get(job.id)
+    """
+
+    def __init__(
+        self,
+        store,
+        max_workers: int,
+        max_queue: int,
+        timeout_seconds: float,
+        max_queue_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            store: MemoryJobStore or SQLiteJobStore
+            max_workers: Jobs executing concurrently
+            max_queue: Jobs waiting for a worker before submit is refused
+            timeout_seconds: Run-time budget per job
+            max_queue_bytes: Payload bytes (see submit's size) queued and running jobs
+                may hold before submit is refused; None = no byte bound
+        """
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(1, max_queue)
+        self.max_queue_bytes = max_queue_bytes
+        self.timeout_seconds = timeout_seconds
+        self._queue: Optional["asyncio.Queue[Tuple[Job, Callable, Callable, contextvars.Context, int]]"] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._running = 0
+        self._held_bytes = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        """Start the worker tasks (called from the application lifespan)."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._expire()
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.max_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued and running jobs are left unfinished."""
+        workers, self._workers = self._workers, []
+        pending = set(workers)
+        while pending:
+            # wait_for can swallow a cancel that lands as a job finishes: repeat until they exit
+            for worker in pending:
+                worker.cancel()
+            _, pending = await asyncio.wait(pending, timeout=0.1)
+
+    async def submit(
+        self,
+        kind: str,
+        owner: str,
+        work: Callable[[], Awaitable[Any]],
+        failed: Callable[[Any], Optional[Dict[str, Any]]] = lambda result: None,
+        size: int = 0,
+    ) -> Job:
+        """
+        Queue work and return its job immediately.
+
+        Args:
+            kind: Job type reported to clients (e.g. "deep_scan")
+            owner: User id allowed to read the job
+            work: Coroutine factory producing the job result
+            failed: Maps a returned result to an error payload if it represents a failure
+            size: Bytes `work` keeps alive until it finishes (e.g. the uploaded PDF)
+
+        Raises:
+            JobQueueFull: The queue is at capacity (or the runner is not started)
+        """
+        if self._queue is None or self._queue.full() or not self._fits(size):
+            self.rejected += 1
+            raise JobQueueFull()
+
+        # Reserved before the first await so concurrent submits see it
+        self._held_bytes += size
+        try:
+            job = Job(id=uuid.uuid4().hex, kind=kind, owner=owner)
+            await storage_pool.run(self._expire)
+            await storage_pool.run(self.store.save, job)
+            # Filled up while the job was saved: its row is never polled and expires as stale
+            if self._queue.full():
+                self.rejected += 1
+                raise JobQueueFull()
+        except BaseException:
+            self._held_bytes -= size
+            raise
+        self._queue.put_nowait((job, work, failed, contextvars.copy_context(), size))
+        return job
+
+    def _fits(self, size: int) -> bool:
+        """Whether `size` more bytes fit the byte budget (a lone oversized job is let through)."""
+        if self.max_queue_bytes is None or not self._held_bytes:
+            return True
+        return self._held_bytes + size <= self.max_queue_bytes
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await storage_pool.run(self.store.get, job_id)
+
+    def _expire(self) -> None:
+        # Longest a live job can go unsaved: a full queue ahead of it, then its own run
+        worst_wait = self.timeout_seconds * (self.max_queue / self.max_workers + 1)
+        self.store.abandon_stale(worst_wait * 2)
+        self.store.purge()
+
+    async def _worker(self) -> None:
+        while True:
+            job, work, failed, context, size = await self._queue.get()
+            self._running += 1
+            job.status = RUNNING
+            try:
+                await storage_pool.run(self.store.save, job)
+                # The task copies the current context on creation, so create it inside `context`
+                task = context.run(asyncio.ensure_future, work())
+                result = await asyncio.wait_for(task, self.timeout_seconds)
+                error = failed(result)
+                if error is None:
+                    job.status, job.result = SUCCEEDED, result
+                else:
+                    job.status, job.error = FAILED, error
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                job.status, job.error = FAILED, TIMEOUT_ERROR
+            except Exception as e:
+                job.status = FAILED
+                job.error = job_error(e)
+            finally:
+                self._running -= 1
+                self._held_bytes -= size
+                self._queue.task_done()
+                del work  # Release the payload now, not when the next job arrives
+
+            if job.status == SUCCEEDED:
+                self.completed += 1
+            else:
+                self.failed += 1
+            try:
+                await storage_pool.run(self.store.save, job)
+            except sqlite3.Error as e:
+                # The job expires as stale; the worker must survive for the next one
+                logger.warning("Could not save job %s: %s", job.id, e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Runner counters and store size (blocking: the store is queried)."""
+        return {
+            "max_workers": self.max_workers,
+            "running": self._running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "held_bytes": self._held_bytes,
+            "max_queue_bytes": self.max_queue_bytes,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "store": self.store.stats(),
+        }
+
+
+def _build_store():
+    if settings.JOB_STORE_PATH:
+        return SQLiteJobStore(
+            settings.JOB_STORE_PATH,
+            settings.JOB_RETENTION_SECONDS,
+            busy_timeout=settings.SQLITE_BUSY_TIMEOUT_SECONDS,
+        )
+    return MemoryJobStore(settings.JOB_RETENTION_SECONDS)
+
+
+job_runner = JobRunner(
+    _build_store(),
+    max_workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_SIZE,
+    timeout_seconds=settings.JOB_TIMEOUT_SECONDS,
+    max_queue_bytes=settings.JOB_QUEUE_MAX_MB * 1024 * 1024,
+)
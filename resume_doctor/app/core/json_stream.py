@@ -0,0 +1,221 @@
+"""
+Tolerant JSON Parsing for LLM Responses
+
+Single-pass extraction of the JSON object in a model response:
+- Code fences, leading prose and trailing junk are skipped
+- Raw control characters inside strings are accepted
+- extract_json parses a complete response; JSONFieldStream parses it chunk by chunk,
+  reporting each top-level field the moment its value is complete
+
+Each character is scanned once and chunks are never re-concatenated: strings left
+open at a chunk boundary resume where the scan stopped, and a field's text is joined
+from the chunks only once, when it completes. Total work is linear in the response size.
+"""
+
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ("field", key, value) or ("item", key, value)
+JSONStreamEvent = Tuple[str, str, Any]
+
+# Characters that can change parser state, and the inside of a JSON string up to its
+# closing quote (or a lone trailing backslash, or the end of the chunk)
+_STRUCTURAL = re.compile(r'["{}\[\],:]')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+# strict=False accepts raw control characters (newlines, tabs) inside strings
+_decoder = json.JSONDecoder(strict=False)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the JSON object embedded in a model response.
+    
+    Decoding starts at the first "{" and stops at its matching "}", so fences,
+    prose before the object and anything after it are ignored without copying.
+    
+    Args:
+        text: Raw response text
+        
+    Returns:
+        Parsed JSON object
+        
+    Raises:
+        json.JSONDecodeError: No complete JSON object in the text
+    """
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    value, _ = _decoder.raw_decode(text, start)
+    return value
+
+
+class JSONFieldStream:
+    """
+    Usage:
+        stream = JSONFieldStream(item_keys={"sections"})
+        for chunk in chunks:
+            for kind, key, value in stream.feed(chunk):
+                ...
+    """
+
+    def __init__(self, item_keys: Iterable[str] = ()):
+        """
+        Args:
+            item_keys: Top-level array fields whose elements are emitted individually
+        """
+        self.item_keys = frozenset(item_keys)
+        self.fields: Dict[str, Any] = {}
+
+        # Chunks fed so far and the stream offset each one starts at
+        self._chunks: List[str] = []
+        self._starts: List[int] = []
+        self._size = 0
+
+        self._depth = 0
+        self._done = False
+
+        # Open string: offset of its opening quote; next character escaped
+        self._string_start: Optional[int] = None
+        self._escaped = False
+
+        # State of the top-level object (offsets into the whole stream)
+        self._expect_key = True
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._value_is_array = False
+        self._item_start = 0
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has closed."""
+        return self._done
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks, self._starts = ["".join(self._chunks)], [0]
+        return self._chunks[0] if self._chunks else ""
+
+    def result(self) -> Any:
+        """
+        The complete object once the stream has ended.
+        Reuses the fields already parsed when the object closed cleanly.
+
+        Raises:
+            json.JSONDecodeError: The stream did not contain a complete object
+        """
+        if self._done:
+            return self.fields
+        return extract_json(self.text)
+
+    def feed(self, chunk: str) -> List[JSONStreamEvent]:
+        """Consume the next chunk and return the fields it completed."""
+        events: List[JSONStreamEvent] = []
+        if not chunk:
+            return events
+        base = self._size
+        self._chunks.append(chunk)
+        self._starts.append(base)
+        self._size += len(chunk)
+        end = len(chunk)
+        i = 0
+
+        while i < end and not self._done:
+            if self._string_start is not None:
+                if self._escaped:
+                    self._escaped = False
+                    i += 1
+                    continue
+                # Skip the rest of the string in one match
+                i = _STRING_BODY.match(chunk, i).end()
+                if i == end:
+                    break
+                if chunk[i] == "\\":
+                    # Lone backslash at the end of the chunk: escapes the next one's first character
+                    self._escaped = True
+                    i += 1
+                    continue
+                if self._depth == 1 and self._expect_key:
+                    self._key = _decoder.decode(self._slice(self._string_start, base + i + 1))
+                self._string_start = None
+                i += 1
+                continue
+
+            if self._depth == 0:
+                i = chunk.find("{", i)
+                if i == -1:
+                    break
+                self._depth = 1
+                i += 1
+                continue
+
+            # Scalars need no inspection: they are sliced out between delimiters
+            match = _STRUCTURAL.search(chunk, i)
+            if match is None:
+                break
+            i = match.start()
+            c = chunk[i]
+            pos = base + i
+            depth = self._depth
+
+            if c == '"':
+                self._string_start = pos
+            elif c in "{[":
+                if depth == 1:
+                    self._value_is_array = c == "["
+                    self._item_start = pos + 1
+                self._depth += 1
+            elif c in "}]":
+                if depth == 2 and self._value_is_array:
+                    self._emit_item(events, self._item_start, pos)
+                self._depth -= 1
+                if self._depth == 1:
+                    self._emit_field(events, self._value_start, pos + 1)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._emit_field(events, self._value_start, pos)
+                    self._done = True
+            elif c == ":":
+                if depth == 1:
+                    self._expect_key = False
+                    self._value_start = pos + 1
+            elif c == ",":
+                if depth == 1:
+                    if self._value_start is not None:
+                        self._emit_field(events, self._value_start, pos)
+                    self._expect_key = True
+                elif depth == 2 and self._value_is_array:
+                    self._emit_item(events, self._item_start, pos)
+                    self._item_start = pos + 1
+            i += 1
+
+        return events
+
+    def _slice(self, start: int, stop: int) -> str:
+        """Stream text between two offsets, joined from the chunks that hold it."""
+        index = bisect_right(self._starts, start) - 1
+        parts = []
+        for chunk_start, chunk in zip(self._starts[index:], self._chunks[index:]):
+            if chunk_start >= stop:
+                break
+            parts.append(chunk[max(0, start - chunk_start):stop - chunk_start])
+        return "".join(parts)
+
+    def _emit_item(self, events: List[JSONStreamEvent], start: int, stop: int) -> None:
+        if self._key not in self.item_keys:
+            return
+        raw = self._slice(start, stop)
+        # Nothing between delimiters: "[]" or a trailing comma
+        if raw.strip():
+            events.append(("item", self._key, _decoder.decode(raw)))
+
+    def _emit_field(self, events: List[JSONStreamEvent], start: int, stop: int) -> None:
+        key, self._key, self._value_start = self._key, None, None
+        self._value_is_array = False
+        value = _decoder.decode(self._slice(start, stop))
+        self.fields[key] = value
+        events.append(("field", key, value))
@@ -0,0 +1,98 @@
+"""
+Structured, Non-Blocking Logging
+
+Keeps log I/O off the event loop:
+- Loggers hand records to an in-memory queue (QueueHandler); a background
+  listener thread formats them as JSON lines and writes them to stdout
+- Formatting (JSON encoding, %-interpolation, tracebacks) happens on the
+  listener thread, never on the thread that logged
+- log_event() attaches structured fields and is skipped entirely when the
+  level is disabled, so debug payloads cost nothing in production
+
+Usage:
+    logger = logging.getLogger(__name__)
+    logger.debug("Raw Gemini response: %r", text[:500])
+    log_event(logger, logging.INFO, "request", path="/vitals", status=200)
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from app.core.responses import dumps
+
+# Attribute holding structured fields on a LogRecord
+_FIELDS = "fields"
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message, structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, _FIELDS, None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return dumps(data, default=str).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+    The stock prepare() formats the message on the logging thread; the queue never
+    leaves this process, so formatting can wait for the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = "INFO") -> None:
+    """
+    Route the root logger through a queue to a JSON stdout writer thread.
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+    """Log an event with structured fields; nothing is built when the level is disabled."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={_FIELDS: fields})
@@ -0,0 +1,173 @@
+"""
+Prometheus Metrics
+
+Counters and histograms served at /metrics:
+- HTTP request latency by route template, method, status and tier; requests in flight
+- Gemini call latency, errors and tokens by model and caller (vitals, deep-scan, ...)
+- Hedged Gemini calls: hedges fired, hedges that won, hedges refused by the rate cap
+- PDF text extraction duration and pages parsed
+- Rate-limit rejections by tier and limit kind (requests, tokens), and storage
+  errors that let a request through unmetered
+- Result/PDF-text cache lookups (hit ratio = hits / all lookups in PromQL)
+
+Multi-worker deployments set PROMETHEUS_MULTIPROC_DIR to an empty shared directory
+before starting the workers: every process then writes its samples to mmap'd files
+there (no locks shared across processes) and /metrics aggregates all of them.
+
+Only the API processes record samples: PDF worker processes never import this module
+(the engine reports pages and outcomes back to the parent, which records them).
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Route label for requests that matched no route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "unmatched"
+
+# Caller label for Gemini calls made outside a gemini_caller() block
+DEFAULT_CALLER = "other"
+
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("gemini_caller", default=DEFAULT_CALLER)
+
+REQUEST_LATENCY = Histogram(
+    "resume_doctor_http_request_duration_seconds",
+    "HTTP request latency, including streamed bodies",
+    ["route", "method", "status", "tier"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 45, 90),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "resume_doctor_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+
+GEMINI_LATENCY = Histogram(
+    "resume_doctor_gemini_call_duration_seconds",
+    "Gemini call latency (retries and limiter queueing included)",
+    ["model", "caller"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 90),
+)
+GEMINI_ERRORS = Counter(
+    "resume_doctor_gemini_call_errors_total",
+    "Gemini calls that raised, by exception type",
+    ["model", "caller", "error"],
+)
+GEMINI_TOKENS = Counter(
+    "resume_doctor_gemini_tokens_total",
+    "Gemini tokens used, from response usage metadata",
+    ["model", "caller", "kind"],
+)
+
+GEMINI_HEDGES = Counter(
+    "resume_doctor_gemini_hedges_total",
+    "Hedged Gemini calls by event (fired, won, capped by the hedge rate budget)",
+    ["model", "event"],
+)
+
+PDF_EXTRACTION_SECONDS = Histogram(
+    "resume_doctor_pdf_extraction_duration_seconds",
+    "PDF text extraction time in the worker pool (queueing included)",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15),
+)
+PDF_PAGES = Histogram(
+    "resume_doctor_pdf_pages_parsed",
+    "Pages parsed per PDF text extraction",
+    buckets=(1, 2, 3, 4, 5, 7, 10, 15, 20),
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "resume_doctor_rate_limit_rejections_total",
+    "Requests refused by per-tier limits",
+    ["tier", "endpoint", "limit"],
+)
+
+RATE_LIMIT_STORAGE_ERRORS = Counter(
+    "resume_doctor_rate_limit_storage_errors_total",
+    "Limiter storage failures; the request was allowed without being counted",
+    ["operation"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "resume_doctor_cache_lookups_total",
+    "Cache lookups by outcome (memory_hit, disk_hit, miss)",
+    ["cache", "result"],
+)
+
+
+@contextmanager
+def gemini_caller(name: str) -> Iterator[None]:
+    """
+    Label every Gemini call made inside the block with caller `name`.
+
+    Usage:
+        with gemini_caller("vitals"):
+            result = await vitals_check_text_async(text)
+    """
+    token = _caller.set(name)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+@contextmanager
+def observe_gemini_call(model: str) -> Iterator[None]:
+    """Record latency (and the exception type, if any) of the Gemini call inside the block."""
+    caller = _caller.get()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        GEMINI_ERRORS.labels(model, caller, type(e).__name__).inc()
+        raise
+    finally:
+        GEMINI_LATENCY.labels(model, caller).observe(time.perf_counter() - start)
+
+
+def observe_gemini_tokens(model: str, prompt_tokens: int, response_tokens: int) -> None:
+    caller = _caller.get()
+    if prompt_tokens:
+        GEMINI_TOKENS.labels(model, caller, "prompt").inc(prompt_tokens)
+    if response_tokens:
+        GEMINI_TOKENS.labels(model, caller, "response").inc(response_tokens)
+
+
+def observe_pdf_extraction(outcome: str, seconds: float, pages: int) -> None:
+    """Record one PDF text extraction (pages only for completed parses)."""
+    PDF_EXTRACTION_SECONDS.labels(outcome).observe(seconds)
+    if outcome in ("ok", "empty"):
+        PDF_PAGES.observe(pages)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Exposition-format body and content type.
+    Aggregates every worker's samples when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this process's live gauges (in-flight requests) from the aggregate on shutdown."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
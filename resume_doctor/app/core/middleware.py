@@ -0,0 +1,203 @@
+"""
+Request Middleware (pure ASGI)
+
+One pass over every HTTP request, in place of the two @app.middleware("http") functions:
+- Origin validation in production (API key or allowed Origin/Referer)
+- Timing and structured request logging (full duration, including streamed bodies)
+- Per-stage timings (app.core.timing spans) in the Server-Timing header and the log line
+- Request latency (by route template and tier) and in-flight metrics for /metrics
+- X-Token-Budget-* headers from the token account opened by the rate-limit dependency
+- Request body cap (MAX_REQUEST_BODY_BYTES): 413 from Content-Length before any
+  body is read; chunked bodies are cut off once they cross it
+
+Messages are passed straight through: no extra tasks, no body buffering, so SSE
+and large uploads stream exactly as the endpoint produces/consumes them.
+"""
+
+import logging
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.log import log_event
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, UNMATCHED_ROUTE
+from app.core.origins import origin_matcher
+from app.core.rate_limits import get_tier_from_request
+from app.core.responses import FastJSONResponse
+from app.core.timing import Timings, collect_timings
+from app.core.uploads import BodyTooLarge, declared_body_size, limit_body
+
+logger = logging.getLogger(__name__)
+
+# Never origin-checked (load balancer probes, API info)
+UNGUARDED_PATHS = frozenset(["/health", "/"])
+
+# Not written to the request log (probes and scrapes)
+UNLOGGED_PREFIXES = ("/health", "/metrics")
+
+
+def check_origin(request: Request) -> Optional[FastJSONResponse]:
+    """
+    Validate request origin in production.
+    Strictly blocks requests without proper Origin or API Key.
+
+    Returns:
+        403 response to send instead of the endpoint, or None to proceed
+    """
+    # Skip validation for health checks and preflight
+    if request.url.path in UNGUARDED_PATHS or request.method == "OPTIONS":
+        return None
+
+    if not settings.IS_PRODUCTION:
+        return None
+
+    origin = request.headers.get("origin") or request.headers.get("referer", "")
+    api_key = request.headers.get("x-api-key")
+
+    # 1. Check for API Key bypass (Server-to-Server)
+    if api_key and api_key == settings.API_SECRET_KEY:
+        return None
+
+    # 2. If no API Key, MUST have valid Origin
+    if not origin:
+        log_event(
+            logger, logging.WARNING, "headless_blocked",
+            path=request.url.path,
+            client_ip=request.client.host if request.client else "unknown",
+        )
+        return FastJSONResponse(
+            status_code=403,
+            content={"error": "Access denied: Missing Origin header"}
+        )
+
+    # 3. Check if origin is allowed (exact origin or wildcard subdomain, Referer reduced to its origin)
+    if origin_matcher().allows(origin):
+        return None
+
+    log_event(logger, logging.WARNING, "origin_blocked", origin=origin, path=request.url.path)
+    return FastJSONResponse(
+        status_code=403,
+        content={"error": "Origin not allowed"}
+    )
+
+
+def check_body_size(scope: Scope) -> Optional[FastJSONResponse]:
+    """
+    Reject a request whose declared body exceeds MAX_REQUEST_BODY_BYTES,
+    before the multipart parser reads (and spools) any of it.
+
+    Returns:
+        413 response to send instead of the endpoint, or None to proceed
+    """
+    size = declared_body_size(scope)
+    if size is None or size <= settings.MAX_REQUEST_BODY_BYTES:
+        return None
+    error = BodyTooLarge(settings.MAX_REQUEST_BODY_BYTES)
+    return FastJSONResponse(status_code=error.status_code, content={"detail": error.detail})
+
+
+class RequestMiddleware:
+    """
+    Usage:
+        app.add_middleware(RequestMiddleware)  # added last = outermost
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request = Request(scope)
+        # Shared with request.state in the endpoint (token_account is set there)
+        state = scope.setdefault("state", {})
+        status_code = 500
+        timings: Optional[Timings] = None
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Remaining Gemini token budget (set by the tier rate-limit dependency)
+                token_account = state.get("token_account")
+                if token_account is not None:
+                    MutableHeaders(scope=message).update(token_account.headers())
+                # Stages finished before the first byte (streams add theirs to the log line only)
+                if timings is not None and timings.spans:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            with collect_timings() if settings.SERVER_TIMING_ENABLED else nullcontext() as timings:
+                blocked = check_origin(request) or check_body_size(scope)
+                if blocked is not None:
+                    await blocked(scope, receive, send_with_headers)
+                else:
+                    # BodyTooLarge raised mid-parse becomes a 413 in FastAPI's exception handling
+                    await self.app(scope, limit_body(receive, settings.MAX_REQUEST_BODY_BYTES), send_with_headers)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            duration = time.perf_counter() - start_time
+            tier = get_tier_from_request(request)
+            REQUEST_LATENCY.labels(route_template(scope), request.method, str(status_code), tier).observe(duration)
+            # Only log API calls, not health checks or metric scrapes
+            if not scope["path"].startswith(UNLOGGED_PREFIXES):
+                log_request(request, status_code, duration, state, tier, timings)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/v1/analyze/jobs/{job_id}.
+    Routes of an included router may carry only their own part of the path; the
+    router prefix is then recovered from the request path.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    regex = getattr(route, "path_regex", None)
+    if path_format is None or regex is None:
+        return UNMATCHED_ROUTE
+
+    path = scope["path"]
+    if regex.match(path):
+        return path_format
+    start = path.find("/", 1)
+    while start > 0:
+        if regex.match(path[start:]):
+            return path[:start] + path_format
+        start = path.find("/", start + 1)
+    return path_format
+
+
+def log_request(
+    request: Request,
+    status_code: int,
+    duration: float,
+    state: dict,
+    tier: str,
+    timings: Optional[Timings] = None,
+) -> None:
+    """Log one request with timing and tier info"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    token_account = state.get("token_account")
+    log_event(
+        logger, logging.INFO, "request",
+        method=request.method,
+        path=request.url.path,
+        status=status_code,
+        duration=f"{duration:.3f}s",
+        client_ip=request.client.host if request.client else "unknown",
+        tier=tier,
+        user_id=request.headers.get("X-User-Id", "guest"),
+        tokens=token_account.charged if token_account is not None else 0,
+        timings=timings.as_dict() if timings is not None else None,
+    )
@@ -0,0 +1,131 @@
+"""
+Origin Matching
+
+Decides whether a request's Origin (or Referer) is one of ALLOWED_ORIGINS:
+- Allowed origins are normalized once (lowercase scheme/host, default port dropped)
+  into a set, so a browser Origin header is checked with a single hash lookup
+- "https://*.example.com" entries go into a trie of reversed host labels and match
+  any subdomain (not the bare domain) with the same scheme and port
+- Referer URLs are reduced to their origin; "https://app.com.evil.io" no longer
+  passes as a prefix match of "https://app.com"
+- origin_matcher() rebuilds the matcher when settings.ALLOWED_ORIGINS changes
+"""
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Trie node key marking "any subdomain below this label is allowed"
+_WILDCARD = "*"
+
+# (scheme, host, port); port is None for the scheme's default port
+OriginParts = Tuple[str, str, Optional[int]]
+
+
+def parse_origin(value: str) -> Optional[OriginParts]:
+    """
+    Scheme, host and port of an Origin header, Referer URL or configured origin.
+
+    Returns:
+        Lowercased (scheme, host, port), or None if value is not an absolute URL
+    """
+    try:
+        parts = urlsplit(value.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme, host = parts.scheme.lower(), parts.hostname
+    if not scheme or not host:
+        return None
+    if port == _DEFAULT_PORTS.get(scheme):
+        port = None
+    return scheme, host, port
+
+
+def format_origin(parts: OriginParts) -> str:
+    scheme, host, port = parts
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    return f"{scheme}://{host}" if port is None else f"{scheme}://{host}:{port}"
+
+
+class OriginMatcher:
+    """
+    Usage:
+        matcher = OriginMatcher(["https://app.example.com", "https://*.example.dev"])
+        matcher.allows(request.headers.get("origin") or request.headers.get("referer", ""))
+    """
+
+    def __init__(self, origins: Iterable[str], source: Optional[str] = None):
+        """
+        Args:
+            origins: Allowed origins; "*." as the first host label allows subdomains
+            source: Setting value the origins were parsed from (for reload checks)
+        """
+        self.source = source
+        self._exact: Set[str] = set()
+        self._wildcards: Dict[Tuple[str, Optional[int]], dict] = {}
+
+        for origin in origins:
+            parts = parse_origin(origin)
+            if parts is None:
+                continue
+            scheme, host, port = parts
+            if host.startswith("*."):
+                node = self._wildcards.setdefault((scheme, port), {})
+                for label in reversed(host[2:].split(".")):
+                    node = node.setdefault(label, {})
+                node[_WILDCARD] = True
+            else:
+                self._exact.add(format_origin(parts))
+
+    @classmethod
+    def from_setting(cls, value: str) -> "OriginMatcher":
+        """Build from a comma-separated setting such as ALLOWED_ORIGINS."""
+        return cls((origin for origin in value.split(",") if origin.strip()), source=value)
+
+    def allows(self, value: str) -> bool:
+        """Whether an Origin header value or Referer URL belongs to an allowed origin."""
+        if not value:
+            return False
+        # Browsers send Origin already normalized: one set lookup, no parsing
+        if value in self._exact:
+            return True
+        # Referer from a browser: its normalized origin is everything before the path
+        path_start = value.find("/", value.find("://") + 3)
+        if path_start > 0 and value[:path_start] in self._exact:
+            return True
+
+        parts = parse_origin(value)
+        if parts is None:
+            return False
+        if format_origin(parts) in self._exact:
+            return True
+
+        scheme, host, port = parts
+        node = self._wildcards.get((scheme, port))
+        if node is None:
+            return False
+        labels = host.split(".")
+        for depth in range(len(labels) - 1, 0, -1):
+            node = node.get(labels[depth])
+            if node is None:
+                return False
+            if _WILDCARD in node:
+                return True  # At least one label (labels[:depth]) remains below the match
+        return False
+
+
+_matcher: Optional[OriginMatcher] = None
+
+
+def origin_matcher() -> OriginMatcher:
+    """Matcher for settings.ALLOWED_ORIGINS, rebuilt only when the setting changes."""
+    global _matcher
+    matcher = _matcher
+    if matcher is None or matcher.source != settings.ALLOWED_ORIGINS:
+        matcher = _matcher = OriginMatcher.from_setting(settings.ALLOWED_ORIGINS)
+    return matcher
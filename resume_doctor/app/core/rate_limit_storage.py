@@ -0,0 +1,145 @@
+"""
+Shared Rate-Limit Storage
+
+SQLite-backed storage for the `limits` library (used by slowapi):
+- Counters live in one SQLite file (WAL mode), so every uvicorn worker on the host
+  enforces the same daily quota and counts survive restarts
+- Each increment runs in a BEGIN IMMEDIATE transaction, atomic across processes
+- Expired windows are reset on their next hit and swept periodically
+- Calls block (up to busy_timeout on a locked file): callers run them in the storage pool
+
+Selected with RATE_LIMIT_STORAGE_URI=sqlite:///relative.db or sqlite:////absolute/path.db.
+"""
+
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Optional, Tuple
+
+from limits.errors import StorageError
+from limits.storage import Storage
+
+# Sweep expired counters every this many increments
+_SWEEP_EVERY = 1000
+
+
+def storage_errors(storage: Storage) -> Tuple[type, ...]:
+    """Exceptions a `limits` storage raises when its backend fails (lock timeouts, lost connections)."""
+    base = storage.base_exceptions
+    return (StorageError, sqlite3.Error) + (base if isinstance(base, tuple) else (base,))
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window counters in a SQLite file.
+    Supports the fixed-window strategy (slowapi's default).
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, busy_timeout: float = 0.5, **options):
+        """
+        Args:
+            uri: sqlite:///<path>; the path is relative unless it starts with a fourth slash
+            wrap_exceptions: Raise limits.errors.StorageError instead of sqlite3 errors
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = urllib.parse.urlparse(uri).path[1:]
+        if not path:
+            raise ValueError("sqlite rate-limit storage needs a file path, e.g. sqlite:///ratelimits.db")
+        self.path = path
+        self._lock = threading.Lock()
+        self._increments = 0
+
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " key TEXT PRIMARY KEY,"
+            " value INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_expires ON rate_limits (expires_at)")
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        """
+        Add `amount` to the counter for key, starting a new window if it expired.
+
+        Args:
+            key: Rate-limit key
+            expiry: Window length in seconds
+            elastic_expiry: Push the window end out on every hit (older `limits` API)
+            amount: Cost of this hit
+
+        Returns:
+            Counter value after the increment
+        """
+        now = time.time()
+        expires_at = now + expiry
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[1] <= now:
+                    value = amount
+                else:
+                    value = row[0] + amount
+                    if not elastic_expiry:
+                        expires_at = row[1]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._increments += 1
+                if self._increments % _SWEEP_EVERY == 0:
+                    self._conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def _row(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row
+
+    def get(self, key: str) -> int:
+        row = self._row(key)
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        """Unix time at which the current window for key ends."""
+        row = self._row(key)
+        return row[1] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM rate_limits")
+        return cursor.rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
@@ -2,13 +2,38 @@
 Rate Limiting Configuration for Resume Doctor API
 
 Implements tiered rate limiting based on user subscription tier.
-All limits use a 24-hour sliding window to align with Pro tier validity.
+All limits use a 24-hour window to align with Pro tier validity.
+
+Endpoints declare `dependencies=[Depends(tier_rate_limit("vitals"))]`; the limit for
+the caller's tier comes from TIER_RATE_LIMITS, parsed once at import time.
+Gemini tokens are charged against a separate daily budget (TIER_TOKEN_BUDGETS),
+so a few heavy requests cannot use up our upstream quota. Endpoints without a
+request quota (e.g. extract) declare `Depends(token_budget("extract", authenticated_only=True))`.
+
+Limits fail open: when the storage errors (a SQLite write lock held past
+SQLITE_BUSY_TIMEOUT_SECONDS, Redis unreachable) the request is logged, counted in
+RATE_LIMIT_STORAGE_ERRORS and served unmetered. Lock waits are short-lived, and
+refusing every metered endpoint during one would hurt paying users more than the
+few requests that slip through.
 """
 
-from fastapi import Request, HTTPException
+import logging
+import math
+import time
+from fastapi import Depends, Request, HTTPException
+from limits import RateLimitItem, parse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from typing import Optional, Callable
+from typing import Any, Dict, Optional, Callable, Tuple
+
+from app.core.auth import API_SECRET_KEY
+from app.core.config import settings
+from app.core.executors import storage_pool
+from app.core.metrics import RATE_LIMIT_REJECTIONS, RATE_LIMIT_STORAGE_ERRORS
+from app.core.rate_limit_storage import storage_errors  # Also registers the sqlite:// storage scheme
+from app.core.token_budget import TokenAccount, open_account
+
+logger = logging.getLogger(__name__)
 
 # Tier-based rate limit configuration (per 24-hour window)
 TIER_RATE_LIMITS = {
@@ -34,15 +59,60 @@ TIER_RATE_LIMITS = {
     },
 }
 
+# Gemini tokens (prompt + response) per user per 24 hours, across all endpoints.
+# A vitals check costs ~2-4k tokens, a 5-page Deep Scan with a job description ~5-8k.
+TIER_TOKEN_BUDGETS = {
+    "guest": 8_000,
+    "infinite-free": 20_000,
+    "infinite-pro": 100_000,
+    "truly-infinite": 200_000,
+}
+
+TOKEN_BUDGET_WINDOW_SECONDS = 86400
+
+# TIER_RATE_LIMITS parsed once: (tier, endpoint) -> limit, None when blocked
+_TIER_LIMIT_ITEMS: Dict[Tuple[str, str], Optional[RateLimitItem]] = {
+    (tier, endpoint): parse(limit) if limit else None
+    for tier, tier_limits in TIER_RATE_LIMITS.items()
+    for endpoint, limit in tier_limits.items()
+}
+
+
+class TierRateLimitExceeded(Exception):
+    """The caller used up their tier's quota for an endpoint."""
+
+    def __init__(self, tier: str, endpoint: str, limit: Optional[RateLimitItem], reset_at: float):
+        super().__init__(f"{tier} {endpoint} limit {limit} exceeded")
+        self.tier = tier
+        self.endpoint = endpoint
+        self.limit = limit
+        self.reset_at = reset_at
+
+
+class TokenBudgetExceeded(TierRateLimitExceeded):
+    """The caller spent their tier's daily Gemini token budget."""
+
+    def __init__(self, tier: str, endpoint: str, account: TokenAccount):
+        super().__init__(tier, endpoint, None, account.reset_at)
+        self.account = account
+
+
+def has_valid_api_key(request: Request) -> bool:
+    """Whether the request carries our API key (see app.core.auth.verify_api_key)"""
+    return request.headers.get("X-API-Key") == API_SECRET_KEY
+
+
 def get_rate_limit_key(request: Request) -> str:
     """
     Generate rate limit key based on user identity.
     Uses user ID for authenticated users, IP for guests.
+    X-User-Id is only trusted alongside a valid API key: a guest rotating it
+    would otherwise get a fresh quota and token budget on every request.
     """
     user_id = request.headers.get("X-User-Id")
     
     # Authenticated user with valid ID
-    if user_id and user_id != "guest":
+    if user_id and user_id != "guest" and has_valid_api_key(request):
         return f"user:{user_id}"
     
     # Fall back to IP-based limiting for guests
@@ -50,8 +120,15 @@ def get_rate_limit_key(request: Request) -> str:
 
 
 def get_tier_from_request(request: Request) -> str:
-    """Extract user tier from request headers"""
-    tier = request.headers.get("X-User-Tier", "guest")
+    """
+    Extract user tier from request headers.
+    X-User-Tier is only trusted alongside a valid API key (matching get_user_info);
+    anyone else is a guest.
+    """
+    if not has_valid_api_key(request):
+        return "guest"
+    
+    tier = request.headers.get("X-User-Tier") or "infinite-free"
     
     # Validate tier is recognized
     if tier not in TIER_RATE_LIMITS:
@@ -60,6 +137,17 @@ def get_tier_from_request(request: Request) -> str:
     return tier
 
 
+def get_limit_item(tier: str, endpoint: str) -> Optional[RateLimitItem]:
+    """Precompiled limit for a tier and endpoint, None if the endpoint is blocked for that tier"""
+    return _TIER_LIMIT_ITEMS.get((tier, endpoint), _TIER_LIMIT_ITEMS.get(("guest", endpoint)))
+
+
+def get_daily_limit(tier: str, endpoint: str) -> int:
+    """Requests per window for a tier and endpoint (0 when blocked)"""
+    item = get_limit_item(tier, endpoint)
+    return item.amount if item else 0
+
+
 def get_rate_limit_for_tier(tier: str, endpoint: str) -> Optional[str]:
     """
     Get the rate limit string for a given tier and endpoint.
@@ -79,21 +167,145 @@ def check_tier_access(tier: str, endpoint: str) -> bool:
 
 
 def create_dynamic_limiter() -> Limiter:
-    """Create a limiter with dynamic key function"""
-    return Limiter(key_func=get_rate_limit_key)
+    """
+    Create a limiter with dynamic key function.
+    Counters live in RATE_LIMIT_STORAGE_URI: memory:// is per worker process,
+    sqlite:// is shared by every worker on the host, redis:// across hosts.
+    """
+    storage_options = {}
+    if settings.RATE_LIMIT_STORAGE_URI.startswith("sqlite"):
+        storage_options["busy_timeout"] = settings.SQLITE_BUSY_TIMEOUT_SECONDS
+    return Limiter(
+        key_func=get_rate_limit_key,
+        storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+        storage_options=storage_options,
+    )
 
 # Global limiter instance
 limiter = create_dynamic_limiter()
 
 
-# Pre-configured rate limit strings for decorator use
-VITALS_GUEST_LIMIT = "1/day"
-VITALS_FREE_LIMIT = "3/day"
-VITALS_PRO_LIMIT = "10/day"
-VITALS_INFINITE_LIMIT = "15/day"
+def token_budget(endpoint: str, authenticated_only: bool = False) -> Callable:
+    """
+    Dependency opening the caller's token account for a request.
+    Gemini calls made by the request are charged to it, and
+    request.state.token_account feeds the X-Token-Budget-* headers.
+    `endpoint` only labels rejections.
+    
+    With authenticated_only, requests without a valid API key are passed through
+    without touching the storage: the endpoint rejects them (401) itself.
+    
+    Usage:
+        @router.post("/pdf", dependencies=[Depends(token_budget("extract", authenticated_only=True))])
+    
+    Raises:
+        TokenBudgetExceeded: Token budget spent for this window
+    """
+    async def check(request: Request) -> None:
+        if not limiter.enabled or (authenticated_only and not has_valid_api_key(request)):
+            return
+        tier = get_tier_from_request(request)
+        account = TokenAccount(
+            limiter.limiter.storage,
+            f"tokens/{get_rate_limit_key(request)}",
+            TIER_TOKEN_BUDGETS.get(tier, TIER_TOKEN_BUDGETS["guest"]),
+            TOKEN_BUDGET_WINDOW_SECONDS,
+        )
+        request.state.token_account = account
+        # Storage calls block (SQLite lock waits, Redis round trips): keep them off the event loop
+        try:
+            await storage_pool.run(_check_balance, account, tier, endpoint)
+        except storage_errors(account.storage) as e:
+            _fail_open("token_budget", e)
+        # Set on the event loop: a context variable set in the pool thread would not reach the request
+        open_account(account)
+    
+    return check
 
-DEEP_SCAN_PRO_LIMIT = "5/day"
-DEEP_SCAN_INFINITE_LIMIT = "10/day"
+
+def _no_validation() -> None:
+    return None
+
+
+def tier_rate_limit(endpoint: str, validate: Callable = _no_validation) -> Callable:
+    """
+    Dependency enforcing the caller's tier limit for an endpoint.
+    Endpoints sharing a name (e.g. every deep-scan variant) share one quota.
+    Tiers without access are not counted; the endpoint's tier check rejects them.
+    
+    Also opens the caller's token account (see token_budget); a spent budget
+    is rejected before the request counts against the quota.
+    
+    FastAPI runs route dependencies before it validates the endpoint's own
+    parameters, so a request failing that validation would still be counted.
+    Parameters that must be valid before a hit is counted go in `validate`, a
+    dependency resolved first: on a 422 the check never runs. The endpoint can
+    declare the same dependency to read its value (FastAPI resolves it once).
+    
+    Usage:
+        @router.post("/vitals", dependencies=[Depends(tier_rate_limit("vitals"))])
+    
+    Raises:
+        TokenBudgetExceeded: Token budget spent for this window
+        TierRateLimitExceeded: Quota used up for this window
+    """
+    open_budget = token_budget(endpoint)
+    
+    async def check(request: Request, _validated: Any = Depends(validate)) -> None:
+        if not limiter.enabled:
+            return
+        tier = get_tier_from_request(request)
+        item = get_limit_item(tier, endpoint)
+        if item is None:
+            return
+        await open_budget(request)
+        strategy = limiter.limiter
+        try:
+            await storage_pool.run(_hit, strategy, tier, endpoint, item, get_rate_limit_key(request))
+        except storage_errors(strategy.storage) as e:
+            _fail_open("tier_rate_limit", e)
+    
+    return check
+
+
+def _fail_open(operation: str, error: Exception) -> None:
+    """Let a request through unmetered when the limiter storage fails (see module docstring)."""
+    RATE_LIMIT_STORAGE_ERRORS.labels(operation).inc()
+    logger.warning("Rate-limit storage failed in %s, allowing the request: %s", operation, error)
+
+
+def _check_balance(account: TokenAccount, tier: str, endpoint: str) -> None:
+    """
+    Blocking part of token_budget: read the balance.
+
+    Raises:
+        TokenBudgetExceeded: Token budget spent for this window
+    """
+    account.refresh()
+    if account.exhausted:
+        RATE_LIMIT_REJECTIONS.labels(tier, endpoint, "tokens").inc()
+        raise TokenBudgetExceeded(tier, endpoint, account)
+
+
+def _hit(strategy, tier: str, endpoint: str, item: RateLimitItem, key: str) -> None:
+    """
+    Blocking part of tier_rate_limit: count the hit.
+
+    Raises:
+        TierRateLimitExceeded: Quota used up for this window
+    """
+    if not strategy.hit(item, key, endpoint):
+        RATE_LIMIT_REJECTIONS.labels(tier, endpoint, "requests").inc()
+        reset_at = strategy.get_window_stats(item, key, endpoint)[0]
+        raise TierRateLimitExceeded(tier, endpoint, item, reset_at)
+
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Rate-limit storage backend and health for /health (blocking: pings the storage)"""
+    return {
+        "storage": settings.RATE_LIMIT_STORAGE_URI.split("://", 1)[0],
+        "healthy": limiter.limiter.storage.check(),
+    }
 
 
 def rate_limit_exceeded_handler(request: Request, exc: Exception):
@@ -105,41 +317,45 @@ def rate_limit_exceeded_handler(request: Request, exc: Exception):
     - Upgrade suggestion for free tiers
     - Retry-After header
     """
-    from fastapi.responses import JSONResponse
+    from app.core.responses import FastJSONResponse
     
-    tier = get_tier_from_request(request)
-    path = request.url.path
+    if isinstance(exc, TokenBudgetExceeded):
+        return token_budget_exceeded_response(exc)
     
-    # Determine which endpoint was rate limited
-    endpoint = "deep_scan" if "deep-scan" in path else "vitals"
-    
-    # Get tier limits for context
-    tier_limits = TIER_RATE_LIMITS.get(tier, TIER_RATE_LIMITS["guest"])
-    limit_str = tier_limits.get(endpoint, "0/day")
+    if isinstance(exc, TierRateLimitExceeded):
+        tier, endpoint = exc.tier, exc.endpoint
+        retry_after = max(1, math.ceil(exc.reset_at - time.time()))
+    else:
+        tier = get_tier_from_request(request)
+        endpoint = "deep_scan" if "deep-scan" in request.url.path else "vitals"
+        retry_after = 86400  # 24 hours for daily quota
     
-    # Parse limit (e.g., "10/day" -> 10)
-    try:
-        daily_limit = int(limit_str.split("/")[0]) if limit_str else 0
-    except:
-        daily_limit = 0
+    daily_limit = get_daily_limit(tier, endpoint)
+    scans = "scan" if endpoint == "vitals" else "Deep Scan"
     
-    # Different messages based on tier
+    # Different messages based on tier, with the numbers from TIER_RATE_LIMITS
     if tier == "guest":
-        message = "You've used your 1 free resume scan for today."
-        action = "Create a free account to get 3 scans per day, or upgrade to Pro for 10 daily scans."
+        message = f"You've used your {daily_limit} free resume {scans}{'s' if daily_limit != 1 else ''} for today."
+        action = (
+            f"Create a free account to get {get_daily_limit('infinite-free', 'vitals')} scans per day, "
+            f"or upgrade to Pro for {get_daily_limit('infinite-pro', 'vitals')} daily scans."
+        )
     elif tier == "infinite-free":
-        message = f"You've used all {daily_limit} of your daily resume scans."
-        action = "Upgrade to Pro for 10 scans per day and access to Deep Scan AI analysis."
+        message = f"You've used all {daily_limit} of your daily resume {scans}s."
+        action = (
+            f"Upgrade to Pro for {get_daily_limit('infinite-pro', 'vitals')} scans per day "
+            "and access to Deep Scan AI analysis."
+        )
     elif tier == "infinite-pro":
-        message = f"You've reached your Pro limit of {daily_limit} {endpoint.replace('_', ' ')} scans today."
-        action = "Upgrade to Truly Infinite for higher limits, or try again tomorrow."
+        message = f"You've reached your Pro limit of {daily_limit} {scans}s today."
+        action = (
+            f"Upgrade to Truly Infinite for {get_daily_limit('truly-infinite', endpoint)} "
+            f"{scans}s per day, or try again tomorrow."
+        )
     else:
-        message = "You've reached your daily scan limit."
+        message = f"You've reached your daily limit of {daily_limit} {scans}s."
         action = "Please try again tomorrow."
     
-    # Longer retry for daily limits vs. burst limits
-    retry_after = 86400  # 24 hours for daily quota
-    
     response_data = {
         "error": "Daily Limit Reached",
         "message": message,
@@ -154,9 +370,35 @@ def rate_limit_exceeded_handler(request: Request, exc: Exception):
     if tier in ["guest", "infinite-free", "infinite-pro"]:
         response_data["upgrade_url"] = "/pricing"
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=429,
         content=response_data,
         headers={"Retry-After": str(retry_after)}
     )
 
+
+
+def token_budget_exceeded_response(exc: TokenBudgetExceeded):
+    """429 for a spent token budget (heavy Deep Scans / long job descriptions)"""
+    from app.core.responses import FastJSONResponse
+    
+    retry_after = max(1, math.ceil(exc.reset_at - time.time()))
+    response_data = {
+        "error": "Daily Analysis Budget Reached",
+        "message": "You've used today's AI analysis budget. Large resumes and long job descriptions use more of it.",
+        "code": "TOKEN_BUDGET_EXCEEDED",
+        "action": "Please try again tomorrow." if exc.tier == "truly-infinite"
+                  else "Upgrade for a larger daily budget, or try again tomorrow.",
+        "current_tier": exc.tier,
+        "token_budget": exc.account.budget,
+        "retry_after": retry_after,
+    }
+    
+    if exc.tier != "truly-infinite":
+        response_data["upgrade_url"] = "/pricing"
+    
+    return FastJSONResponse(
+        status_code=429,
+        content=response_data,
+        headers={"Retry-After": str(retry_after), **exc.account.headers()}
+    )
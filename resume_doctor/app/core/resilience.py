@@ -0,0 +1,331 @@
+"""
+Resilience Policies for Upstream AI Calls
+
+Keeps Gemini brownouts from tying up worker capacity:
+- Deadlines: each endpoint sets a time budget; every attempt gets what is left of it
+- Retries: exponential backoff with full jitter, bounded by a shared retry budget
+- Circuit breaker: fails fast once the upstream error rate crosses a threshold
+
+Failures surface as AIServiceError (AI_SERVICE_ERROR) instead of a generic 500.
+"""
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+
+from app.core.errors import ErrorCode
+
+# Upstream says we are over quota (429)
+THROTTLE_ERRORS: Tuple[type, ...] = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+)
+
+# Upstream errors worth retrying: throttling, overload, transient server faults
+RETRYABLE_ERRORS: Tuple[type, ...] = THROTTLE_ERRORS + (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.GatewayTimeout,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+# Absolute time.monotonic() deadline for the current request, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("ai_deadline", default=None)
+
+
+class AIServiceError(Exception):
+    """Upstream AI call failed, timed out or was shed by the circuit breaker."""
+
+    code = ErrorCode.AI_SERVICE_ERROR
+
+    CIRCUIT_OPEN = "circuit_open"
+    TIMEOUT = "timeout"
+    UPSTREAM = "upstream"
+
+    def __init__(self, reason: str, cause: Optional[BaseException] = None):
+        super().__init__(f"{reason}: {cause}" if cause else reason)
+        self.reason = reason
+        self.cause = cause
+
+
+class ServiceOverloaded(AIServiceError):
+    """Shed locally by admission control before reaching the upstream."""
+
+    code = ErrorCode.SERVICE_OVERLOADED
+
+    def __init__(self):
+        super().__init__("overloaded")
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Bound every AI call made inside the block (including retries) to `seconds`.
+    Nested deadlines can only shorten the budget.
+
+    Usage:
+        with deadline(20):
+            result = await vitals_check_text_async(text)
+    """
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(default: float) -> float:
+    """Seconds left in the current deadline (default when none is set)."""
+    expires = _deadline.get()
+    if expires is None:
+        return default
+    return expires - time.monotonic()
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls.
+    Each call deposits `ratio` tokens; each retry spends one.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tokens": round(self._tokens, 2), "exhausted": self.exhausted}
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding time window.
+
+    closed -> open when at least min_calls finished in the window and the failure
+    rate reaches failure_rate; open -> half_open after open_seconds; one probe call
+    then closes (success) or re-opens (failure) the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float, min_calls: int, window_seconds: float, open_seconds: float):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now."""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        """Report the outcome of an allowed call."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                else:
+                    self._trip(now)
+                return
+
+            self._outcomes.append((now, ok))
+            if not ok:
+                self._failures += 1
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                _, old_ok = self._outcomes.popleft()
+                if not old_ok:
+                    self._failures -= 1
+
+            total = len(self._outcomes)
+            if (self._state == self.CLOSED and total >= self.min_calls
+                    and self._failures / total >= self.failure_rate):
+                self._trip(now)
+
+    def abandon(self) -> None:
+        """An allowed call was cancelled before finishing; free the probe slot."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _trip(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.trips += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "window_calls": len(self._outcomes),
+                "window_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class ResiliencePolicy:
+    """
+    Deadline + retry + circuit breaker around one upstream.
+
+    Usage:
+        policy = ResiliencePolicy(breaker, budget, max_retries=2, ...)
+        response = await policy.run(lambda timeout: call(timeout))
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+        default_timeout: float,
+    ):
+        """
+        Args:
+            breaker: Circuit breaker for the upstream
+            budget: Shared retry budget
+            max_retries: Retries per call after the first attempt
+            base_delay/max_delay: Backoff bounds in seconds (full jitter)
+            default_timeout: Budget for calls made outside any deadline() block
+        """
+        self.breaker = breaker
+        self.budget = budget
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_timeout = default_timeout
+        self.retries = 0
+        self.timeouts = 0
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _admit(self) -> float:
+        """Seconds available for the next attempt; raises if none or the circuit is open."""
+        timeout = remaining_time(self.default_timeout)
+        if timeout <= 0:
+            self.timeouts += 1
+            raise AIServiceError(AIServiceError.TIMEOUT)
+        if not self.breaker.allow():
+            raise AIServiceError(AIServiceError.CIRCUIT_OPEN)
+        return timeout
+
+    def _should_retry(self, error: BaseException, attempt: int, delay: float) -> bool:
+        return (
+            isinstance(error, RETRYABLE_ERRORS)
+            and attempt < self.max_retries
+            and remaining_time(self.default_timeout) > delay
+            and self.budget.withdraw()
+        )
+
+    async def run(self, call: Callable[[float], Awaitable[Any]]) -> Any:
+        """
+        Run call(timeout) with retries; timeout is the time left for that attempt.
+
+        Raises:
+            AIServiceError: Circuit open, deadline exhausted or retryable errors persisted
+            Exception: Non-retryable upstream errors (e.g. invalid request) pass through
+        """
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            timeout = self._admit()
+            try:
+                result = await asyncio.wait_for(call(timeout), timeout)
+            except (asyncio.CancelledError, ServiceOverloaded):
+                # Never reached the upstream: says nothing about its health
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                self.breaker.record(not isinstance(e, RETRYABLE_ERRORS))
+                delay = self._backoff(attempt)
+                if self._should_retry(e, attempt, delay):
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                failure = self._failure(e)
+                if failure is e:
+                    raise
+                raise failure from e
+            self.breaker.record(True)
+            return result
+
+    def _failure(self, error: Exception) -> Exception:
+        if isinstance(error, (asyncio.TimeoutError, api_exceptions.DeadlineExceeded)):
+            self.timeouts += 1
+            return AIServiceError(AIServiceError.TIMEOUT, error)
+        if isinstance(error, RETRYABLE_ERRORS):
+            return AIServiceError(AIServiceError.UPSTREAM, error)
+        return error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "retry_budget": self.budget.stats(),
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+        }
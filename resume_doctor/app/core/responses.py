@@ -0,0 +1,51 @@
+"""
+Fast JSON Responses
+
+One JSON encoder for response bodies, SSE events and log lines:
+- orjson when installed (several times faster than json on analysis payloads)
+- Otherwise stdlib json with the same compact, non-ASCII-escaping output
+  Starlette's JSONResponse produces
+
+FastJSONResponse is the app's default_response_class; endpoints that build a
+response themselves should use it instead of JSONResponse.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+
+def dumps(content: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON.
+
+    Args:
+        content: JSON-compatible value
+        default: Called for values the encoder cannot serialize (e.g. str)
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Usage:
+        app = FastAPI(default_response_class=FastJSONResponse)
+        return FastJSONResponse(status_code=422, content=result)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
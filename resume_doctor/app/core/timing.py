@@ -0,0 +1,87 @@
+"""
+Per-Stage Request Timing
+
+Breaks a request's latency down by stage (upload, PDF text, prompt, Gemini, parse):
+- RequestMiddleware opens a Timings collector per request (SERVER_TIMING_ENABLED)
+- Code wraps a stage in `with span("name"):`; repeated stages add up
+- Totals go out in the Server-Timing header and the structured request log line
+
+Without a collector (disabled, startup, scripts) span() returns a shared
+no-op context manager: one ContextVar lookup, no clock reads.
+
+Usage:
+    with span("pdf_text"):
+        text = await get_pdf_text(pdf_content, max_chars, max_pages)
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, Optional
+
+# Collector for the current request, if timing is enabled
+_timings: contextvars.ContextVar[Optional["Timings"]] = contextvars.ContextVar(
+    "timings", default=None
+)
+
+_NO_SPAN = nullcontext()
+
+
+class Timings:
+    """Accumulated seconds per stage name, in first-seen order."""
+
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        """Server-Timing header value, e.g. 'upload;dur=1.20, gemini;dur=812.43'"""
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items())
+
+    def as_dict(self) -> Dict[str, float]:
+        """Milliseconds per stage for log lines"""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+
+
+class _Span:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: Timings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.start)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """
+    Collect spans recorded inside the block (including tasks and pool threads it starts).
+
+    Usage:
+        with collect_timings() as timings:
+            await app(scope, receive, send)
+        timings.header()
+    """
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time the block as stage `name` of the current request (no-op without a collector)."""
+    timings = _timings.get()
+    if timings is None:
+        return _NO_SPAN
+    return _Span(timings, name)
@@ -0,0 +1,142 @@
+"""
+Token Budget Accounting
+
+Charges Gemini usage by tokens instead of counting every request as 1:
+- The rate-limit dependency opens a TokenAccount (user key + tier's daily budget)
+  for the request; requests are refused once the budget is spent
+- GeminiClient reports usage_metadata of every upstream response; it is charged
+  to the account of the request that made the call
+- Balances live in the rate-limit storage, so all workers share one budget;
+  charges run in the storage thread pool; a failed charge is logged and dropped
+"""
+
+import contextvars
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.executors import storage_pool
+from app.core.rate_limit_storage import storage_errors
+
+logger = logging.getLogger(__name__)
+
+# Account charged for AI calls made by the current request, if any
+_account: contextvars.ContextVar[Optional["TokenAccount"]] = contextvars.ContextVar(
+    "token_account", default=None
+)
+
+_lock = threading.Lock()
+_totals = {"responses": 0, "prompt_tokens": 0, "response_tokens": 0, "charged_tokens": 0}
+
+
+class TokenAccount:
+    """
+    A user's token spend in the current budget window.
+
+    Usage:
+        account = TokenAccount(storage, "tokens/user:42", budget=150_000, window_seconds=86400)
+        await storage_pool.run(account.refresh)
+        if account.exhausted: ...
+        open_account(account)
+    """
+
+    def __init__(self, storage, key: str, budget: int, window_seconds: int):
+        """
+        Args:
+            storage: `limits` storage holding the balance (shared with the rate limiter)
+            key: Storage key for this user's balance
+            budget: Tokens allowed per window
+            window_seconds: Budget window, starting at the first charge
+        """
+        self.storage = storage
+        self.key = key
+        self.budget = budget
+        self.window_seconds = window_seconds
+        self.used = 0
+        self.charged = 0
+
+    def refresh(self) -> None:
+        """Load the current balance (blocking storage read)."""
+        self.used = self.storage.get(self.key)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.budget - self.used)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.budget
+
+    @property
+    def reset_at(self) -> float:
+        """Unix time at which the window ends (blocking storage read)."""
+        return self.storage.get_expiry(self.key)
+
+    async def charge(self, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        self.charged += tokens
+        try:
+            self.used = await storage_pool.run(self.storage.incr, self.key, self.window_seconds, amount=tokens)
+        except storage_errors(self.storage) as e:
+            # The Gemini call already succeeded: never fail the request over its bill
+            self.used += tokens
+            logger.warning("Token charge of %d to %s failed: %s", tokens, self.key, e)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Token-Budget-Limit": str(self.budget),
+            "X-Token-Budget-Remaining": str(self.remaining),
+        }
+
+
+def open_account(account: TokenAccount) -> None:
+    """Charge AI calls made by the rest of the current request (and tasks it starts) to account."""
+    _account.set(account)
+
+
+def usage_counts(response: Any) -> Tuple[int, int, int]:
+    """
+    Token counts from a Gemini response's usage metadata.
+
+    Returns:
+        (prompt_tokens, response_tokens, total_tokens); zeros without metadata
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0, 0
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    tokens = getattr(usage, "total_token_count", 0) or prompt_tokens + response_tokens
+    return prompt_tokens, response_tokens, tokens
+
+
+async def record_usage(response: Any) -> int:
+    """
+    Charge the tokens of a Gemini response to the current account.
+    Responses without usage metadata cost nothing.
+
+    Returns:
+        Tokens charged
+    """
+    if getattr(response, "usage_metadata", None) is None:
+        return 0
+    prompt_tokens, response_tokens, tokens = usage_counts(response)
+
+    account = _account.get()
+    if account is not None:
+        await account.charge(tokens)
+
+    with _lock:
+        _totals["responses"] += 1
+        _totals["prompt_tokens"] += prompt_tokens
+        _totals["response_tokens"] += response_tokens
+        if account is not None:
+            _totals["charged_tokens"] += tokens
+    return tokens
+
+
+def get_token_stats() -> Dict[str, Any]:
+    """Tokens used by Gemini responses in this worker"""
+    with _lock:
+        return dict(_totals)
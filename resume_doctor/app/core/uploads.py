@@ -0,0 +1,135 @@
+"""
+Upload Size and Signature Checks
+
+Two layers:
+- RequestMiddleware caps the raw request body (MAX_REQUEST_BODY_BYTES) before
+  Starlette's multipart parser runs: a declared Content-Length over the cap is
+  answered with 413 without reading the body, and chunked bodies are cut off as
+  soon as the running byte count crosses it
+- read_pdf_upload() reads the parsed UploadFile in chunks, checking the %PDF
+  signature on the first chunk and the endpoint's own (smaller) size limit
+"""
+
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.types import Message, Receive, Scope
+
+# PDF magic bytes signature
+PDF_MAGIC = b"%PDF"
+
+# Read granularity (the first chunk always covers the signature)
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """Upload failed validation; endpoints map reason to their own error format."""
+
+    TOO_LARGE = "too_large"
+    TOO_SMALL = "too_small"
+    NOT_PDF = "not_pdf"
+
+    def __init__(self, reason: str, size: Optional[int] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.size = size  # Bytes seen when rejected (lower bound for TOO_LARGE)
+
+
+class BodyTooLarge(HTTPException):
+    """
+    Request body exceeds the cap (413).
+    An HTTPException so FastAPI re-raises it from body parsing instead of reporting a parse error.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail={
+                "error": "File too large",
+                "detail": f"Maximum request size is {max_bytes // (1024 * 1024)}MB",
+                "max_size_mb": max_bytes // (1024 * 1024),
+            },
+        )
+
+
+def declared_body_size(scope: Scope) -> Optional[int]:
+    """Content-Length of the request, or None when absent/invalid (e.g. chunked)."""
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def limit_body(receive: Receive, max_bytes: int) -> Receive:
+    """
+    Wrap an ASGI receive callable so the body stops at max_bytes.
+
+    Raises (from the wrapped callable):
+        BodyTooLarge: Running body size crossed max_bytes
+    """
+    received = 0
+
+    async def limited_receive() -> Message:
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise BodyTooLarge(max_bytes)
+        return message
+
+    return limited_receive
+
+
+async def read_pdf_upload(
+    file: UploadFile,
+    max_bytes: int,
+    min_bytes: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> bytes:
+    """
+    Read and validate a PDF upload chunk by chunk.
+
+    Args:
+        file: Uploaded file
+        max_bytes: Reject once more than this many bytes have been read
+        min_bytes: Reject complete uploads smaller than this
+        chunk_size: Bytes per read
+
+    Returns:
+        Raw PDF bytes
+
+    Raises:
+        UploadRejected: On size or signature failure
+    """
+    # Declared size lets us reject before reading anything
+    if file.size is not None and file.size > max_bytes:
+        raise UploadRejected(UploadRejected.TOO_LARGE, file.size)
+
+    chunks: List[bytes] = []
+    total = 0
+
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+
+        if not chunks and not chunk.startswith(PDF_MAGIC) and len(chunk) >= len(PDF_MAGIC):
+            raise UploadRejected(UploadRejected.NOT_PDF, len(chunk))
+
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadRejected(UploadRejected.TOO_LARGE, total)
+        chunks.append(chunk)
+
+    if total < max(min_bytes, len(PDF_MAGIC)):
+        raise UploadRejected(UploadRejected.TOO_SMALL, total)
+
+    content = b"".join(chunks)
+    if not content.startswith(PDF_MAGIC):
+        raise UploadRejected(UploadRejected.NOT_PDF, total)
+
+    return content
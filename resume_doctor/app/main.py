@@ -5,45 +5,67 @@ Production-ready FastAPI application with:
 - Origin validation middleware
 - Tier-based rate limiting
 - Structured logging
+- Prometheus metrics (/metrics)
 - CORS configuration
 """
 
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
-import time
 import logging
-import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.log import setup_logging
+from app.core.middleware import RequestMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.executors import get_executor_stats, shutdown_executors
+from app.core.jobs import job_runner
+from app.core.metrics import mark_process_dead, render_metrics
+from app.services.gemini_client import get_gemini_stats
+from app.services.pdf_text import extraction_engine, pdf_text_cache
+from app.services.result_cache import analysis_cache
 from app.core.rate_limits import (
     get_rate_limit_key, 
     rate_limit_exceeded_handler,
-    get_tier_from_request,
+    get_rate_limit_stats,
+    TierRateLimitExceeded,
     limiter
 )
 from app.api.v1.endpoints import analyze, extract
 
-# Configure structured logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(message)s'
-)
+# JSON logs, written by a background thread (never blocks the event loop)
+setup_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the PDF workers and start job workers on startup, release pools on shutdown"""
+    await extraction_engine.warm()
+    job_runner.start()
+    yield
+    await job_runner.stop()
+    extraction_engine.shutdown()
+    shutdown_executors()
+    mark_process_dead()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs" if not settings.IS_PRODUCTION else None,  # Disable docs in production
     redoc_url="/redoc" if not settings.IS_PRODUCTION else None,
+    default_response_class=FastJSONResponse,
 )
 
 # Add rate limiter to app state
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+app.add_exception_handler(TierRateLimitExceeded, rate_limit_exceeded_handler)
 
 # CORS configuration from settings
 app.add_middleware(
@@ -52,84 +74,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],  # Restrict to needed methods
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Token-Budget-Limit", "X-Token-Budget-Remaining", "Server-Timing"],
 )
 
 
-# Origin validation middleware (additional layer on top of CORS)
-@app.middleware("http")
-async def validate_origin(request: Request, call_next):
-    """
-    Validate request origin in production.
-    Strictly blocks requests without proper Origin or API Key.
-    """
-    # Skip validation for health checks and preflight
-    if request.url.path in ["/health", "/"] or request.method == "OPTIONS":
-        return await call_next(request)
-    
-    # In production, strictly validate origin
-    if settings.IS_PRODUCTION:
-        origin = request.headers.get("origin") or request.headers.get("referer", "")
-        api_key = request.headers.get("x-api-key")
-        
-        # 1. Check for API Key bypass (Server-to-Server)
-        if api_key and api_key == settings.API_SECRET_KEY:
-            return await call_next(request)
-            
-        # 2. If no API Key, MUST have valid Origin
-        if not origin:
-            logger.warning(f"Blocked headless request to {request.url.path} from {request.client.host if request.client else 'unknown'}")
-            return JSONResponse(
-                status_code=403,
-                content={"error": "Access denied: Missing Origin header"}
-            )
-            
-        # 3. Check if origin is allowed
-        origin_valid = False
-        for allowed in settings.allowed_origins_list:
-            if origin.startswith(allowed):
-                origin_valid = True
-                break
-        
-        if not origin_valid:
-            logger.warning(json.dumps({
-                "event": "origin_blocked",
-                "origin": origin,
-                "path": request.url.path,
-                "timestamp": datetime.utcnow().isoformat()
-            }))
-            return JSONResponse(
-                status_code=403,
-                content={"error": "Origin not allowed"}
-            )
-    
-    return await call_next(request)
-
-
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all requests with timing and tier info"""
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    
-    # Only log API calls, not health checks
-    if not request.url.path.startswith("/health"):
-        log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "method": request.method,
-            "path": request.url.path,
-            "status": response.status_code,
-            "duration": f"{process_time:.3f}s",
-            "client_ip": request.client.host if request.client else "unknown",
-            "tier": get_tier_from_request(request),
-            "user_id": request.headers.get("X-User-Id", "guest"),
-        }
-        logger.info(json.dumps(log_data))
-    
-    return response
+# Origin validation, request logging and token-budget headers in one pure ASGI pass
+# (outermost: added after CORS)
+app.add_middleware(RequestMiddleware)
 
 
 # Include routers
@@ -146,8 +97,11 @@ async def root():
         "environment": settings.ENVIRONMENT,
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "vitals": f"{settings.API_V1_STR}/analyze/vitals",
             "deep_scan": f"{settings.API_V1_STR}/analyze/deep-scan",
+            "deep_scan_stream": f"{settings.API_V1_STR}/analyze/deep-scan/stream",
+            "deep_scan_job": f"{settings.API_V1_STR}/analyze/deep-scan/jobs",
             "extract_pdf": f"{settings.API_V1_STR}/extract/pdf",
             "extract_text": f"{settings.API_V1_STR}/extract/text"
         }
@@ -155,10 +109,11 @@ async def root():
 
 
 @app.get("/health")
-async def health():
+def health():
     """
     Enhanced health check endpoint.
     Used by Railway for deployment health monitoring.
+    Plain def: the storage pings and disk-cache/job-store counts run in the threadpool.
     """
     import psutil
     import os
@@ -178,6 +133,26 @@ async def health():
             "max_file_size_mb": settings.MAX_FILE_SIZE_MB,
             "cors_origins": len(settings.cors_origins_list),
         },
+        "executors": get_executor_stats(),
+        "pdf_engine": extraction_engine.stats(),
+        "gemini": get_gemini_stats(),
+        "jobs": job_runner.stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "caches": {
+            analysis_cache.name: analysis_cache.stats(),
+            pdf_text_cache.name: pdf_text_cache.stats(),
+        },
         "timestamp": datetime.utcnow().isoformat(),
     }
 
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics (text exposition format), aggregated across workers
+    when PROMETHEUS_MULTIPROC_DIR is set (plain def: reading those files runs in the threadpool).
+    In production, scrapers authenticate with the X-API-Key header like other server-to-server calls.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -31,6 +31,10 @@ class VitalsResult(BaseModel):
     impact_score: int = Field(..., ge=0, le=100)
     brevity_score: int = Field(..., ge=0, le=100)
     style_score: int = Field(..., ge=0, le=100)
+    # Reported by local/hybrid scoring
+    completeness_score: Optional[int] = Field(None, ge=0, le=100, description="Section completeness")
+    ats_score: Optional[int] = Field(None, ge=0, le=100, description="ATS optimization score")
+    scoring_mode: str = Field(default="llm", description="local/llm/hybrid")
     experience_level: str = Field(default="mid", description="entry/mid/senior")
     industry: str = Field(default="other", description="Detected industry")
     # Empty placeholders for UI compatibility
@@ -3,16 +3,82 @@ Unified Gemini Client
 
 Single source of truth for all Gemini AI interactions in the Resume Doctor service.
 All services should use this client instead of directly importing genai.
+
+Async methods (agenerate_*) share the SDK's default gRPC asyncio channel, a single
+keep-alive HTTP/2 connection that multiplexes every outstanding call in the worker.
 """
 
 import google.generativeai as genai
-import json
-from typing import Dict, Any, Optional, List, Union
+from typing import AsyncIterator, Dict, Any, Optional, List, Union
+from app.core.cache import make_cache_key
+from app.core.concurrency import AdaptiveLimiter
 from app.core.config import settings
+from app.core.executors import ai_pool
+from app.core.hedging import Hedger
+from app.core.json_stream import extract_json
+from app.core.metrics import observe_gemini_call, observe_gemini_tokens
+from app.core.resilience import THROTTLE_ERRORS, CircuitBreaker, ResiliencePolicy, RetryBudget
+from app.core.singleflight import SingleFlight
+from app.core.timing import span
+from app.core.token_budget import get_token_stats, record_usage, usage_counts
 
 # Configure Gemini once at module level
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+# Per-worker adaptive cap on outstanding async Gemini calls (shared by all clients).
+# Grows while calls succeed, shrinks on 429s and latency spikes; excess calls queue briefly, then get 503.
+# Queued calls are released by subscription tier (weighted-fair, see priority()).
+_limiter = AdaptiveLimiter(
+    initial=settings.GEMINI_INITIAL_CONCURRENCY,
+    min_limit=settings.GEMINI_MIN_CONCURRENCY,
+    max_limit=settings.GEMINI_MAX_IN_FLIGHT,
+    max_queue=settings.GEMINI_QUEUE_SIZE,
+    queue_timeout=settings.GEMINI_QUEUE_TIMEOUT_SECONDS,
+    weights=settings.gemini_tier_weights,
+    is_throttle=lambda error: isinstance(error, THROTTLE_ERRORS),
+)
+
+# Identical concurrent async calls (double submits, retries) share one request
+_single_flight = SingleFlight()
+
+# Deadline/retry/circuit-breaker policy and hedger per model (shared by clients of the same model)
+_policies: Dict[str, ResiliencePolicy] = {}
+_hedgers: Dict[str, Hedger] = {}
+
+
+def get_policy(model_name: str) -> ResiliencePolicy:
+    """Resilience policy for a model, created on first use"""
+    policy = _policies.get(model_name)
+    if policy is None:
+        policy = _policies.setdefault(model_name, ResiliencePolicy(
+            CircuitBreaker(
+                failure_rate=settings.GEMINI_BREAKER_FAILURE_RATE,
+                min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+                window_seconds=settings.GEMINI_BREAKER_WINDOW_SECONDS,
+                open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+            ),
+            RetryBudget(ratio=settings.GEMINI_RETRY_BUDGET_RATIO, max_tokens=10),
+            max_retries=settings.GEMINI_MAX_RETRIES,
+            base_delay=settings.GEMINI_RETRY_BASE_DELAY,
+            max_delay=settings.GEMINI_RETRY_MAX_DELAY,
+            default_timeout=settings.GEMINI_TIMEOUT_SECONDS,
+        ))
+    return policy
+
+
+def get_hedger(model_name: str) -> Hedger:
+    """Latency tracker/hedger for a model, created on first use"""
+    hedger = _hedgers.get(model_name)
+    if hedger is None:
+        hedger = _hedgers.setdefault(model_name, Hedger(
+            model_name,
+            percentile=settings.GEMINI_HEDGE_PERCENTILE,
+            max_hedge_rate=settings.GEMINI_HEDGE_MAX_RATE,
+            min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES,
+            min_delay=settings.GEMINI_HEDGE_MIN_DELAY,
+        ))
+    return hedger
+
 
 class GeminiClient:
     """
@@ -20,8 +86,9 @@ class GeminiClient:
     
     Usage:
         client = GeminiClient()
-        result = client.generate_json(prompt)
-        result = client.generate_json_with_pdf(pdf_bytes, prompt)
+        result = await client.agenerate_json(prompt)
+        result = await client.agenerate_json_with_pdf(pdf_bytes, prompt)
+        async for text in client.astream_content(parts): ...
     """
     
     def __init__(self, model_name: Optional[str] = None):
@@ -32,6 +99,8 @@ class GeminiClient:
             model_name: Optional override for model name. Defaults to config value.
         """
         self.model_name = model_name or settings.GEMINI_MODEL_NAME
+        self.policy = get_policy(self.model_name)
+        self.hedger = get_hedger(self.model_name)
         self._model = None
     
     @property
@@ -44,34 +113,129 @@ class GeminiClient:
             )
         return self._model
     
-    def clean_json_response(self, response_text: str) -> str:
+    def parse_json(self, response_text: str) -> Dict[str, Any]:
         """
-        Clean Gemini response to extract valid JSON.
-        Handles markdown code blocks and extra whitespace.
+        Extract the JSON object from a Gemini response.
+        Tolerates markdown code blocks, surrounding text and control characters.
         """
-        text = response_text.strip()
-        
-        # Remove markdown code blocks
-        if text.startswith("```json"):
-            text = text[7:]
-        elif text.startswith("```"):
-            text = text[3:]
+        with span("parse"):
+            return extract_json(response_text)
+    
+    async def record_usage(self, response) -> None:
+        """Charge a response's tokens to the current request and count them in /metrics."""
+        await record_usage(response)
+        prompt_tokens, response_tokens, _ = usage_counts(response)
+        observe_gemini_tokens(self.model_name, prompt_tokens, response_tokens)
+    
+    def request_key(
+        self,
+        content_parts: Union[str, List[Union[str, Dict[str, Any]]]]
+    ) -> str:
+        """Hash of model + content parts identifying an identical request."""
+        parts = content_parts if isinstance(content_parts, list) else [content_parts]
+        key_parts: List[Any] = [self.model_name]
+        for part in parts:
+            if isinstance(part, dict):
+                key_parts.extend(["blob", part.get("mime_type", ""), part.get("data", b"")])
+            else:
+                key_parts.extend(["text", part])
+        return make_cache_key(*key_parts)
+    
+    async def agenerate_content(
+        self,
+        content_parts: Union[str, List[Union[str, Dict[str, Any]]]]
+    ):
+        """
+        Async generation returning the raw SDK response.
+        All agenerate_* methods funnel through here.
         
-        if text.endswith("```"):
-            text = text[:-3]
+        Concurrent identical requests (same model, prompt and content parts)
+        await a single upstream call and share its response.
         
-        text = text.strip()
+        Args:
+            content_parts: Prompt string or list of content parts
+            
+        Returns:
+            Gemini GenerateContentResponse
+        """
+        with span("gemini"):
+            return await _single_flight.do(
+                self.request_key(content_parts),
+                lambda: self._agenerate(content_parts)
+            )
+    
+    async def _agenerate(self, content_parts):
+        """
+        Upstream call with deadline, retries and circuit breaker.
+        With GEMINI_HEDGE_ENABLED each attempt is hedged against tail latency.
+        Token usage is charged to the request that started the call (shared callers pay nothing).
+        """
+        with observe_gemini_call(self.model_name):
+            if settings.GEMINI_HEDGE_ENABLED and settings.GEMINI_ASYNC_TRANSPORT:
+                response = await self.policy.run(
+                    lambda timeout: self.hedger.run(lambda: self._attempt(content_parts, timeout))
+                )
+            else:
+                response = await self.policy.run(lambda timeout: self._attempt(content_parts, timeout))
+        await self.record_usage(response)
+        return response
+    
+    async def _attempt(self, content_parts, timeout: float):
+        """
+        Perform one upstream call under the adaptive concurrency limit.
+        Uses the SDK's native asyncio path; with GEMINI_ASYNC_TRANSPORT disabled
+        the blocking call runs in the AI thread pool instead.
         
-        # Extract JSON object
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
+        Raises:
+            ServiceOverloaded: No slot free within the queue timeout
+        """
+        request_options = {"timeout": timeout}
+        async with _limiter.slot():
+            if settings.GEMINI_ASYNC_TRANSPORT:
+                return await self.model.generate_content_async(
+                    content_parts, request_options=request_options
+                )
+            return await ai_pool.run(
+                self.model.generate_content, content_parts, request_options=request_options
+            )
+    
+    async def astream_content(
+        self,
+        content_parts: Union[str, List[Union[str, Dict[str, Any]]]]
+    ) -> AsyncIterator[str]:
+        """
+        Stream response text chunks as Gemini generates them.
+        Holds one concurrency slot for the whole stream; not deduplicated.
+        Starting the stream is retried under the policy; once chunks flow it is not.
+        With GEMINI_ASYNC_TRANSPORT disabled the full response arrives as one chunk.
         
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            text = text[start_idx:end_idx + 1]
+        Args:
+            content_parts: Prompt string or list of content parts
+            
+        Yields:
+            Response text fragments in order
+        """
+        if not settings.GEMINI_ASYNC_TRANSPORT:
+            response = await self.agenerate_content(content_parts)
+            yield response.text
+            return
         
-        return text
+        async with _limiter.slot(measure=False):
+            with span("gemini"), observe_gemini_call(self.model_name):
+                response = await self.policy.run(
+                    lambda timeout: self.model.generate_content_async(
+                        content_parts, stream=True, request_options={"timeout": timeout}
+                    )
+                )
+                last = None
+                async for chunk in response:
+                    last = chunk
+                    if chunk.parts:
+                        yield chunk.text
+            # Each chunk carries the running usage totals; the last one has the final count
+            await self.record_usage(last)
     
-    def generate_json(self, prompt: str) -> Dict[str, Any]:
+    async def agenerate_json(self, prompt: str) -> Dict[str, Any]:
         """
         Generate a JSON response from text prompt.
         
@@ -83,15 +247,14 @@ class GeminiClient:
             
         Raises:
             json.JSONDecodeError: If response is not valid JSON
-            Exception: For API errors
+            AIServiceError: Circuit open, deadline exceeded or upstream kept failing
         """
-        response = self.model.generate_content(prompt)
-        cleaned = self.clean_json_response(response.text)
-        return json.loads(cleaned)
+        response = await self.agenerate_content(prompt)
+        return self.parse_json(response.text)
     
-    def generate_json_with_pdf(
-        self, 
-        pdf_bytes: bytes, 
+    async def agenerate_json_with_pdf(
+        self,
+        pdf_bytes: bytes,
         prompt: str
     ) -> Dict[str, Any]:
         """
@@ -104,20 +267,15 @@ class GeminiClient:
             
         Returns:
             Parsed JSON dictionary
-            
-        Raises:
-            json.JSONDecodeError: If response is not valid JSON
-            Exception: For API errors
         """
-        response = self.model.generate_content([
+        response = await self.agenerate_content([
             {'mime_type': 'application/pdf', 'data': pdf_bytes},
             prompt
         ])
-        cleaned = self.clean_json_response(response.text)
-        return json.loads(cleaned)
+        return self.parse_json(response.text)
     
-    def generate_json_with_content(
-        self, 
+    async def agenerate_json_with_content(
+        self,
         content_parts: List[Union[str, Dict[str, Any]]]
     ) -> Dict[str, Any]:
         """
@@ -129,9 +287,20 @@ class GeminiClient:
         Returns:
             Parsed JSON dictionary
         """
-        response = self.model.generate_content(content_parts)
-        cleaned = self.clean_json_response(response.text)
-        return json.loads(cleaned)
+        response = await self.agenerate_content(content_parts)
+        return self.parse_json(response.text)
+
+
+def get_gemini_stats() -> Dict[str, Any]:
+    """Outstanding async Gemini calls in this worker"""
+    return {
+        "concurrency": _limiter.stats(),
+        "async_transport": settings.GEMINI_ASYNC_TRANSPORT,
+        "single_flight": _single_flight.stats(),
+        "policies": {name: policy.stats() for name, policy in _policies.items()},
+        "hedging": {name: hedger.stats() for name, hedger in _hedgers.items()},
+        "tokens": get_token_stats(),
+    }
 
 
 # Default client instance (singleton pattern)
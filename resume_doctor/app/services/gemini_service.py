@@ -6,11 +6,16 @@ Uses unified GeminiClient for consistent configuration.
 """
 
 import json
-from typing import Optional
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional, Tuple
+from app.core.cache import make_cache_key
+from app.core.json_stream import JSONFieldStream
+from app.core.resilience import AIServiceError
+from app.core.timing import span
 from app.services.gemini_client import gemini_client
 
-
-
+logger = logging.getLogger(__name__)
 
 
 # Comprehensive Deep Scan prompt with industry-standard scoring
@@ -155,7 +160,70 @@ Note: Only list keywords that are genuinely missing and relevant.
 """
 
 
-def analyze_with_gemini(pdf_content: bytes, job_description: Optional[str] = None) -> str:
+# Changes whenever either template is edited, invalidating cached results
+DEEP_SCAN_PROMPT_VERSION = make_cache_key(DEEP_SCAN_PROMPT, JOB_DESCRIPTION_SECTION)[:12]
+
+# Bumped when the shape of a cached result changes (2: dict instead of a JSON string)
+DEEP_SCAN_RESULT_FORMAT = 2
+
+
+def build_deep_scan_prompt(job_description: Optional[str] = None) -> str:
+    """Build the Deep Scan prompt with optional job description section."""
+    if job_description:
+        jd_section = JOB_DESCRIPTION_SECTION.format(job_description=job_description[:3000])
+    else:
+        jd_section = "### Note: No job description provided. Analyze for general ATS optimization."
+    
+    return DEEP_SCAN_PROMPT.format(
+        job_description_section=jd_section,
+        resume_text="{PDF_CONTENT}"  # Placeholder, actual PDF passed as content
+    )
+
+
+def format_deep_scan_result(result: dict) -> dict:
+    """Ensure required fields exist with defaults."""
+    return {
+        "overall_score": result.get("overall_score", 50),
+        "summary_feedback": result.get("summary_feedback", "Analysis complete."),
+        "impact_score": result.get("impact_score", 50),
+        "brevity_score": result.get("brevity_score", 50),
+        "style_score": result.get("style_score", 50),
+        "sections": result.get("sections", []),
+        "missing_keywords": result.get("missing_keywords", []),
+        "parsed_data": result.get("parsed_data", {}),
+        "experience_level": result.get("experience_level", "mid"),
+        "industry": result.get("industry", "other"),
+        "recommendations": result.get("recommendations", {
+            "high_priority": [],
+            "medium_priority": [],
+            "low_priority": []
+        })
+    }
+
+
+def deep_scan_error_result(e: Exception) -> dict:
+    """Error response in the expected Deep Scan format."""
+    if isinstance(e, json.JSONDecodeError):
+        logger.warning("Deep Scan JSON parsing error: %s", e)
+        summary = "Analysis failed to parse. Please try again."
+    else:
+        logger.error("Gemini API error: %s", e, exc_info=e)
+        summary = f"Analysis service error: {str(e)}"
+    
+    return {
+        "overall_score": 0,
+        "summary_feedback": summary,
+        "impact_score": 0,
+        "brevity_score": 0,
+        "style_score": 0,
+        "sections": [],
+        "missing_keywords": [],
+        "parsed_data": {},
+        "error": str(e)
+    }
+
+
+async def analyze_with_gemini_async(pdf_content: bytes, job_description: Optional[str] = None) -> dict:
     """
     Deep Scan analysis using Gemini AI.
     
@@ -171,67 +239,59 @@ def analyze_with_gemini(pdf_content: bytes, job_description: Optional[str] = Non
         job_description: Optional target job description for keyword matching
         
     Returns:
-        JSON string with full analysis results
+        Full analysis results (an "error" key is present if analysis failed)
     """
-    # Build prompt with optional job description section
-    if job_description:
-        jd_section = JOB_DESCRIPTION_SECTION.format(job_description=job_description[:3000])
-    else:
-        jd_section = "### Note: No job description provided. Analyze for general ATS optimization."
-    
-    prompt = DEEP_SCAN_PROMPT.format(
-        job_description_section=jd_section,
-        resume_text="{PDF_CONTENT}"  # Placeholder, actual PDF passed as content
-    )
+    with span("prompt"):
+        prompt = build_deep_scan_prompt(job_description)
 
     try:
-        # Use unified Gemini client for consistent model and config
-        result = gemini_client.generate_json_with_pdf(pdf_content, prompt)
-        
-        # Ensure required fields exist with defaults
-        return json.dumps({
-            "overall_score": result.get("overall_score", 50),
-            "summary_feedback": result.get("summary_feedback", "Analysis complete."),
-            "impact_score": result.get("impact_score", 50),
-            "brevity_score": result.get("brevity_score", 50),
-            "style_score": result.get("style_score", 50),
-            "sections": result.get("sections", []),
-            "missing_keywords": result.get("missing_keywords", []),
-            "parsed_data": result.get("parsed_data", {}),
-            "experience_level": result.get("experience_level", "mid"),
-            "industry": result.get("industry", "other"),
-            "recommendations": result.get("recommendations", {
-                "high_priority": [],
-                "medium_priority": [],
-                "low_priority": []
-            })
-        })
-        
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        # Return error response in expected format
-        return json.dumps({
-            "overall_score": 0,
-            "summary_feedback": "Analysis failed to parse. Please try again.",
-            "impact_score": 0,
-            "brevity_score": 0,
-            "style_score": 0,
-            "sections": [],
-            "missing_keywords": [],
-            "parsed_data": {},
-            "error": str(e)
-        })
+        result = await gemini_client.agenerate_json_with_pdf(pdf_content, prompt)
+        return format_deep_scan_result(result)
+    except AIServiceError:
+        raise
     except Exception as e:
-        print(f"Gemini API error: {e}")
-        return json.dumps({
-            "overall_score": 0,
-            "summary_feedback": f"Analysis service error: {str(e)}",
-            "impact_score": 0,
-            "brevity_score": 0,
-            "style_score": 0,
-            "sections": [],
-            "missing_keywords": [],
-            "parsed_data": {},
-            "error": str(e)
-        })
+        return deep_scan_error_result(e)
+
 
+async def stream_deep_scan(
+    pdf_content: bytes,
+    job_description: Optional[str] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming Deep Scan.
+    Yields each top-level field as soon as Gemini has finished generating it,
+    so scores arrive long before sections and parsed_data.
+    
+    Yields:
+        ("field", {"key": ..., "value": ...}) for every completed top-level field
+        ("section", {"index": ..., "value": ...}) for each element of "sections"
+        ("result", dict) once, last - same format as analyze_with_gemini_async
+    
+    Raises:
+        AIServiceError: Gemini unavailable (circuit open, deadline exceeded)
+    """
+    with span("prompt"):
+        prompt = build_deep_scan_prompt(job_description)
+    stream = JSONFieldStream(item_keys={"sections"})
+    section_index = 0
+
+    try:
+        chunks = gemini_client.astream_content([
+            {'mime_type': 'application/pdf', 'data': pdf_content},
+            prompt
+        ])
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                for kind, key, value in stream.feed(chunk):
+                    if kind == "item":
+                        yield "section", {"index": section_index, "value": value}
+                        section_index += 1
+                    elif key != "sections":
+                        yield "field", {"key": key, "value": value}
+
+        result = stream.result()
+        yield "result", format_deep_scan_result(result)
+    except AIServiceError:
+        raise
+    except Exception as e:
+        yield "result", deep_scan_error_result(e)
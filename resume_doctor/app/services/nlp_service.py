@@ -8,80 +8,26 @@ Lightweight service using:
 No heavy local NLP dependencies (textstat, nltk removed for Railway optimization).
 """
 
-import io
 import json
-import google.generativeai as genai
-from pdfminer.high_level import extract_text
-from app.core.config import settings
+import logging
+import re
+from datetime import datetime
+from typing import Literal, get_args
+from app.core.cache import make_cache_key
+from app.core.json_stream import extract_json
+from app.core.resilience import AIServiceError
+from app.core.timing import span
+from app.services.gemini_client import GeminiClient
+from app.services.pdf_engine import extract_text_from_pdf  # noqa: F401 - re-exported for existing callers
 
-# Configure Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
+# Lightweight model for quick scoring
+VITALS_MODEL_NAME = "gemini-2.0-flash-lite"
+vitals_client = GeminiClient(VITALS_MODEL_NAME)
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """
-    Extract text from a PDF file using pdfminer.six.
-    Handles multi-column resume layouts better than pypdf.
-    
-    Args:
-        file_content: Raw PDF bytes
-        
-    Returns:
-        Extracted text string
-    """
-    try:
-        text = extract_text(io.BytesIO(file_content))
-        return text.strip()
-    except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        return ""
-
-
-def clean_json_response(response_text: str) -> str:
-    """
-    Clean Gemini response to extract valid JSON.
-    Handles common issues:
-    - Markdown code blocks (```json ... ```)
-    - Leading/trailing whitespace and newlines
-    - Extra text before/after JSON
-    - Control characters
-    """
-    import re
-    
-    text = response_text.strip()
-    
-    # Log raw response for debugging (first 200 chars)
-    print(f"[clean_json] Raw response (first 200 chars): {repr(text[:200])}")
-    
-    # Remove markdown code blocks
-    if text.startswith("```json"):
-        text = text[7:]
-    elif text.startswith("```"):
-        text = text[3:]
-    
-    if text.endswith("```"):
-        text = text[:-3]
-    
-    text = text.strip()
-    
-    # Try to find JSON object using regex (more robust)
-    json_match = re.search(r'\{[\s\S]*\}', text)
-    if json_match:
-        text = json_match.group(0)
-    else:
-        # Fallback: find boundaries manually
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            text = text[start_idx:end_idx + 1]
-    
-    # Remove control characters that could break JSON parsing
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-    
-    print(f"[clean_json] Cleaned response (first 200 chars): {repr(text[:200])}")
-    
-    return text
+# Text budget sent to Gemini (~2000 tokens); extraction stops once it is reached
+VITALS_MAX_CHARS = 8000
 
 
 # Gemini prompt for Vitals Check with sections and issues
@@ -113,13 +59,466 @@ RESUME TEXT:
 """
 
 
-def vitals_check(pdf_content: bytes) -> dict:
+# Changes whenever the template is edited, invalidating cached results
+VITALS_PROMPT_VERSION = make_cache_key(VITALS_PROMPT)[:12]
+
+
+# =============================================================================
+# Local Vitals Scoring (no LLM round trip)
+# Deterministic heuristics for the VITALS_PROMPT criteria. Lexicons and regexes
+# are built once at import so scoring a resume takes a few milliseconds.
+# =============================================================================
+
+# Bump when the heuristics change so cached local/hybrid results are invalidated
+LOCAL_SCORER_VERSION = "1"
+
+# Selectable via ?mode= on /api/v1/analyze/vitals
+VitalsMode = Literal["local", "llm", "hybrid"]
+VITALS_MODES = get_args(VitalsMode)
+
+# Canonical section -> header spellings
+SECTION_ALIASES = {
+    "summary": ("summary", "professional summary", "profile", "professional profile",
+                "objective", "career objective", "about me", "about"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "relevant experience", "career history"),
+    "education": ("education", "academic background", "education and training", "academics",
+                  "academic qualifications"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills", "competencies",
+               "skills and tools", "technologies", "tools"),
+    "projects": ("projects", "personal projects", "key projects", "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "courses"),
+}
+_SECTION_LOOKUP = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+_STANDARD_SECTIONS = ("experience", "education", "skills")
+
+STRONG_VERBS = frozenset("""
+    accelerated achieved administered analyzed architected automated boosted built championed
+    coached collaborated completed consolidated coordinated created cut decreased delivered
+    deployed designed developed directed doubled drove eliminated enabled engineered established
+    executed expanded generated grew headed implemented improved increased influenced initiated
+    integrated introduced launched led maintained managed mentored migrated modernized negotiated
+    optimized orchestrated organized oversaw owned pioneered planned produced programmed
+    published reduced redesigned refactored resolved restructured revamped saved scaled secured
+    shipped simplified spearheaded standardized streamlined strengthened supervised supported
+    tested trained transformed tripled upgraded won wrote
+""".split())
+
+_BULLET_RE = re.compile(r"^\s*(?:[•‣⁃∙▪▫●◦►➢✓✔*·–—\uf0b7\uf0a7-]|\d{1,2}[.)])\s+")
+_METRIC_RE = re.compile(
+    r"[$€£₹]\s?\d"                                              # currency
+    r"|\d+(?:[.,]\d+)?\s?(?:%|\+|percent\b|million\b|billion\b)"  # percentages, "10+"
+    r"|(?<![\w.])(?!(?:19|20)\d{2}\b)\d+(?:[.,]\d+)?(?=[a-z]*\b)",   # counts and units (not years)
+    re.IGNORECASE,
+)
+_WEAK_PHRASE_RE = re.compile(
+    r"\b(?:responsible for|helped(?: with)?|worked on|assisted(?: with| in)?|participated in|"
+    r"involved in|duties included|tasked with|in charge of)\b",
+    re.IGNORECASE,
+)
+_PASSIVE_RE = re.compile(r"\b(?:was|were|been|being|is|are)\s+\w+ed\b", re.IGNORECASE)
+_PRONOUN_RE = re.compile(r"\b(?:I|me|my|mine)\b")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"(?:\+?\d[\s().-]?){9,14}\d")
+_LINKEDIN_RE = re.compile(r"linkedin\.com/", re.IGNORECASE)
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'+#.-]*")
+_HEADER_CLEAN_RE = re.compile(r"[^a-z& ]+")
+_DATE_RANGE_RE = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*(?:[A-Za-z]{3,9}\.?\s+)?((?:19|20)\d{2}|present|current|now)",
+    re.IGNORECASE,
+)
+_YEARS_CLAIM_RE = re.compile(r"\b(\d{1,2})\+?\s*(?:years|yrs)\b", re.IGNORECASE)
+# Table borders and icon-font glyphs (private use area, minus the Symbol/Wingdings bullets)
+_SPECIAL_GLYPH_RE = re.compile(r"[│┃─━┌┐└┘├┤┬┴┼\ue000-\uf0a6\uf0a8-\uf0b6\uf0b8-\uf8ff]")
+
+
+def _keyword_pattern(words):
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b", re.IGNORECASE)
+
+
+# Industry -> (detection terms, core ATS keywords)
+INDUSTRY_LEXICON = {
+    "technology": (
+        ("software", "developer", "engineer", "python", "java", "javascript", "cloud", "aws", "api",
+         "kubernetes", "devops", "frontend", "backend", "database", "machine learning"),
+        ("Git", "CI/CD", "Agile", "REST APIs", "Cloud", "Testing", "SQL"),
+    ),
+    "finance": (
+        ("finance", "financial", "accounting", "investment", "banking", "audit", "cpa", "portfolio",
+         "budget", "forecasting", "ledger"),
+        ("Financial Modeling", "Excel", "Forecasting", "GAAP", "Risk Analysis", "Budgeting"),
+    ),
+    "healthcare": (
+        ("patient", "clinical", "hospital", "nurse", "nursing", "healthcare", "medical", "physician",
+         "pharmacy", "care plan"),
+        ("Patient Care", "EHR", "HIPAA", "Clinical Documentation", "CPR"),
+    ),
+    "marketing": (
+        ("marketing", "seo", "campaign", "brand", "social media", "content", "advertising", "crm",
+         "growth", "email marketing"),
+        ("SEO", "Google Analytics", "Content Strategy", "A/B Testing", "CRM", "Campaign Management"),
+    ),
+    "education": (
+        ("teacher", "teaching", "curriculum", "student", "classroom", "lesson", "tutor", "school",
+         "instruction"),
+        ("Curriculum Development", "Lesson Planning", "Classroom Management", "Assessment"),
+    ),
+    "legal": (
+        ("legal", "law", "attorney", "litigation", "paralegal", "contract", "compliance", "counsel"),
+        ("Legal Research", "Contract Drafting", "Compliance", "Litigation", "Due Diligence"),
+    ),
+    "engineering": (
+        ("mechanical", "electrical", "civil", "cad", "manufacturing", "autocad", "solidworks",
+         "structural", "hvac"),
+        ("AutoCAD", "SolidWorks", "Project Management", "Quality Control", "Six Sigma"),
+    ),
+    "consulting": (
+        ("consulting", "consultant", "client engagement", "stakeholder", "strategy", "advisory"),
+        ("Stakeholder Management", "Business Analysis", "Strategy", "Change Management"),
+    ),
+}
+_INDUSTRY_PATTERNS = {industry: _keyword_pattern(terms) for industry, (terms, _) in INDUSTRY_LEXICON.items()}
+_INDUSTRY_KEYWORDS = {
+    industry: [(keyword, _keyword_pattern([keyword])) for keyword in keywords]
+    for industry, (_, keywords) in INDUSTRY_LEXICON.items()
+}
+
+
+def _clamp(value: float) -> int:
+    return int(max(0, min(100, round(value))))
+
+
+def _split_sections(lines):
+    """Map canonical section -> its lines (text before the first header goes to 'header')."""
+    sections = {"header": []}
+    current = "header"
+    for line in lines:
+        stripped = line.strip()
+        if stripped and len(stripped) <= 40:
+            key = _HEADER_CLEAN_RE.sub("", stripped.lower()).strip()
+            section = _SECTION_LOOKUP.get(key)
+            if section:
+                current = section
+                sections.setdefault(current, [])
+                continue
+        sections[current].append(line)
+    return sections
+
+
+def _collect_bullets(lines):
+    """Bullet texts with wrapped continuation lines joined back on."""
+    bullets = []
+    current = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            current = None
+            continue
+        match = _BULLET_RE.match(line)
+        if match:
+            current = [line[match.end():].strip()]
+            bullets.append(current)
+        elif current is not None:
+            current.append(stripped)
+    return [" ".join(parts) for parts in bullets]
+
+
+def _estimate_years(text: str) -> float:
+    years = 0.0
+    ranges = _DATE_RANGE_RE.findall(text)
+    if ranges:
+        current_year = datetime.utcnow().year
+        starts = [int(start) for start, _ in ranges]
+        ends = [current_year if not end[:1].isdigit() else int(end) for _, end in ranges]
+        years = max(ends) - min(starts)
+    claims = [int(n) for n in _YEARS_CLAIM_RE.findall(text)]
+    return max([years] + claims)
+
+
+def local_vitals_scores(text: str) -> dict:
+    """
+    Score resume text locally against the Vitals criteria.
+    
+    Returns:
+        Dictionary in the Vitals result shape, plus completeness_score and ats_score
+    """
+    lines = text.splitlines()
+    sections = _split_sections(lines)
+    experience_lines = sections.get("experience") or lines
+    bullets = _collect_bullets(experience_lines) or _collect_bullets(lines)
+    if not bullets:
+        # No bullet glyphs: treat substantive experience lines as statements
+        bullets = [line.strip() for line in experience_lines if len(line.split()) >= 6]
+    bullet_words = [len(_WORD_RE.findall(bullet)) for bullet in bullets]
+    total = len(bullets) or 1
+    
+    # IMPACT: share of statements carrying a metric (60%+ earns full marks)
+    quantified = sum(1 for bullet in bullets if _METRIC_RE.search(bullet))
+    quantified_ratio = quantified / total
+    impact_score = _clamp(20 + 80 * min(1.0, quantified_ratio / 0.6))
+    
+    # BREVITY: bullets under ~2 lines, no dense paragraphs
+    long_bullets = sum(1 for words in bullet_words if words > 30)
+    paragraphs = sum(1 for line in lines if len(line.split()) > 45)
+    word_count = len(_WORD_RE.findall(text))
+    brevity_score = _clamp(
+        100 - 60 * (long_bullets / total) - 8 * paragraphs - (10 if word_count > 1100 else 0)
+    )
+    
+    # STYLE: strong verb openers, no weak phrases, passive voice or pronouns
+    strong = sum(
+        1 for bullet in bullets
+        if bullet.split() and bullet.split()[0].lower().strip(".,;:") in STRONG_VERBS
+    )
+    weak_phrases = _WEAK_PHRASE_RE.findall(text)
+    passive = len(_PASSIVE_RE.findall(text))
+    pronouns = len(_PRONOUN_RE.findall(text))
+    style_score = _clamp(
+        45 + 55 * (strong / total) - 6 * len(weak_phrases) - 4 * passive - 2 * pronouns
+    )
+    
+    # COMPLETENESS: contact info and essential sections
+    has_email = bool(_EMAIL_RE.search(text))
+    has_phone = bool(_PHONE_RE.search(text))
+    present = {section for section, body in sections.items() if section != "header"}
+    completeness_score = _clamp(
+        15 * has_email + 10 * has_phone + 5 * bool(_LINKEDIN_RE.search(text))
+        + 15 * ("summary" in present) + 25 * ("experience" in present)
+        + 15 * ("education" in present) + 15 * ("skills" in present)
+    )
+    
+    # ATS: standard headers, plain layout, enough content to match keywords
+    standard_found = sum(1 for section in _STANDARD_SECTIONS if section in present)
+    glyph_ratio = len(_SPECIAL_GLYPH_RE.findall(text)) / max(1, len(text))
+    ats_score = _clamp(
+        60 * standard_found / len(_STANDARD_SECTIONS)
+        + (20 if word_count >= 250 else 20 * word_count / 250)
+        + (20 if glyph_ratio < 0.002 else 0)
+    )
+    
+    overall_score = _clamp(
+        impact_score * 0.30 + brevity_score * 0.20 + style_score * 0.20
+        + completeness_score * 0.15 + ats_score * 0.15
+    )
+    
+    # Context: experience level and industry
+    years = _estimate_years("\n".join(experience_lines))
+    experience_level = "entry" if years < 2 else "mid" if years <= 7 else "senior"
+    industry_hits = {
+        industry: len(pattern.findall(text)) for industry, pattern in _INDUSTRY_PATTERNS.items()
+    }
+    industry = max(industry_hits, key=industry_hits.get)
+    if not industry_hits[industry]:
+        industry = "other"
+    missing_keywords = [
+        keyword for keyword, pattern in _INDUSTRY_KEYWORDS.get(industry, []) if not pattern.search(text)
+    ][:5]
+    
+    # Section-level feedback
+    experience_issues, experience_fixes = [], []
+    if quantified_ratio < 0.5:
+        experience_issues.append(f"Only {quantified} of {len(bullets)} bullets include measurable results")
+        experience_fixes.append("Add metrics such as %, $, team size or time saved to each bullet")
+    if weak_phrases:
+        experience_issues.append(f"Weak phrasing: '{weak_phrases[0].lower()}'")
+        experience_fixes.append("Start bullets with strong action verbs like Led, Built or Drove")
+    if long_bullets:
+        experience_issues.append(f"{long_bullets} bullets run longer than two lines")
+        experience_fixes.append("Trim bullets to one idea and under ~25 words")
+    
+    feedback_sections = [{
+        "section_name": "Experience",
+        "score": _clamp((impact_score + style_score + brevity_score) / 3) if "experience" in present else 0,
+        "issues": experience_issues if "experience" in present else ["No Experience section detected"],
+        "actionable_fixes": experience_fixes if "experience" in present else ["Add an 'Experience' section with a standard header"],
+    }]
+    for section, label, fix in (
+        ("skills", "Skills", "Add a 'Skills' section listing tools and technologies"),
+        ("education", "Education", "Add an 'Education' section with degree, school and dates"),
+        ("summary", "Summary", "Add a 2-3 line professional summary with your top achievement"),
+    ):
+        found = section in present
+        feedback_sections.append({
+            "section_name": label,
+            "score": 85 if found else 0,
+            "issues": [] if found else [f"No {label} section detected"],
+            "actionable_fixes": [] if found else [fix],
+        })
+    
+    weakest = min(
+        (("impact", impact_score), ("brevity", brevity_score), ("style", style_score),
+         ("completeness", completeness_score), ("ATS formatting", ats_score)),
+        key=lambda item: item[1],
+    )[0]
+    summary_feedback = (
+        f"{quantified} of {len(bullets)} experience bullets are quantified. "
+        f"Biggest opportunity: improve {weakest}."
+    )
+    
+    return {
+        "overall_score": overall_score,
+        "impact_score": impact_score,
+        "brevity_score": brevity_score,
+        "style_score": style_score,
+        "completeness_score": completeness_score,
+        "ats_score": ats_score,
+        "summary_feedback": summary_feedback,
+        "experience_level": experience_level,
+        "industry": industry,
+        "sections": feedback_sections,
+        "missing_keywords": missing_keywords,
+    }
+
+
+def local_vitals_result(text: str) -> dict:
+    """Full Vitals response from local scoring only."""
+    with span("local_score"):
+        scores = local_vitals_scores(text)
+    return {
+        **scores,
+        "parsed_data": {},
+        "extracted_text": text.strip(),
+        "scoring_mode": "local",
+    }
+
+
+def hybrid_vitals_result(local: dict, llm: dict) -> dict:
+    """
+    Deterministic local scores with the LLM's narrative feedback.
+    Falls back to the local result, marked degraded, when the LLM call failed.
+    """
+    if "error" in llm:
+        return {**local, "scoring_mode": "local_fallback", "degraded": True}
+    return {
+        **local,
+        "summary_feedback": llm["summary_feedback"],
+        "experience_level": llm["experience_level"],
+        "industry": llm["industry"],
+        "sections": llm["sections"],
+        "missing_keywords": llm["missing_keywords"],
+        "scoring_mode": "hybrid",
+    }
+
+
+def cacheable_vitals_result(result: dict) -> bool:
+    """
+    Whether a Vitals result may be cached.
+    Errors and degraded hybrid fallbacks are not, so the next request retries Gemini.
+    """
+    return "error" not in result and not result.get("degraded")
+
+
+def insufficient_text_result(text: str) -> dict:
+    """Response when the PDF yields too little text to score."""
+    logger.debug("Text too short: %d chars. Minimum: 200", len(text.strip()) if text else 0)
+    return {
+        "error": "Could not extract sufficient text from PDF",
+        "overall_score": 0,
+        "impact_score": 0,
+        "brevity_score": 0,
+        "style_score": 0,
+        "summary_feedback": "Unable to read resume content. Please ensure the PDF is not image-based or encrypted.",
+        "experience_level": "unknown",
+        "industry": "unknown",
+        "sections": [],
+        "missing_keywords": [],
+        "parsed_data": {},
+        "extracted_text": text.strip() if text else ""
+    }
+
+
+def build_vitals_prompt(text: str) -> str:
+    """Build the Vitals prompt from (truncated) resume text."""
+    # Truncate text if too long (save tokens)
+    truncated_text = text[:VITALS_MAX_CHARS] if len(text) > VITALS_MAX_CHARS else text
+    
+    logger.debug("Resume text length: %d, truncated: %d", len(text), len(truncated_text))
+    
+    return VITALS_PROMPT.format(resume_text=truncated_text)
+
+
+def parse_vitals_response(response_text: str, text: str) -> dict:
+    """Parse Gemini's Vitals response and fill defaults."""
+    logger.debug("Raw Gemini response (first 500 chars): %r", response_text[:500])
+    
+    # Parse JSON, tolerating markdown fences/extra text around the object
+    try:
+        result = extract_json(response_text)
+        logger.debug("JSON parsed successfully. Keys: %s", list(result))
+    except json.JSONDecodeError as json_err:
+        logger.debug(
+            "JSON parse error: %s (line %d, col %d). Content around error: %r",
+            json_err, json_err.lineno, json_err.colno,
+            response_text[max(0, json_err.pos - 50):json_err.pos + 50],
+        )
+        raise
+    
+    # Ensure all required fields exist with defaults
+    return {
+        "overall_score": result.get("overall_score", 50),
+        "impact_score": result.get("impact_score", 50),
+        "brevity_score": result.get("brevity_score", 50),
+        "style_score": result.get("style_score", 50),
+        "summary_feedback": result.get("summary_feedback", "Analysis complete."),
+        "experience_level": result.get("experience_level", "mid"),
+        "industry": result.get("industry", "other"),
+        # Section-level feedback with issues
+        "sections": result.get("sections", []),
+        "missing_keywords": result.get("missing_keywords", []),
+        "parsed_data": {},
+        "extracted_text": text.strip(),
+        "scoring_mode": "llm"
+    }
+
+
+def vitals_error_result(e: Exception, text: str) -> dict:
+    """Response when the Gemini call or parsing fails."""
+    logger.error("Gemini analysis error: %s", e, exc_info=e)
+    return {
+        "error": f"Analysis failed: {str(e)}",
+        "overall_score": 0,
+        "impact_score": 0,
+        "brevity_score": 0,
+        "style_score": 0,
+        "summary_feedback": "Analysis service encountered an error. Please try again.",
+        "experience_level": "unknown",
+        "industry": "unknown",
+        "sections": [],
+        "missing_keywords": [],
+        "parsed_data": {},
+        "extracted_text": text.strip() if text else ""
+    }
+
+
+async def llm_vitals_result_async(text: str) -> dict:
+    """Score resume text with Gemini over the async client."""
+    try:
+        with span("prompt"):
+            prompt = build_vitals_prompt(text)
+        
+        logger.debug("Calling Gemini API (async)")
+        response = await vitals_client.agenerate_content(prompt)
+        logger.debug("Gemini API call complete")
+        
+        with span("parse"):
+            return parse_vitals_response(response.text, text)
+        
+    except AIServiceError:
+        raise
+    except Exception as e:
+        return vitals_error_result(e, text)
+
+
+async def vitals_check_text_async(text: str, mode: str = "llm") -> dict:
     """
-    Main entry point for Vitals Check (Free Tier).
-    Uses Gemini Flash-Lite for fast, accurate scoring.
+    Main entry point for Vitals Check (Free Tier) on already-extracted resume text.
+    Uses Gemini Flash-Lite for fast, accurate scoring, or the local
+    scoring engine when mode is "local"/"hybrid".
     
     Args:
-        pdf_content: Raw PDF file bytes
+        text: Resume text from get_pdf_text
+        mode: "local" (heuristics only), "llm" (Gemini) or "hybrid" (local scores, Gemini feedback)
         
     Returns:
         Dictionary with scores and summary:
@@ -130,102 +529,24 @@ def vitals_check(pdf_content: bytes) -> dict:
         - summary_feedback (string)
         - experience_level (entry/mid/senior)
         - industry (string)
+        
+    Raises:
+        AIServiceError: Gemini unavailable in "llm" mode (hybrid falls back to local scores)
     """
-    # Extract text from PDF
-    text = extract_text_from_pdf(pdf_content)
-    
-    # Debug: Show extracted text
-    print(f"[DEBUG] Extracted text (first 300 chars): {repr(text[:300] if text else 'NONE')}")
+    logger.debug("Extracted text (first 300 chars): %r", text[:300] if text else None)
     
     # Need at least 200 chars for meaningful analysis
     if not text or len(text.strip()) < 200:
-        print(f"[DEBUG] Text too short: {len(text.strip()) if text else 0} chars. Minimum: 200")
-        return {
-            "error": "Could not extract sufficient text from PDF",
-            "overall_score": 0,
-            "impact_score": 0,
-            "brevity_score": 0,
-            "style_score": 0,
-            "summary_feedback": "Unable to read resume content. Please ensure the PDF is not image-based or encrypted.",
-            "experience_level": "unknown",
-            "industry": "unknown",
-            "sections": [],
-            "missing_keywords": [],
-            "parsed_data": {},
-            "extracted_text": text.strip() if text else ""
-        }
+        return insufficient_text_result(text)
     
-    try:
-        # Use lightweight Gemini model for quick scoring
-        model = genai.GenerativeModel(
-            'gemini-2.0-flash-lite',
-            generation_config={"response_mime_type": "application/json"}
-        )
-        
-        # Truncate text if too long (save tokens)
-        max_chars = 8000  # ~2000 tokens
-        truncated_text = text[:max_chars] if len(text) > max_chars else text
-        
-        print(f"[DEBUG] Resume text length: {len(text)}, truncated: {len(truncated_text)}", flush=True)
-        
-        prompt = VITALS_PROMPT.format(resume_text=truncated_text)
-        
-        print("[DEBUG] Calling Gemini API...", flush=True)
-        response = model.generate_content(prompt)
-        print("[DEBUG] Gemini API call complete", flush=True)
-        
-        # Debug: Print raw response
-        print(f"[DEBUG] Raw Gemini response type: {type(response.text)}", flush=True)
-        print(f"[DEBUG] Raw Gemini response (first 500 chars):\n{repr(response.text[:500])}", flush=True)
-        
-        # Clean the response to handle markdown/extra text
-        cleaned_response = clean_json_response(response.text)
-        print(f"[DEBUG] Cleaned response (first 500 chars):\n{repr(cleaned_response[:500])}", flush=True)
-        
-        # Try to parse JSON
+    if mode == "local":
+        return local_vitals_result(text)
+    
+    if mode == "hybrid":
+        # Gemini unavailable: local scores still stand on their own
         try:
-            result = json.loads(cleaned_response)
-            print(f"[DEBUG] JSON parsed successfully. Keys: {list(result.keys())}", flush=True)
-        except json.JSONDecodeError as json_err:
-            print(f"[DEBUG] JSON parse error: {json_err}", flush=True)
-            print(f"[DEBUG] Error position: {json_err.pos}", flush=True)
-            print(f"[DEBUG] Error line: {json_err.lineno}, col: {json_err.colno}", flush=True)
-            print(f"[DEBUG] Problematic content around error: {repr(cleaned_response[max(0,json_err.pos-50):json_err.pos+50])}", flush=True)
-            raise
-        
-        # Ensure all required fields exist with defaults
-        return {
-            "overall_score": result.get("overall_score", 50),
-            "impact_score": result.get("impact_score", 50),
-            "brevity_score": result.get("brevity_score", 50),
-            "style_score": result.get("style_score", 50),
-            "summary_feedback": result.get("summary_feedback", "Analysis complete."),
-            "experience_level": result.get("experience_level", "mid"),
-            "industry": result.get("industry", "other"),
-            # Section-level feedback with issues
-            "sections": result.get("sections", []),
-            "missing_keywords": result.get("missing_keywords", []),
-            "parsed_data": {},
-            "extracted_text": text.strip()
-        }
-        
-    except Exception as e:
-        import traceback
-        print(f"Gemini analysis error: {e}", flush=True)
-        print(f"[DEBUG] Full traceback:\n{traceback.format_exc()}", flush=True)
-        return {
-            "error": f"Analysis failed: {str(e)}",
-            "overall_score": 0,
-            "impact_score": 0,
-            "brevity_score": 0,
-            "style_score": 0,
-            "summary_feedback": "Analysis service encountered an error. Please try again.",
-            "experience_level": "unknown",
-            "industry": "unknown",
-            "sections": [],
-            "missing_keywords": [],
-            "parsed_data": {},
-            "extracted_text": text.strip() if text else ""
-        }
-
-
+            result = await llm_vitals_result_async(text)
+        except AIServiceError as e:
+            result = vitals_error_result(e, text)
+        return hybrid_vitals_result(local_vitals_result(text), result)
+    return await llm_vitals_result_async(text)
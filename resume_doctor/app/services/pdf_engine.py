@@ -0,0 +1,330 @@
+"""
+PDF Extraction Engine
+
+Runs pdfminer parses in a warm process pool so a pathological PDF cannot stall a worker:
+- Hard wall-clock timeout per document (the stuck worker process is killed; workers
+  report their PIDs at start-up, so no executor internals are needed)
+- Pool recycled after a fixed number of jobs to cap pdfminer memory growth
+- Timeouts and crashes surface as PDFExtractionError (PDF_EXTRACTION_FAILED)
+- Optional character/page budget stops parsing once enough text is collected
+
+Deliberately free of settings, Gemini and metrics imports: spawned workers import this
+module. Outcomes are reported to an `observe` callback, which runs in the parent.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from pdfminer.converter import TextConverter
+from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from app.core.errors import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+# Budget for starting the workers (spawn + imports) at start-up
+WARM_TIMEOUT_SECONDS = 30
+
+
+def extract_text_limited(
+    file_content: bytes,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Page-by-page variant of pdfminer's extract_text that stops early.
+    Pages are parsed lazily; parsing ends once max_chars of text has been
+    produced or max_pages pages have been read, whichever comes first.
+    """
+    return _parse_pages(file_content, max_chars, max_pages)[0]
+
+
+def _parse_pages(
+    file_content: bytes,
+    max_chars: Optional[int],
+    max_pages: Optional[int]
+) -> Tuple[str, int]:
+    """extract_text_limited, also returning the number of pages parsed."""
+    output = io.StringIO()
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = TextConverter(rsrcmgr, output, laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+    pages = 0
+    try:
+        for page in PDFPage.get_pages(io.BytesIO(file_content), maxpages=max_pages or 0):
+            interpreter.process_page(page)
+            pages += 1
+            if max_chars and output.tell() >= max_chars:
+                break
+    finally:
+        device.close()
+
+    return output.getvalue(), pages
+
+
+def extract_text_from_pdf(
+    file_content: bytes,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extract text from a PDF file using pdfminer.six.
+    Handles multi-column resume layouts better than pypdf.
+
+    Args:
+        file_content: Raw PDF bytes
+        max_chars: Stop after the page that reaches this many characters
+        max_pages: Parse at most this many pages
+
+    Returns:
+        Extracted text string (may extend past max_chars up to a page boundary)
+    """
+    try:
+        if max_chars or max_pages:
+            text = extract_text_limited(file_content, max_chars, max_pages)
+        else:
+            text = extract_text(io.BytesIO(file_content))
+        return text.strip()
+    except Exception as e:
+        logger.warning("Error extracting text from PDF: %s", e)
+        return ""
+
+
+def extract_text_and_pages(
+    file_content: bytes,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> Tuple[str, int]:
+    """
+    Worker-pool variant of extract_text_from_pdf that also reports pages parsed.
+    Always parses page by page (same output as pdfminer's extract_text without limits).
+    """
+    try:
+        text, pages = _parse_pages(file_content, max_chars, max_pages)
+        return text.strip(), pages
+    except Exception as e:
+        logger.warning("Error extracting text from PDF: %s", e)
+        return "", 0
+
+
+def _noop() -> None:
+    """Used to start worker processes ahead of traffic."""
+
+
+def _report_pid(pids) -> None:
+    """Pool initializer: tell the parent this worker's PID."""
+    pids.put(os.getpid())
+
+
+class _WorkerPool:
+    """Spawned process pool that can kill its own workers."""
+
+    def __init__(self, max_workers: int):
+        # spawn avoids forking a process that already holds gRPC threads
+        context = multiprocessing.get_context("spawn")
+        self._pid_queue = context.SimpleQueue()
+        self._pids: Set[int] = set()
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=context,
+            initializer=_report_pid,
+            initargs=(self._pid_queue,),
+        )
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        return self.executor.submit(func, *args)
+
+    def worker_pids(self) -> Set[int]:
+        """PIDs of every worker started so far (each reports before taking a job)."""
+        while not self._pid_queue.empty():
+            self._pids.add(self._pid_queue.get())
+        return self._pids
+
+    def kill(self) -> None:
+        """Terminate all workers (one is stuck on a document) and fail pending jobs."""
+        for pid in self.worker_pids():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self.shutdown()
+
+    def shutdown(self, cancel_futures: bool = True) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+
+class PDFExtractionError(Exception):
+    """PDF could not be parsed in time (or the worker died)."""
+
+    code = ErrorCode.PDF_EXTRACTION_FAILED
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class PDFExtractionEngine:
+    """
+    Usage:
+        engine = PDFExtractionEngine(max_workers=2, timeout_seconds=15, max_jobs_per_worker=200)
+        text = await engine.extract(pdf_bytes)
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        timeout_seconds: float,
+        max_jobs_per_worker: int,
+        observe: Optional[Callable[[str, float, int], None]] = None,
+    ):
+        """
+        Args:
+            max_workers: Worker processes in the pool
+            timeout_seconds: Wall-clock budget per document
+            max_jobs_per_worker: Jobs per worker before the pool is replaced
+            observe: Called with (outcome, seconds, pages) after every extraction
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout_seconds = timeout_seconds
+        self.observe = observe
+        self.max_jobs_per_pool = self.max_workers * max(1, max_jobs_per_worker)
+
+        # Admit one job per worker so the timeout measures parse time, not queue time
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[_WorkerPool] = None
+        self._pool_jobs = 0
+
+        # Counters (guarded by _lock)
+        self._in_flight = 0
+        self._peak_queue_depth = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._recycles = 0
+
+    def _acquire_pool(self) -> _WorkerPool:
+        """Current pool, replacing it once it has served its job quota."""
+        with self._lock:
+            if self._pool is not None and self._pool_jobs >= self.max_jobs_per_pool:
+                # Running jobs finish on the retired pool; its workers then exit
+                self._pool.shutdown(cancel_futures=False)
+                self._pool = None
+                self._recycles += 1
+            if self._pool is None:
+                self._pool = _WorkerPool(self.max_workers)
+                self._pool_jobs = 0
+            self._pool_jobs += 1
+            return self._pool
+
+    def _kill_pool(self, pool: _WorkerPool) -> None:
+        """Terminate a pool whose worker is stuck on a document."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._recycles += 1
+        pool.kill()
+
+    async def _run_once(self, pdf_content: bytes, *limits: Optional[int]) -> Tuple[str, int]:
+        async with self._slots:
+            pool = self._acquire_pool()
+            future = asyncio.wrap_future(pool.submit(extract_text_and_pages, pdf_content, *limits))
+            try:
+                return await asyncio.wait_for(future, self.timeout_seconds)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                self._kill_pool(pool)
+                raise PDFExtractionError("timeout")
+
+    async def extract(
+        self,
+        pdf_content: bytes,
+        max_chars: Optional[int] = None,
+        max_pages: Optional[int] = None
+    ) -> str:
+        """
+        Extract text within the per-document timeout.
+        max_chars/max_pages are passed through to extract_text_from_pdf.
+
+        Raises:
+            PDFExtractionError: On timeout or worker crash
+        """
+        with self._lock:
+            self._in_flight += 1
+            self._peak_queue_depth = max(self._peak_queue_depth, self._in_flight - self.max_workers)
+        start = time.perf_counter()
+
+        try:
+            try:
+                text, pages = await self._run_once(pdf_content, max_chars, max_pages)
+            except BrokenProcessPool:
+                # Collateral of another document's timeout kill: retry once on a fresh pool
+                try:
+                    text, pages = await self._run_once(pdf_content, max_chars, max_pages)
+                except BrokenProcessPool:
+                    raise PDFExtractionError("worker_crashed")
+        except BaseException as e:
+            with self._lock:
+                self._failed += 1
+            outcome = e.reason if isinstance(e, PDFExtractionError) else type(e).__name__
+            self._observe(outcome, start, 0)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            self._completed += 1
+        self._observe("ok" if text else "empty", start, pages)
+        return text
+
+    def _observe(self, outcome: str, start: float, pages: int) -> None:
+        if self.observe is not None:
+            self.observe(outcome, time.perf_counter() - start, pages)
+
+    async def warm(self) -> None:
+        """
+        Start every worker process now instead of on the first upload.
+        Best effort: on failure the pool is dropped and rebuilt on the first upload.
+        """
+        pool = self._acquire_pool()
+        try:
+            futures = [asyncio.wrap_future(pool.submit(_noop)) for _ in range(self.max_workers)]
+            await asyncio.wait_for(asyncio.gather(*futures), WARM_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning("PDF worker warm-up failed, starting on demand: %s", e, exc_info=e)
+            self._kill_pool(pool)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "timeout_seconds": self.timeout_seconds,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "peak_queue_depth": self._peak_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timeouts": self._timeouts,
+                "recycles": self._recycles,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
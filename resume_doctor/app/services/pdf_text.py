@@ -0,0 +1,83 @@
+"""
+PDF Text Service
+
+Single entry point for extracted resume text. Every text consumer goes through here so
+pdfminer (the dominant local CPU cost) runs at most once per distinct PDF:
+- Memory LRU bounded by a byte budget
+- Optional SQLite spill file shared by workers on the host
+- Misses are parsed by the PDF extraction engine (process pool with timeouts)
+"""
+
+import sys
+from typing import Optional
+
+from app.core.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+from app.core.config import settings
+from app.core.metrics import observe_pdf_extraction
+from app.services.pdf_engine import PDFExtractionEngine
+
+
+def _build_cache() -> TieredCache:
+    disk = None
+    if settings.PDF_TEXT_CACHE_PATH:
+        disk = SQLiteCache(
+            settings.PDF_TEXT_CACHE_PATH,
+            ttl_seconds=settings.PDF_TEXT_CACHE_TTL_SECONDS,
+            max_bytes=settings.PDF_TEXT_CACHE_MAX_DISK_MB * 1024 * 1024,
+            encode=lambda text: text.encode("utf-8"),
+            decode=lambda data: data.decode("utf-8"),
+            busy_timeout=settings.SQLITE_BUSY_TIMEOUT_SECONDS,
+        )
+    memory = LRUCache(
+        max_entries=settings.PDF_TEXT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.PDF_TEXT_CACHE_TTL_SECONDS,
+        max_bytes=settings.PDF_TEXT_CACHE_MAX_MB * 1024 * 1024,
+        sizeof=sys.getsizeof,
+    )
+    return TieredCache("pdf_text", memory, disk)
+
+
+pdf_text_cache = _build_cache()
+
+extraction_engine = PDFExtractionEngine(
+    max_workers=settings.PDF_PROCESS_POOL_SIZE,
+    timeout_seconds=settings.PDF_EXTRACTION_TIMEOUT_SECONDS,
+    max_jobs_per_worker=settings.PDF_WORKER_MAX_JOBS,
+    observe=observe_pdf_extraction,
+)
+
+
+def pdf_text_key(
+    pdf_content: bytes,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """Cache key for extracted text (limited extractions are cached separately)"""
+    return make_cache_key("pdf_text", pdf_content, max_chars, max_pages)
+
+
+async def get_pdf_text(
+    pdf_content: bytes,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extracted text for a PDF, parsing in the process pool only on a cache miss.
+    Empty results are not cached so a failed parse is retried next time.
+    
+    Args:
+        pdf_content: Raw PDF bytes
+        max_chars: Stop parsing once this much text is collected
+        max_pages: Parse at most this many pages
+    
+    Raises:
+        PDFExtractionError: Parse timed out or the worker crashed
+    """
+    key = pdf_text_key(pdf_content, max_chars, max_pages)
+    text = await pdf_text_cache.get(key)
+    if text is None:
+        text = await extraction_engine.extract(pdf_content, max_chars, max_pages)
+        if text:
+            await pdf_text_cache.set(key, text)
+    return text
+
@@ -0,0 +1,93 @@
+"""
+Analysis Result Cache
+
+Caches Vitals and Deep Scan results so re-uploading the same PDF
+(retry after timeout, reopened tab, score comparison) skips Gemini.
+
+Keys are SHA-256 over: PDF bytes + normalized job description + prompt/result format version + model.
+"""
+
+import re
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.core.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+from app.core.config import settings
+from app.core.timing import span
+from app.services.gemini_client import gemini_client
+from app.services.gemini_service import DEEP_SCAN_PROMPT_VERSION, DEEP_SCAN_RESULT_FORMAT
+from app.services.nlp_service import LOCAL_SCORER_VERSION, VITALS_PROMPT_VERSION, vitals_client
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _build_cache() -> TieredCache:
+    disk = None
+    if settings.RESULT_CACHE_PATH:
+        disk = SQLiteCache(
+            settings.RESULT_CACHE_PATH,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            max_bytes=settings.RESULT_CACHE_MAX_DISK_MB * 1024 * 1024,
+            busy_timeout=settings.SQLITE_BUSY_TIMEOUT_SECONDS,
+        )
+    memory = LRUCache(
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    )
+    return TieredCache("analysis", memory, disk)
+
+
+# Shared by Vitals and Deep Scan (keys are namespaced by endpoint)
+analysis_cache = _build_cache()
+
+
+def normalize_job_description(job_description: Optional[str]) -> str:
+    """Collapse whitespace and apply the same 3000-char cut the prompt uses."""
+    if not job_description:
+        return ""
+    return _WHITESPACE.sub(" ", job_description[:3000]).strip()
+
+
+def vitals_cache_key(pdf_content: bytes, mode: str = "llm") -> str:
+    """Cache key for a Vitals result in the given scoring mode"""
+    return make_cache_key(
+        "vitals",
+        pdf_content,
+        mode,
+        VITALS_PROMPT_VERSION,
+        LOCAL_SCORER_VERSION,
+        vitals_client.model_name,
+    )
+
+
+def deep_scan_cache_key(pdf_content: bytes, job_description: Optional[str]) -> str:
+    """Cache key for a Deep Scan result"""
+    return make_cache_key(
+        "deep_scan",
+        pdf_content,
+        normalize_job_description(job_description),
+        DEEP_SCAN_PROMPT_VERSION,
+        DEEP_SCAN_RESULT_FORMAT,
+        gemini_client.model_name,
+    )
+
+
+async def get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    cacheable: Callable[[Any], bool],
+) -> Tuple[Any, bool]:
+    """
+    Return (result, cache_hit).
+    Computed results are stored only when cacheable(result) is true,
+    so error responses are never served from cache.
+    """
+    with span("cache"):
+        result = await analysis_cache.get(key)
+    if result is not None:
+        return result, True
+
+    result = await compute()
+    if cacheable(result):
+        with span("cache"):
+            await analysis_cache.set(key, result)
+    return result, False
@@ -5,9 +5,14 @@ Extracts structured resume data from PDFs, LinkedIn text, or free-form text usin
 Output strictly follows RESUME_DATA_FORMAT.md for seamless integration with InfiniteResume Builder.
 """
 
+import logging
 from typing import Optional, Dict, Any
+from app.core.resilience import AIServiceError
+from app.core.timing import span
 from app.services.gemini_client import gemini_client
 
+logger = logging.getLogger(__name__)
+
 # Maximum text length (~5 pages)
 MAX_TEXT_LENGTH = 25000
 
@@ -178,7 +183,38 @@ def validate_extracted_data(data: Dict[str, Any]) -> Dict[str, Any]:
     return data
 
 
-def extract_from_pdf(pdf_content: bytes) -> Dict[str, Any]:
+def processing_failed(message: str) -> Dict[str, Any]:
+    """Standard PROCESSING_FAILED error response."""
+    return {
+        "success": False,
+        "error": {
+            "code": "PROCESSING_FAILED",
+            "message": message
+        }
+    }
+
+
+def build_pdf_prompt() -> str:
+    """Extraction prompt for an attached PDF."""
+    return EXTRACTION_PROMPT.format(
+        input_type="PDF Resume Document",
+        content="{PDF_CONTENT_ATTACHED}"
+    )
+
+
+def build_text_prompt(text: str, input_type: str) -> str:
+    """Extraction prompt for text content (truncated to MAX_TEXT_LENGTH)."""
+    # Truncate if too long
+    if len(text) > MAX_TEXT_LENGTH:
+        text = text[:MAX_TEXT_LENGTH]
+    
+    return EXTRACTION_PROMPT.format(
+        input_type=input_type,
+        content=text
+    )
+
+
+async def extract_from_pdf_async(pdf_content: bytes) -> Dict[str, Any]:
     """
     Extract resume data from PDF using Gemini's multimodal capability.
     
@@ -188,27 +224,22 @@ def extract_from_pdf(pdf_content: bytes) -> Dict[str, Any]:
     Returns:
         Structured resume data or error response
     """
-    prompt = EXTRACTION_PROMPT.format(
-        input_type="PDF Resume Document",
-        content="{PDF_CONTENT_ATTACHED}"
-    )
+    with span("prompt"):
+        prompt = build_pdf_prompt()
 
     try:
-        result = gemini_client.generate_json_with_pdf(pdf_content, prompt)
-        return validate_extracted_data(result)
+        result = await gemini_client.agenerate_json_with_pdf(pdf_content, prompt)
+        with span("validate"):
+            return validate_extracted_data(result)
         
+    except AIServiceError:
+        raise
     except Exception as e:
-        print(f"Gemini API error: {e}")
-        return {
-            "success": False,
-            "error": {
-                "code": "PROCESSING_FAILED",
-                "message": "Something went wrong while processing your resume. Please try again."
-            }
-        }
+        logger.exception("Gemini API error: %s", e)
+        return processing_failed("Something went wrong while processing your resume. Please try again.")
 
 
-def extract_from_text(text: str, input_type: str = "Resume Text") -> Dict[str, Any]:
+async def extract_from_text_async(text: str, input_type: str = "Resume Text") -> Dict[str, Any]:
     """
     Extract resume data from text content (LinkedIn paste or AI text).
     
@@ -219,31 +250,40 @@ def extract_from_text(text: str, input_type: str = "Resume Text") -> Dict[str, A
     Returns:
         Structured resume data or error response
     """
-    # Truncate if too long
-    if len(text) > MAX_TEXT_LENGTH:
-        text = text[:MAX_TEXT_LENGTH]
-    
-    prompt = EXTRACTION_PROMPT.format(
-        input_type=input_type,
-        content=text
-    )
+    with span("prompt"):
+        prompt = build_text_prompt(text, input_type)
 
     try:
-        result = gemini_client.generate_json(prompt)
-        return validate_extracted_data(result)
+        result = await gemini_client.agenerate_json(prompt)
+        with span("validate"):
+            return validate_extracted_data(result)
         
+    except AIServiceError:
+        raise
     except Exception as e:
-        print(f"Gemini API error: {e}")
-        return {
-            "success": False,
-            "error": {
-                "code": "PROCESSING_FAILED",
-                "message": "Something went wrong. Please try again in a moment."
-            }
+        logger.exception("Gemini API error: %s", e)
+        return processing_failed("Something went wrong. Please try again in a moment.")
+
+
+# Human-readable input labels per import type
+INPUT_TYPE_LABELS = {
+    "linkedin": "LinkedIn Profile Data (About section and Experience)",
+    "text": "Career Description / Resume Text",
+}
+
+
+def invalid_request() -> Dict[str, Any]:
+    """Error response when neither PDF nor text content was supplied."""
+    return {
+        "success": False,
+        "error": {
+            "code": "INVALID_REQUEST",
+            "message": "Please provide a PDF file or text content to import."
         }
+    }
 
 
-def extract_resume(
+async def extract_resume_async(
     pdf_content: Optional[bytes] = None,
     text_content: Optional[str] = None,
     import_type: str = "pdf"
@@ -260,16 +300,8 @@ def extract_resume(
         Dict with success/error and structured resume data
     """
     if import_type == "pdf" and pdf_content:
-        return extract_from_pdf(pdf_content)
-    elif import_type == "linkedin" and text_content:
-        return extract_from_text(text_content, "LinkedIn Profile Data (About section and Experience)")
-    elif import_type == "text" and text_content:
-        return extract_from_text(text_content, "Career Description / Resume Text")
+        return await extract_from_pdf_async(pdf_content)
+    elif import_type in INPUT_TYPE_LABELS and text_content:
+        return await extract_from_text_async(text_content, INPUT_TYPE_LABELS[import_type])
     else:
-        return {
-            "success": False,
-            "error": {
-                "code": "INVALID_REQUEST",
-                "message": "Please provide a PDF file or text content to import."
-            }
-        }
+        return invalid_request()
@@ -0,0 +1,84 @@
+"""
+Microbenchmark: tolerant JSON extraction from Gemini responses
+
+Compares app.core.json_stream.extract_json (one pass, C decoder) with the
+previous clean_json_response + json.loads pipeline on a deep-scan sized response.
+
+Run from resume_doctor/:
+    python -m benchmarks.json_extract
+"""
+
+import json
+import re
+import timeit
+
+from app.core.json_stream import JSONFieldStream, extract_json
+
+SECTION = {
+    "section_name": "Experience",
+    "score": 68,
+    "issues": ["Bullet 2 lacks quantifiable impact", "Uses passive voice", "3 of 5 bullets missing metrics"],
+    "actionable_fixes": [
+        "Change: 'Led development of payment feature' -> 'Led development processing $2M monthly'",
+        "Replace 'Responsible for' with 'Owned' or 'Drove'",
+    ],
+}
+
+PAYLOAD = {
+    "overall_score": 72,
+    "summary_feedback": "Strong technical expertise but lacks quantifiable impact. " * 4,
+    "impact_score": 65,
+    "brevity_score": 78,
+    "style_score": 80,
+    "sections": [SECTION] * 8,
+    "missing_keywords": ["Python", "AWS", "CI/CD", "Agile"] * 3,
+    "parsed_data": {
+        "full_name": "John Doe",
+        "skills": ["JavaScript", "React", "Node.js"] * 10,
+        "experience": [{"role": "Engineer", "company": "Tech Corp", "description": "Full-stack " * 20}] * 6,
+    },
+    "recommendations": {"high_priority": ["Add metrics"] * 5, "low_priority": ["Add LinkedIn"] * 5},
+}
+
+RESPONSE = "```json\n" + json.dumps(PAYLOAD, indent=2) + "\n```\n"
+
+
+def legacy_parse(response_text: str):
+    """The removed clean_json_response (debug prints dropped) followed by json.loads."""
+    text = response_text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    text = text.strip()
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if json_match:
+        text = json_match.group(0)
+    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    return json.loads(text)
+
+
+def streamed_parse(response_text: str, chunk_size: int = 256):
+    stream = JSONFieldStream(item_keys={"sections"})
+    for i in range(0, len(response_text), chunk_size):
+        stream.feed(response_text[i:i + chunk_size])
+    return stream.result()
+
+
+def main(number: int = 2000) -> None:
+    assert legacy_parse(RESPONSE) == extract_json(RESPONSE) == streamed_parse(RESPONSE) == PAYLOAD
+
+    print(f"Response size: {len(RESPONSE):,} chars, {number} iterations")
+    for name, fn in [
+        ("legacy clean_json_response + json.loads", legacy_parse),
+        ("extract_json", extract_json),
+        ("JSONFieldStream (256-char chunks)", streamed_parse),
+    ]:
+        seconds = timeit.timeit(lambda: fn(RESPONSE), number=number)
+        print(f"{name:<42} {seconds / number * 1e6:8.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: serializing a /deep-scan response body
+
+Compares the previous pipeline (analysis json.dumps'ed to a string, wrapped in the
+response dict, run through jsonable_encoder and JSONResponse as FastAPI does for a
+returned dict) with the native dict result:
+- returned as a dict: FastAPI's jsonable_encoder walk + FastJSONResponse
+- returned as FastJSONResponse (what the analysis endpoints do): encoder only
+
+Run from resume_doctor/:
+    python -m benchmarks.json_response
+"""
+
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core import responses
+from app.core.responses import FastJSONResponse
+from app.services.gemini_service import format_deep_scan_result
+from benchmarks.json_extract import PAYLOAD
+
+
+def response_body(result) -> dict:
+    return {
+        "type": "deep_scan",
+        "result": result,
+        "cached": False,
+        "tier_required": "infinite-pro",
+        "user_tier": "infinite-pro",
+        "user_id": "user_42",
+    }
+
+
+def legacy_encode() -> bytes:
+    """format_deep_scan_result used to return json.dumps(...); FastAPI then encoded the string again."""
+    result = json.dumps(format_deep_scan_result(PAYLOAD))
+    return JSONResponse(jsonable_encoder(response_body(result))).body
+
+
+def default_encode() -> bytes:
+    return FastJSONResponse(jsonable_encoder(response_body(format_deep_scan_result(PAYLOAD)))).body
+
+
+def fast_encode() -> bytes:
+    return FastJSONResponse(response_body(format_deep_scan_result(PAYLOAD))).body
+
+
+def main(number: int = 2000) -> None:
+    legacy, fast = legacy_encode(), fast_encode()
+    assert json.loads(json.loads(legacy)["result"]) == json.loads(fast)["result"]
+    assert default_encode() == fast
+
+    encoder = "orjson" if responses.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"Body size: legacy {len(legacy):,} bytes, native {len(fast):,} bytes; FastJSONResponse uses {encoder}")
+
+    body = jsonable_encoder(response_body(format_deep_scan_result(PAYLOAD)))
+    for name, fn in [
+        ("legacy string result + JSONResponse", legacy_encode),
+        ("dict result, jsonable_encoder + FastJSON", default_encode),
+        ("dict result, FastJSONResponse returned", fast_encode),
+        ("  render only: JSONResponse", lambda: JSONResponse(body)),
+        ("  render only: FastJSONResponse", lambda: FastJSONResponse(body)),
+    ]:
+        seconds = timeit.timeit(fn, number=number)
+        print(f"{name:<42} {seconds / number * 1e6:8.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Microbenchmark: request middleware overhead
+
+Compares app.core.middleware.RequestMiddleware (pure ASGI) with the previous pair of
+@app.middleware("http") functions (BaseHTTPMiddleware) around the same CORS-wrapped
+app, for a small JSON response and a 64-chunk streamed response. Requests are driven
+straight through the ASGI interface, so the numbers are middleware + routing cost only.
+
+Run from resume_doctor/:
+    python -m benchmarks.middleware
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.middleware import RequestMiddleware, check_origin
+from app.core.rate_limits import get_tier_from_request
+
+REQUESTS = 3000
+CHUNKS = 64
+
+logger = logging.getLogger("benchmarks.middleware")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins_list,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "OPTIONS"],
+        allow_headers=["*"],
+    )
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def body():
+            for _ in range(CHUNKS):
+                yield b"event: field\ndata: {}\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    return app
+
+
+def legacy_app() -> FastAPI:
+    """The removed validate_origin + log_requests middleware functions."""
+    app = build_app()
+
+    @app.middleware("http")
+    async def validate_origin(request: Request, call_next):
+        blocked = check_origin(request)
+        if blocked is not None:
+            return blocked
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        token_account = getattr(request.state, "token_account", None)
+        if token_account is not None:
+            response.headers.update(token_account.headers())
+        if not request.url.path.startswith("/health"):
+            logger.info(json.dumps({
+                "timestamp": datetime.utcnow().isoformat(),
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration": f"{process_time:.3f}s",
+                "client_ip": request.client.host if request.client else "unknown",
+                "tier": get_tier_from_request(request),
+                "user_id": request.headers.get("X-User-Id", "guest"),
+                "tokens": token_account.charged if token_account is not None else 0,
+            }))
+        return response
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = build_app()
+    app.add_middleware(RequestMiddleware)
+    return app
+
+
+async def call(app, path: str) -> int:
+    """One GET through the ASGI interface; returns body bytes received."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost:3000"), (b"x-user-id", b"u1")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+        "state": {},
+    }
+    received = 0
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # Like a server: the request body once, then block until the response is done
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return received
+
+
+async def measure(app, path: str) -> float:
+    for _ in range(100):  # warm up routing and middleware stack build
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await call(app, path)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main() -> None:
+    logging.getLogger("app.core.middleware").setLevel(logging.WARNING)
+    logger.setLevel(logging.WARNING)
+
+    apps = {"BaseHTTPMiddleware x2": legacy_app(), "RequestMiddleware (ASGI)": asgi_app()}
+    for path, label in [("/api/v1/ping", "JSON response"), ("/api/v1/stream", f"{CHUNKS}-chunk stream")]:
+        print(f"{label}:")
+        for name, app in apps.items():
+            print(f"  {name:26s} {await measure(app, path):7.1f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""
+Cache tests
+
+Keys, the memory LRU (TTL, entry and byte bounds), the SQLite tier's size-bound
+eviction, and which Vitals results may be cached.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+from app.services.nlp_service import cacheable_vitals_result, hybrid_vitals_result
+
+
+class FakeClock:
+    """Stands in for the time module inside app.core.cache."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+def test_cache_key_is_stable_and_order_sensitive():
+    assert make_cache_key("vitals", b"%PDF", "llm") == make_cache_key("vitals", b"%PDF", "llm")
+    assert make_cache_key("vitals", b"%PDF", "llm") != make_cache_key("vitals", b"%PDF", "local")
+    assert make_cache_key("a", "b") != make_cache_key("b", "a")
+
+
+def test_cache_key_parts_are_length_prefixed():
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("abc") != make_cache_key("ab", "c")
+
+
+def test_lru_expires_entries(clock):
+    lru = LRUCache(max_entries=10, ttl_seconds=60)
+    lru.set("k", "v")
+    clock.advance(59)
+    assert lru.get("k") == "v"
+    clock.advance(2)
+    assert lru.get("k") is None
+    assert lru.stats()["entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")  # b is now the least recently used
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.evictions == 1
+
+
+def test_lru_byte_budget():
+    lru = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    lru.set("a", "xxxx")
+    lru.set("b", "xxxx")
+    lru.set("c", "xxxx")  # 12 bytes: a goes
+    assert lru.get("a") is None
+    assert lru.stats()["bytes"] == 8
+    lru.set("huge", "x" * 11)  # Larger than the whole budget: not cached, nothing evicted
+    assert lru.get("huge") is None
+    assert lru.get("b") == "xxxx"
+
+
+def test_sqlite_evicts_least_recently_used_to_fit(tmp_path, clock):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), ttl_seconds=3600, max_bytes=30, touch_interval=0)
+    for key in ("a", "b", "c"):
+        disk.set(key, "x" * 8)  # 10 bytes as JSON
+        clock.advance(1)
+    assert disk.get("a") == "x" * 8  # Touch a: b is now the oldest
+    clock.advance(1)
+    disk.set("d", "x" * 8)
+
+    assert disk.get("b") is None
+    assert [disk.get(key) is not None for key in ("a", "c", "d")] == [True, True, True]
+    assert disk.stats() == {"entries": 3, "bytes": 30, "evictions": 1}
+
+
+def test_sqlite_drops_expired_and_oversized_values(tmp_path, clock):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_bytes=100)
+    disk.set("old", 1)
+    clock.advance(61)
+    assert disk.get("old") is None
+    disk.set("big", "x" * 200)
+    assert disk.get("big") is None
+    disk.set("new", 2)
+    assert disk.stats()["entries"] == 1  # The expired row went with the next stored value
+
+
+def test_sqlite_reads_do_not_write_within_touch_interval(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    disk = SQLiteCache(path, ttl_seconds=3600, max_bytes=1000, busy_timeout=0.05, touch_interval=300)
+    disk.set("k", "v")
+
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN IMMEDIATE")
+    try:
+        clock.advance(10)
+        assert disk.get("k") == "v"  # Read-only: works while another process holds the write lock
+        clock.advance(300)
+        with pytest.raises(sqlite3.OperationalError):
+            disk.get("k")  # Due for an access-time update, which needs the lock
+    finally:
+        locker.execute("ROLLBACK")
+    assert disk.get("k") == "v"
+
+
+def test_tiered_cache_treats_a_locked_disk_as_a_miss(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TieredCache("test", LRUCache(10), SQLiteCache(path, 3600, 1000, busy_timeout=0.05))
+
+    async def scenario():
+        locker = sqlite3.connect(path, isolation_level=None)
+        locker.execute("BEGIN IMMEDIATE")
+        try:
+            await cache.set("k", "v")  # Disk write fails; memory tier still has it
+            assert await cache.get("k") == "v"
+            cache.memory.clear()
+            assert await cache.get("k") is None
+        finally:
+            locker.execute("ROLLBACK")
+
+    asyncio.run(scenario())
+    assert cache.disk_errors == 1
+    assert cache.misses == 1
+
+
+def test_only_complete_vitals_results_are_cacheable():
+    local = {"overall_score": 80, "scoring_mode": "local"}
+    assert cacheable_vitals_result(local)
+    assert not cacheable_vitals_result({"error": "Could not extract sufficient text from PDF"})
+
+    fallback = hybrid_vitals_result(local, {"error": "AI unavailable"})
+    assert fallback["degraded"] and fallback["scoring_mode"] == "local_fallback"
+    assert not cacheable_vitals_result(fallback)
@@ -0,0 +1,123 @@
+"""
+AdaptiveLimiter tests
+
+AIMD limit changes, weighted-fair release order across priority classes,
+eviction of lower-priority waiters from a full queue, and queue timeouts.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.concurrency import AdaptiveLimiter, priority
+from app.core.resilience import ServiceOverloaded
+
+
+class Throttled(Exception):
+    pass
+
+
+def limiter(**overrides):
+    options = dict(
+        initial=1, min_limit=1, max_limit=1, max_queue=20, queue_timeout=5,
+        weights={"pro": 3, "free": 1},
+    )
+    options.update(overrides)
+    return AdaptiveLimiter(**options)
+
+
+def start_waiters(lim, names, order):
+    async def waiter(name):
+        await lim.acquire()
+        order.append(name)
+        lim.release()
+
+    tasks = []
+    for name in names:
+        with priority(name):
+            tasks.append(asyncio.ensure_future(waiter(name)))
+    return tasks
+
+
+def test_throttle_halves_the_limit():
+    lim = limiter(initial=8, max_limit=16, is_throttle=lambda e: isinstance(e, Throttled))
+
+    async def throttled_call():
+        async with lim.slot():
+            raise Throttled()
+
+    for expected in (4, 2, 1, 1):  # Never below min_limit
+        with pytest.raises(Throttled):
+            asyncio.run(throttled_call())
+        assert lim.limit == expected
+    assert lim.throttled == 4
+
+
+def test_slow_calls_shrink_and_saturated_calls_grow_the_limit():
+    lim = limiter(initial=4, max_limit=16, backoff=0.5)
+    for _ in range(4):
+        asyncio.run(lim.acquire())
+    lim.release(latency=1.0)  # Sets the baseline; saturated, so +1/4
+    assert lim._limit == pytest.approx(4.25)
+    lim.release(latency=10.0)  # Far above the baseline: congestion
+    assert lim._limit == pytest.approx(2.125)
+    assert lim.congested == 1
+
+
+def test_weighted_fair_release_order():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire()
+        order = []
+        tasks = start_waiters(lim, ["free"] * 4 + ["pro"] * 4, order)
+        await asyncio.sleep(0)
+        lim.release()
+        await asyncio.gather(*tasks)
+        return lim, order
+
+    lim, order = asyncio.run(scenario())
+    # Stride scheduling: pro advances 1/3 per grant, free 1; ties go to the class queued first
+    assert order == ["free", "pro", "pro", "pro", "free", "pro", "free", "free"]
+    assert lim.stats()["granted_from_queue"] == {"free": 4, "pro": 4}
+
+
+def test_full_queue_evicts_the_newest_lower_priority_waiter():
+    async def scenario():
+        lim = limiter(max_queue=2)
+        await lim.acquire()
+        order = []
+        free = start_waiters(lim, ["free", "free"], order)
+        await asyncio.sleep(0)
+        pro = start_waiters(lim, ["pro"], order)
+        await asyncio.wait([free[1]], timeout=1)
+        assert isinstance(free[1].exception(), ServiceOverloaded)
+
+        # A full queue with nothing lower to evict rejects the newcomer
+        with priority("free"):
+            with pytest.raises(ServiceOverloaded):
+                await lim.acquire()
+
+        lim.release()
+        await asyncio.gather(free[0], *pro)
+        return lim, order
+
+    lim, order = asyncio.run(scenario())
+    assert sorted(order) == ["free", "pro"]
+    assert lim.evicted == 1
+    assert lim.rejected == 2
+
+
+def test_queue_timeout_raises_overloaded():
+    async def scenario():
+        lim = limiter(queue_timeout=0.01)
+        await lim.acquire()
+        with pytest.raises(ServiceOverloaded):
+            await lim.acquire()
+        return lim
+
+    lim = asyncio.run(scenario())
+    assert lim.rejected == 1
+    assert lim.stats()["queue_depth"] == 0
@@ -0,0 +1,71 @@
+"""
+Hedger tests
+
+The latency window's percentile lookup and the token bucket that caps hedges at
+a fraction of calls.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+from app.core.hedging import Hedger, LatencyTracker
+
+
+def test_latency_window_percentiles():
+    tracker = LatencyTracker(window=4)
+    assert tracker.percentile(95) is None
+    for seconds in (5.0, 1.0, 2.0, 3.0, 4.0):  # 5.0 falls out of the window
+        tracker.record(seconds)
+    assert len(tracker) == 4
+    assert tracker.percentile(0) == 1.0
+    assert tracker.percentile(50) == 3.0
+    assert tracker.percentile(100) == 4.0
+
+
+def test_no_hedging_before_min_samples():
+    hedger = Hedger("test", percentile=50, max_hedge_rate=1.0, min_samples=3, min_delay=0)
+    hedger.latency.record(0.1)
+    assert hedger.hedge_delay() is None
+    hedger.latency.record(0.1)
+    hedger.latency.record(0.1)
+    assert hedger.hedge_delay() == 0.1
+
+
+def test_hedges_are_capped_at_the_rate():
+    hedger = Hedger("test", percentile=50, max_hedge_rate=0.5, min_samples=1, min_delay=0.001)
+    for _ in range(100):  # Keeps the hedge delay far below the slow calls below
+        hedger.latency.record(0.001)
+    calls = 0
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def scenario():
+        return [await hedger.run(slow) for _ in range(6)]
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    stats = hedger.stats()
+    # Half a token per call: every second slow call may hedge
+    assert (stats["calls"], stats["hedged"], stats["capped"]) == (6, 3, 3)
+    assert calls == 9
+
+
+def test_hedge_wins_when_the_primary_stalls():
+    hedger = Hedger("test", percentile=50, max_hedge_rate=1.0, min_samples=1, min_delay=0.001)
+    hedger.latency.record(0.001)
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(10)  # Stalled primary, cancelled once the hedge wins
+        return attempts
+
+    assert asyncio.run(hedger.run(call)) == 2
+    assert hedger.hedge_wins == 1
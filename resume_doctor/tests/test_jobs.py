@@ -0,0 +1,189 @@
+"""
+Background job tests
+
+JobRunner admission (queue length and held bytes), run timeouts, retention and
+stale-job expiry in both stores, and that a job is only visible to its owner.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.auth import API_SECRET_KEY
+from app.core.jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    TIMEOUT_ERROR,
+    Job,
+    JobQueueFull,
+    JobRunner,
+    MemoryJobStore,
+    SQLiteJobStore,
+)
+
+
+def run_with_runner(scenario, **options):
+    async def main():
+        settings = dict(max_workers=1, max_queue=1, timeout_seconds=5)
+        settings.update(options)
+        runner = JobRunner(MemoryJobStore(retention_seconds=60), **settings)
+        runner.start()
+        try:
+            return await scenario(runner)
+        finally:
+            await runner.stop()
+
+    return asyncio.run(main())
+
+
+async def wait_for_status(runner, job_id, *statuses):
+    for _ in range(200):
+        job = await runner.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"job stuck in {job.status}")
+
+
+def test_job_runs_and_reports_its_result():
+    async def scenario(runner):
+        async def work():
+            return {"score": 80}
+
+        job = await runner.submit("deep_scan", "u1", work)
+        assert job.status == QUEUED
+        return await wait_for_status(runner, job.id, SUCCEEDED)
+
+    job = run_with_runner(scenario)
+    assert (job.kind, job.owner, job.result) == ("deep_scan", "u1", {"score": 80})
+
+
+def test_full_queue_is_rejected():
+    async def scenario(runner):
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+
+        running = await runner.submit("k", "u", work)
+        await wait_for_status(runner, running.id, RUNNING)
+        await runner.submit("k", "u", work)  # Waits in the queue
+        with pytest.raises(JobQueueFull):
+            await runner.submit("k", "u", work)
+        release.set()
+        return runner.rejected
+
+    assert run_with_runner(scenario) == 1
+
+
+def test_held_bytes_bound_admission():
+    async def scenario(runner):
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+
+        first = await runner.submit("k", "u", work, size=600)
+        await wait_for_status(runner, first.id, RUNNING)
+        with pytest.raises(JobQueueFull):
+            await runner.submit("k", "u", work, size=600)  # Running job still holds its 600 bytes
+        await runner.submit("k", "u", work, size=400)
+        assert runner.stats()["held_bytes"] == 1000
+        release.set()
+        await asyncio.sleep(0.05)
+        return runner.stats()["held_bytes"]
+
+    assert run_with_runner(scenario, max_queue=10, max_queue_bytes=1000) == 0
+
+
+def test_lone_job_larger_than_the_byte_budget_still_runs():
+    async def scenario(runner):
+        async def work():
+            return "ok"
+
+        job = await runner.submit("k", "u", work, size=5000)
+        return await wait_for_status(runner, job.id, SUCCEEDED)
+
+    assert run_with_runner(scenario, max_queue_bytes=1000).result == "ok"
+
+
+def test_job_timeout_and_failure_payloads():
+    async def scenario(runner):
+        async def stuck():
+            await asyncio.sleep(10)
+
+        async def bad():
+            return {"error": "nope"}
+
+        timed_out = await runner.submit("k", "u", stuck)
+        timed_out = await wait_for_status(runner, timed_out.id, FAILED)
+        failed = await runner.submit("k", "u", bad, failed=lambda result: result)
+        return timed_out, await wait_for_status(runner, failed.id, FAILED)
+
+    timed_out, failed = run_with_runner(scenario, timeout_seconds=0.02)
+    assert timed_out.error == TIMEOUT_ERROR
+    assert failed.error == {"error": "nope"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(retention_seconds=60)
+    return SQLiteJobStore(str(tmp_path / "jobs.db"), retention_seconds=60)
+
+
+def age(store, job, seconds):
+    """Save job, then backdate its last update."""
+    store.save(job)
+    if isinstance(store, MemoryJobStore):
+        job.updated_at -= seconds
+    else:
+        with store._conn:
+            store._conn.execute("UPDATE jobs SET updated_at = updated_at - ? WHERE id = ?", (seconds, job.id))
+
+
+def test_store_round_trip(store):
+    job = Job(id="j1", kind="deep_scan", owner="u1", status=SUCCEEDED, result={"sections": [1, 2]})
+    store.save(job)
+    loaded = store.get("j1")
+    assert (loaded.owner, loaded.status, loaded.result) == ("u1", SUCCEEDED, {"sections": [1, 2]})
+    assert store.get("missing") is None
+
+
+def test_finished_jobs_are_purged_after_retention(store):
+    age(store, Job(id="old", kind="k", owner="u", status=SUCCEEDED), 120)
+    age(store, Job(id="recent", kind="k", owner="u", status=FAILED), 30)
+    age(store, Job(id="queued", kind="k", owner="u"), 120)  # Unfinished jobs are not purged
+    assert store.purge() == 1
+    assert [store.get(job_id) is None for job_id in ("old", "recent", "queued")] == [True, False, False]
+
+
+def test_stale_jobs_are_failed_as_interrupted(store):
+    age(store, Job(id="stale", kind="k", owner="u", status=RUNNING), 600)
+    age(store, Job(id="live", kind="k", owner="u", status=RUNNING), 5)
+    assert store.abandon_stale(300) == 1
+    assert store.get("stale").status == FAILED
+    assert store.get("stale").error["error"] == "Job interrupted"
+    assert store.get("live").status == RUNNING
+
+
+def test_jobs_are_only_visible_to_their_owner():
+    from app.core.jobs import job_runner
+    from app.main import app
+
+    job_runner.store.save(Job(id="owned", kind="deep_scan", owner="alice", status=SUCCEEDED, result={"ok": True}))
+    client = TestClient(app)
+
+    def poll(user_id):
+        return client.get("/api/v1/analyze/jobs/owned", headers={"X-API-Key": API_SECRET_KEY, "X-User-Id": user_id})
+
+    assert poll("alice").status_code == 200
+    assert poll("alice").json()["result"] == {"ok": True}
+    assert poll("mallory").status_code == 404  # Reported as missing, not forbidden
+    assert client.get("/api/v1/analyze/jobs/owned", headers={"X-User-Id": "alice"}).status_code == 401
@@ -0,0 +1,81 @@
+"""
+JSONFieldStream chunk-boundary tests
+
+Feeds one fixed model response split every possible way and checks that the
+fields, streamed section items and final object never depend on where chunks end.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import json
+
+import pytest
+
+from app.core.json_stream import JSONFieldStream, extract_json
+
+PAYLOAD = {
+    "overall_score": 72,
+    "summary_feedback": 'Say "led", not \\"helped\\" \\\\ {braces} [brackets], colons: and\nnewlines é✓',
+    "sections": [
+        {"section_name": "Experience", "issues": ["No metrics", "Uses \"I\""], "scores": [[1, 2], [3, [4]]]},
+        {"section_name": "Skills}", "issues": [], "actionable_fixes": ["Add [AWS], {GCP}"]},
+        [],
+        "plain string item",
+    ],
+    "missing_keywords": [],
+    "parsed_data": {"experience": [{"bullets": ["a,b", "c:d"]}], "empty": {}},
+    "negative": -1.5e3,
+    "flag": None,
+    "last": True,
+}
+
+RESPONSE = (
+    "Here is the analysis:\n```json\n"
+    + json.dumps(PAYLOAD, indent=2, ensure_ascii=False)
+    + "\n```\nTrailing prose with a stray { brace"
+)
+
+
+def stream_events(chunks):
+    stream = JSONFieldStream(item_keys={"sections"})
+    events = []
+    for chunk in chunks:
+        events.extend(stream.feed(chunk))
+    return stream, events
+
+
+def check(stream, events):
+    assert stream.done
+    assert stream.result() == PAYLOAD
+    assert [key for kind, key, _ in events if kind == "field"] == list(PAYLOAD)
+    assert [value for kind, _, value in events if kind == "item"] == PAYLOAD["sections"]
+
+
+@pytest.mark.parametrize("size", range(1, len(RESPONSE) + 1))
+def test_every_chunk_size(size):
+    chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+    check(*stream_events(chunks))
+
+
+def test_every_single_split_point():
+    for cut in range(len(RESPONSE) + 1):
+        check(*stream_events([RESPONSE[:cut], RESPONSE[cut:]]))
+
+
+def test_field_is_emitted_as_soon_as_complete():
+    stream = JSONFieldStream()
+    assert stream.feed('{"overall_score": 72, "summary_feedback": "Goo') == [("field", "overall_score", 72)]
+    assert stream.feed('d"}') == [("field", "summary_feedback", "Good")]
+    assert stream.text == '{"overall_score": 72, "summary_feedback": "Good"}'
+
+
+def test_incomplete_stream_falls_back_to_full_parse():
+    stream, _ = stream_events([RESPONSE[:len(RESPONSE) // 2]])
+    assert not stream.done
+    with pytest.raises(json.JSONDecodeError):
+        stream.result()
+
+
+def test_extract_json_matches_stream():
+    assert extract_json(RESPONSE) == PAYLOAD
@@ -0,0 +1,80 @@
+"""
+Local Vitals scoring tests
+
+The heuristic scorer is deterministic and sensitive to what it measures, and a
+hybrid result that fell back to local scores is never cached.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+import re
+
+from app.core.resilience import AIServiceError
+from app.services import nlp_service, result_cache
+from app.services.nlp_service import cacheable_vitals_result, local_vitals_scores, vitals_check_text_async
+
+RESUME = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe
+
+Summary
+Backend engineer with 6 years of experience building payment APIs in Python and Go.
+
+Experience
+Senior Software Engineer, Acme Payments  2019 - Present
+- Led migration of the ledger service to PostgreSQL, cutting p99 latency by 45%
+- Built a fraud scoring pipeline processing 2M transactions per day on AWS
+- Mentored 4 engineers and introduced code review guidelines adopted by 3 teams
+Software Engineer, Widgets Inc  2017 - 2019
+- Developed REST APIs in Django serving 500k monthly users
+- Reduced CI build time from 20 to 6 minutes by parallelizing test suites
+
+Education
+B.S. Computer Science, State University, 2017
+
+Skills
+Python, Go, PostgreSQL, Docker, Kubernetes, AWS, Terraform
+"""
+
+UNQUANTIFIED = RESUME.replace("45%", "a lot").replace("2M", "many").replace("4 engineers", "engineers") \
+    .replace("3 teams", "other teams").replace("500k", "many").replace("from 20 to 6 minutes", "a lot")
+
+SCORES = ("overall_score", "impact_score", "brevity_score", "style_score", "completeness_score", "ats_score")
+
+
+def test_scores_are_deterministic_and_bounded():
+    first = local_vitals_scores(RESUME)
+    assert local_vitals_scores(RESUME) == first
+    assert local_vitals_scores(RESUME + "\n") == first
+    assert all(0 <= first[name] <= 100 for name in SCORES)
+    assert re.match(r"(\d+) of \1 experience bullets are quantified", first["summary_feedback"])
+
+
+def test_metrics_raise_the_impact_score():
+    assert local_vitals_scores(RESUME)["impact_score"] > local_vitals_scores(UNQUANTIFIED)["impact_score"]
+
+
+def test_hybrid_fallback_is_marked_and_never_cached(monkeypatch):
+    calls = 0
+
+    async def unavailable(text):
+        nonlocal calls
+        calls += 1
+        raise AIServiceError(AIServiceError.CIRCUIT_OPEN)
+
+    monkeypatch.setattr(nlp_service, "llm_vitals_result_async", unavailable)
+
+    async def compute():
+        return await vitals_check_text_async(RESUME, "hybrid")
+
+    async def scenario():
+        key = "test-hybrid-fallback"
+        first, first_hit = await result_cache.get_or_compute(key, compute, cacheable_vitals_result)
+        second, second_hit = await result_cache.get_or_compute(key, compute, cacheable_vitals_result)
+        return first, first_hit, second_hit
+
+    result, first_hit, second_hit = asyncio.run(scenario())
+    assert result["scoring_mode"] == "local_fallback" and result["degraded"]
+    assert result["overall_score"] == local_vitals_scores(RESUME)["overall_score"]
+    assert (first_hit, second_hit, calls) == (False, False, 2)  # Gemini is retried, not the fallback served
@@ -0,0 +1,59 @@
+"""
+OriginMatcher tests
+
+Exact, wildcard-subdomain and port handling for Origin headers and Referer URLs.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import pytest
+
+from app.core.origins import OriginMatcher
+
+matcher = OriginMatcher.from_setting(
+    "https://app.example.com, http://localhost:3000, https://*.preview.example.dev, https://Admin.Example.com:443"
+)
+
+
+@pytest.mark.parametrize("value", [
+    "https://app.example.com",
+    "https://app.example.com/resume/upload?x=1",  # Referer
+    "HTTPS://APP.EXAMPLE.COM",
+    "https://app.example.com:443",  # Default port is the same origin
+    "http://localhost:3000",
+    "http://localhost:3000/",
+    "https://admin.example.com",  # Configured with upper case and :443
+])
+def test_exact_origins(value):
+    assert matcher.allows(value)
+
+
+@pytest.mark.parametrize("value", [
+    "https://pr-12.preview.example.dev",
+    "https://a.b.preview.example.dev/path",
+])
+def test_wildcard_matches_subdomains(value):
+    assert matcher.allows(value)
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "null",
+    "https://app.example.com.evil.io",  # Prefix of an allowed origin
+    "https://evil.io/https://app.example.com",
+    "http://app.example.com",  # Scheme differs
+    "https://app.example.com:8443",  # Port differs
+    "http://localhost:3001",
+    "http://localhost",
+    "https://preview.example.dev",  # Wildcard needs at least one label below it
+    "http://pr-12.preview.example.dev",
+    "https://pr-12.preview.example.dev:8443",
+    "https://pr-12.evilpreview.example.dev",
+])
+def test_rejected_origins(value):
+    assert not matcher.allows(value)
+
+
+def test_malformed_entries_are_ignored():
+    assert not OriginMatcher(["not a url", "https://:99999"]).allows("https://example.com")
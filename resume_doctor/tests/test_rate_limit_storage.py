@@ -0,0 +1,122 @@
+"""
+SQLite rate-limit storage tests
+
+Fixed-window counters (increment, expiry, elastic expiry), use through the
+`limits` strategy slowapi runs, and atomic increments across processes sharing
+one file.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import multiprocessing
+import sqlite3
+
+import pytest
+from limits import parse
+from limits.errors import StorageError
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app.core import rate_limit_storage
+from app.core.rate_limit_storage import SQLiteStorage, storage_errors
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit_storage, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'limits.db'}"  # Absolute path: four slashes
+
+
+def test_incr_counts_within_the_window(uri, clock):
+    storage = SQLiteStorage(uri)
+    assert storage.incr("k", expiry=60) == 1
+    assert storage.incr("k", expiry=60, amount=5) == 6
+    assert storage.get("k") == 6
+    assert storage.get_expiry("k") == clock.now + 60
+    assert storage.get("other") == 0
+
+
+def test_window_resets_after_expiry(uri, clock):
+    storage = SQLiteStorage(uri)
+    storage.incr("k", expiry=60)
+    storage.incr("k", expiry=60)
+    clock.now += 30
+    assert storage.incr("k", expiry=60) == 3
+    assert storage.get_expiry("k") == clock.now + 30  # Window end is fixed at the first hit
+    clock.now += 31
+    assert storage.get("k") == 0
+    assert storage.incr("k", expiry=60) == 1
+    assert storage.get_expiry("k") == clock.now + 60
+
+
+def test_elastic_expiry_extends_the_window(uri, clock):
+    storage = SQLiteStorage(uri)
+    storage.incr("k", expiry=60, elastic_expiry=True)
+    clock.now += 50
+    storage.incr("k", expiry=60, elastic_expiry=True)
+    assert storage.get_expiry("k") == clock.now + 60
+
+
+def test_clear_and_reset(uri):
+    storage = SQLiteStorage(uri)
+    storage.incr("a", 60)
+    storage.incr("b", 60)
+    storage.clear("a")
+    assert (storage.get("a"), storage.get("b")) == (0, 1)
+    assert storage.reset() == 1
+    assert storage.check()
+
+
+def test_registered_for_sqlite_uris_and_enforces_limits(uri):
+    storage = storage_from_string(uri)
+    assert isinstance(storage, SQLiteStorage)
+    limiter = FixedWindowRateLimiter(storage)
+    item = parse("3/day")
+    assert [limiter.hit(item, "user:1", "vitals") for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(item, "user:2", "vitals")
+
+
+def test_storage_errors_cover_sqlite_failures(uri):
+    errors = storage_errors(SQLiteStorage(uri))
+    assert issubclass(sqlite3.OperationalError, errors)
+    assert issubclass(StorageError, errors)
+
+
+def test_relative_and_missing_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert SQLiteStorage("sqlite:///relative.db").path == "relative.db"
+    with pytest.raises(ValueError):
+        SQLiteStorage("sqlite:///")
+
+
+def _hammer(uri, key, count):
+    storage = SQLiteStorage(uri, busy_timeout=30)
+    for _ in range(count):
+        storage.incr(key, expiry=3600)
+
+
+def test_increments_are_atomic_across_processes(uri):
+    processes, count = 4, 250
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_hammer, args=(uri, "shared", count)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+    assert [worker.exitcode for worker in workers] == [0] * processes
+    assert SQLiteStorage(uri).get("shared") == processes * count
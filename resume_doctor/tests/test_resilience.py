@@ -0,0 +1,144 @@
+"""
+Resilience tests
+
+Circuit breaker state transitions, retry budget exhaustion and the deadline()
+context variable that bounds every AI call made inside it.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.resilience import (
+    AIServiceError,
+    CircuitBreaker,
+    ResiliencePolicy,
+    RetryBudget,
+    deadline,
+    remaining_time,
+)
+
+
+def breaker(open_seconds=60.0):
+    return CircuitBreaker(failure_rate=0.5, min_calls=4, window_seconds=60, open_seconds=open_seconds)
+
+
+def test_breaker_stays_closed_below_min_calls_or_rate():
+    cb = breaker()
+    for ok in (False, False, False):
+        cb.record(ok)
+    assert cb.state == CircuitBreaker.CLOSED  # 3 calls < min_calls
+    cb = breaker()
+    for ok in (True, True, True, False):
+        cb.record(ok)
+    assert cb.state == CircuitBreaker.CLOSED  # 25% < 50%
+
+
+def test_breaker_opens_at_the_failure_rate():
+    cb = breaker()
+    for ok in (True, False, True, False):
+        cb.record(ok)
+    assert cb.state == CircuitBreaker.OPEN
+    assert not cb.allow()
+    assert cb.stats()["trips"] == 1 and cb.rejected == 1
+
+
+def test_half_open_admits_one_probe_and_closes_on_success():
+    cb = breaker(open_seconds=0.01)
+    for _ in range(4):
+        cb.record(False)
+    time.sleep(0.02)
+    assert cb.state == CircuitBreaker.HALF_OPEN
+    assert cb.allow()
+    assert not cb.allow()  # Only one probe at a time
+    cb.record(True)
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.allow() and cb.allow()
+
+
+def test_failed_probe_reopens():
+    cb = breaker(open_seconds=0.01)
+    for _ in range(4):
+        cb.record(False)
+    time.sleep(0.02)
+    assert cb.allow()
+    cb.record(False)
+    assert cb.state == CircuitBreaker.OPEN
+    assert cb.trips == 2
+
+
+def test_abandoned_probe_frees_the_slot():
+    cb = breaker(open_seconds=0.01)
+    for _ in range(4):
+        cb.record(False)
+    time.sleep(0.02)
+    assert cb.allow()
+    cb.abandon()
+    assert cb.allow()
+
+
+def test_retry_budget_exhausts_and_refills():
+    budget = RetryBudget(ratio=0.5, max_tokens=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()  # Half a token
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.stats()["exhausted"] == 2
+
+
+def test_policy_stops_retrying_when_the_budget_is_spent():
+    policy = ResiliencePolicy(
+        breaker(), RetryBudget(ratio=0, max_tokens=1),
+        max_retries=5, base_delay=0, max_delay=0, default_timeout=5,
+    )
+    attempts = 0
+
+    async def call(timeout):
+        nonlocal attempts
+        attempts += 1
+        raise ConnectionError("reset")
+
+    with pytest.raises(AIServiceError) as info:
+        asyncio.run(policy.run(call))
+    assert info.value.reason == AIServiceError.UPSTREAM
+    assert attempts == 2  # First attempt plus the one retry the budget allowed
+
+
+def test_deadline_sets_and_restores_the_budget():
+    assert remaining_time(7.0) == 7.0
+    with deadline(10):
+        assert 9 < remaining_time(7.0) <= 10
+        with deadline(60):
+            assert remaining_time(7.0) <= 10  # Nested deadlines only shorten
+        with deadline(1):
+            assert remaining_time(7.0) <= 1
+        assert remaining_time(7.0) > 9
+    assert remaining_time(7.0) == 7.0
+
+
+def test_deadline_reaches_tasks_and_fails_fast_once_spent():
+    policy = ResiliencePolicy(
+        breaker(), RetryBudget(ratio=1, max_tokens=10),
+        max_retries=2, base_delay=0, max_delay=0, default_timeout=5,
+    )
+
+    async def call(timeout):
+        return timeout
+
+    async def scenario():
+        with deadline(2):
+            granted = await asyncio.ensure_future(policy.run(call))
+        with deadline(-1):
+            with pytest.raises(AIServiceError) as info:
+                await policy.run(call)
+        return granted, info.value.reason
+
+    granted, reason = asyncio.run(scenario())
+    assert 1 < granted <= 2
+    assert reason == AIServiceError.TIMEOUT
@@ -0,0 +1,96 @@
+"""
+SingleFlight tests
+
+Concurrent callers with one key share a single execution, and a caller that
+goes away does not take the shared result down with it.
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"score": 80}
+
+        callers = [asyncio.ensure_future(flight.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [{"score": 80}] * 5
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        return flight, await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+
+    flight, results = asyncio.run(scenario())
+    assert results == [1, 2]
+    assert flight.executed == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()  # The caller that started the call disconnects
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    async def scenario():
+        flight = SingleFlight()
+        attempts = 0
+
+        async def work():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("k", work), flight.do("k", work), return_exceptions=True)
+        retry = await asyncio.gather(flight.do("k", work), return_exceptions=True)
+        return attempts, results + retry
+
+    attempts, results = asyncio.run(scenario())
+    assert attempts == 2
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,92 @@
+"""
+Upload limit tests
+
+read_pdf_upload (signature and per-endpoint size checks on the parsed file) and
+limit_body (the raw request body cap applied before multipart parsing).
+
+Run from resume_doctor/:
+    python -m pytest tests
+"""
+
+import asyncio
+import io
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.core.uploads import BodyTooLarge, UploadRejected, declared_body_size, limit_body, read_pdf_upload
+
+PDF = b"%PDF-1.4\n" + b"x" * 1000
+
+
+def read(content, max_bytes=2048, declared=None, **kwargs):
+    upload = UploadFile(io.BytesIO(content), size=declared, filename="resume.pdf")
+    return asyncio.run(read_pdf_upload(upload, max_bytes, **kwargs))
+
+
+def rejection(content, **kwargs):
+    with pytest.raises(UploadRejected) as info:
+        read(content, **kwargs)
+    return info.value
+
+
+def test_accepts_a_pdf_within_the_limit():
+    assert read(PDF, chunk_size=64) == PDF
+
+
+def test_rejects_declared_oversize_before_reading():
+    error = rejection(PDF, max_bytes=100, declared=5 * 1024 * 1024)
+    assert (error.reason, error.size) == (UploadRejected.TOO_LARGE, 5 * 1024 * 1024)
+
+
+def test_rejects_oversize_while_streaming():
+    error = rejection(PDF, max_bytes=500, chunk_size=128)
+    assert error.reason == UploadRejected.TOO_LARGE
+    assert 500 < error.size <= 500 + 128  # Stopped at the first chunk over the limit
+
+
+def test_rejects_content_without_the_pdf_signature():
+    assert rejection(b"PK\x03\x04" + b"x" * 100).reason == UploadRejected.NOT_PDF
+    assert rejection(b"<html>" * 100, chunk_size=2).reason == UploadRejected.NOT_PDF
+
+
+def test_rejects_empty_and_tiny_uploads():
+    assert rejection(b"").reason == UploadRejected.TOO_SMALL
+    assert rejection(b"%PDF", min_bytes=10).reason == UploadRejected.TOO_SMALL
+
+
+def messages(*bodies):
+    queue = [{"type": "http.request", "body": body, "more_body": i < len(bodies) - 1} for i, body in enumerate(bodies)]
+
+    async def receive():
+        return queue.pop(0)
+
+    return receive
+
+
+def drain(receive):
+    async def run():
+        seen = []
+        while True:
+            message = await receive()
+            seen.append(message)
+            if not message.get("more_body"):
+                return seen
+
+    return asyncio.run(run())
+
+
+def test_limit_body_passes_bodies_within_the_cap():
+    assert len(drain(limit_body(messages(b"a" * 50, b"b" * 50), 100))) == 2
+
+
+def test_limit_body_stops_at_the_cap():
+    with pytest.raises(BodyTooLarge) as info:
+        drain(limit_body(messages(b"a" * 60, b"b" * 60, b"c" * 60), 100))
+    assert info.value.status_code == 413
+
+
+def test_declared_body_size():
+    assert declared_body_size({"headers": [(b"content-length", b"1234")]}) == 1234
+    assert declared_body_size({"headers": [(b"content-length", b"nope")]}) is None
+    assert declared_body_size({"headers": [(b"transfer-encoding", b"chunked")]}) is None